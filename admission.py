@@ -0,0 +1,304 @@
+"""
+🚦 Contrôle d'admission des routes de prédiction
+
+Au plus ``limit`` requêtes de prédiction sont traitées à la fois; les
+suivantes attendent une place dans une file FIFO. Une requête dont l'attente
+estimée dépasse le budget (``queue_timeout_ms``), ou qui l'a réellement
+dépassé, reçoit aussitôt un 503 avec ``Retry-After`` : sous une rafale, le
+service reste rapide pour les requêtes admises au lieu de ralentir pour tout
+le monde. Les autres routes (``/health``, ``/model/info``, administration)
+ne passent jamais par la file et restent prioritaires.
+
+Un flux (``/predict/stream``) dure aussi longtemps que le client envoie : il
+n'occupe pas de place de la limite, qu'il bloquerait pour toute sa durée,
+mais compte dans une borne séparée (``max_streams`` flux simultanés, 503
+immédiat au-delà, sans file). Ses appels d'inférence restent observés.
+
+La limite s'adapte à la latence d'inférence observée (``observe``, appelé
+par l'exécuteur d'inférence), à la manière de l'algorithme Gradient2 :
+chaque appel est rapporté à la latence moyenne à long terme de son type
+(``predict``, ``predict_batch``... : un lot de 100 lignes n'est pas une
+requête lente), moyenne qui suit lentement (sur ``history`` appels) les
+changements durables. Par fenêtres de ``window`` appels, si ce rapport
+moyen dépasse ``tolerance``, la limite baisse en proportion; sinon, si la
+limite a été atteinte, elle monte de ``sqrt(limit)``. Une moyenne plutôt
+qu'un minimum : les succès du cache de prédictions feraient passer toutes
+les autres requêtes pour des lenteurs. La latence d'inférence,
+contrairement à celle de la requête entière, n'inclut pas le temps passé
+par la boucle d'événements sur les autres requêtes (dont les rejets).
+Chaque worker a son propre contrôleur.
+"""
+
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+PREDICTION_PREFIX = "/predict"
+# Durée liée au client: hors de la limite, bornés par ``max_streams``
+STREAM_PATHS = ("/predict/stream",)
+
+# Réponse de rejet préconstruite: un rejet doit coûter bien moins qu'une prédiction
+_REJECT_BODY = json.dumps({"detail": "Service surchargé, réessayer plus tard"}).encode()
+_REJECT_HEADERS = [
+    (b"content-type", b"application/json"),
+    (b"content-length", str(len(_REJECT_BODY)).encode()),
+]
+
+
+def _smooth(average: float, value: float) -> float:
+    """Moyenne mobile exponentielle (la première valeur sert d'initialisation)"""
+    return value if not average else 0.9 * average + 0.1 * value
+
+
+class AdmissionController:
+    """Limite de concurrence adaptative avec file d'attente bornée en temps"""
+
+    def __init__(
+        self,
+        initial_limit: int = 16,
+        min_limit: int = 2,
+        max_limit: int = 64,
+        queue_timeout_ms: float = 250.0,
+        max_queue: int = 256,
+        tolerance: float = 2.0,
+        window: int = 32,
+        history: int = 200,
+        max_streams: int = 8,
+    ):
+        if not 1 <= min_limit <= initial_limit <= max_limit:
+            raise ValueError("Il faut 1 <= min_limit <= initial_limit <= max_limit")
+        if tolerance < 1:
+            raise ValueError("tolerance doit être >= 1")
+
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.queue_timeout = queue_timeout_ms / 1000
+        self.max_queue = max_queue
+        self.tolerance = tolerance
+        self.window = window
+        self.history = history
+        self.max_streams = max_streams
+
+        self.in_flight = 0
+        self.streams = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        # Latence rapportée à la latence à vide: fenêtre en cours, par type d'appel
+        self._window_sum = 0.0
+        self._window_count = 0
+        self._peak_in_flight = 0
+        self._long_latency: Dict[str, float] = {}
+        self.latency_ratio = 1.0
+        self.latency = 0.0
+        self.hold_time = 0.0
+
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.streams_rejected = 0
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        # Nouvelle boucle (clients de test successifs): la file précédente est morte
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._waiters = deque()
+            self.in_flight = 0
+            self.streams = 0
+        return loop
+
+    def expected_wait(self) -> float:
+        """Attente estimée d'une nouvelle requête mise en file (secondes)"""
+        return (len(self._waiters) + 1) * self.hold_time / int(self.limit)
+
+    def retry_after(self) -> int:
+        """Délai conseillé aux clients rejetés (secondes entières, au moins 1)"""
+        return max(1, math.ceil(self.expected_wait()))
+
+    async def acquire(self) -> bool:
+        """Réserve une place; False si la requête doit être rejetée"""
+        loop = self._ensure_loop()
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self.in_flight)
+            self.admitted += 1
+            return True
+
+        if len(self._waiters) >= self.max_queue or (
+            self.expected_wait() > self.queue_timeout
+        ):
+            self.rejected += 1
+            return False
+
+        future = loop.create_future()
+        self._waiters.append(future)
+        self.queued += 1
+        timer = loop.call_later(self.queue_timeout, self._expire, future)
+        try:
+            admitted = await future
+        except asyncio.CancelledError:
+            # Client parti: rendre la place si elle venait d'être attribuée
+            if future.cancelled():
+                self._discard(future)
+            elif future.result():
+                self.release(None)
+            raise
+        finally:
+            timer.cancel()
+
+        if admitted:
+            self.admitted += 1
+        else:
+            self.timed_out += 1
+            self.rejected += 1
+        return admitted
+
+    def acquire_stream(self) -> bool:
+        """Réserve un flux, hors limite; False au-delà de ``max_streams``"""
+        self._ensure_loop()
+        if self.streams >= self.max_streams:
+            self.streams_rejected += 1
+            return False
+        self.streams += 1
+        return True
+
+    def release_stream(self):
+        self.streams -= 1
+
+    def _expire(self, future: asyncio.Future):
+        """Budget d'attente dépassé: la requête quitte la file"""
+        if not future.done():
+            future.set_result(False)
+            self._discard(future)
+
+    def _discard(self, future: asyncio.Future):
+        try:
+            self._waiters.remove(future)
+        except ValueError:
+            pass
+
+    def release(self, hold_time: Optional[float]):
+        """Libère une place (occupée ``hold_time`` s) et la passe au suivant"""
+        if hold_time is not None:
+            # Plafonnée au budget: une requête isolée très lente (GC, lot géant)
+            # ne doit pas faire rejeter toute la file
+            self.hold_time = _smooth(self.hold_time, min(hold_time, self.queue_timeout))
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < int(self.limit):
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(True)
+                self.in_flight += 1
+                self._peak_in_flight = max(self._peak_in_flight, self.in_flight)
+
+    def observe(self, kind: str, latency: float):
+        """Latence d'un appel d'inférence de type ``kind`` (secondes)"""
+        self.latency = _smooth(self.latency, latency)
+        reference = self._long_latency.get(kind)
+        if reference is None:
+            self._long_latency[kind] = latency
+            return
+        # Suivi lent: une surcharge brève ne devient pas la norme, mais un
+        # changement durable (autre mélange de requêtes, cache) est absorbé
+        self._long_latency[kind] = reference + (latency - reference) / self.history
+
+        self._window_sum += latency / reference if reference > 0 else 1.0
+        self._window_count += 1
+        if self._window_count >= self.window:
+            self.latency_ratio = self._window_sum / self._window_count
+            self._adjust(self.latency_ratio)
+            self._window_sum, self._window_count = 0.0, 0
+            self._peak_in_flight = self.in_flight
+
+    def _adjust(self, ratio: float):
+        """Ajuste la limite d'après le rapport moyen à la latence à long terme"""
+        if ratio < 0.5:
+            # Sortie de surcharge: la moyenne à long terme rattrape la baisse
+            for kind in self._long_latency:
+                self._long_latency[kind] *= 0.9
+        gradient = self.tolerance / ratio
+        if gradient < 1:
+            limit = self.limit * max(0.5, gradient)
+        elif self._peak_in_flight >= int(self.limit):
+            limit = self.limit + math.sqrt(self.limit)
+        else:
+            return
+        self.limit = min(self.max_limit, max(self.min_limit, limit))
+
+    def stats(self) -> Dict:
+        """Limite courante, occupation et compteurs d'admission"""
+        return {
+            "limit": int(self.limit),
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "queue_depth": len(self._waiters),
+            "queue_timeout_ms": self.queue_timeout * 1000,
+            "latency_ms": self.latency * 1000,
+            "hold_time_ms": self.hold_time * 1000,
+            "latency_ratio": self.latency_ratio,
+            "long_latency_ms": {
+                kind: latency * 1000 for kind, latency in self._long_latency.items()
+            },
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "streams": self.streams,
+            "max_streams": self.max_streams,
+            "streams_rejected": self.streams_rejected,
+        }
+
+
+class AdmissionMiddleware:
+    """Middleware ASGI: admission des routes ``/predict*``, 503 si surcharge"""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(PREDICTION_PREFIX):
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.controller
+        if scope["path"] in STREAM_PATHS:
+            if not controller.acquire_stream():
+                await self._reject(send, 1)
+                return
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                controller.release_stream()
+            return
+
+        if not await controller.acquire():
+            await self._reject(send, controller.retry_after())
+            return
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(time.perf_counter() - start)
+
+    @staticmethod
+    async def _reject(send, retry_after: int):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    *_REJECT_HEADERS,
+                    (b"retry-after", str(retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": _REJECT_BODY})
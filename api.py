@@ -5,24 +5,131 @@ FastAPI service pour servir les prédictions de prix de maisons.
 Basé sur le notebook 04_deployment_api.ipynb
 """
 
+import asyncio
+import hashlib
+import hmac
 import json
 import logging
+import os
 import pickle
+import signal
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple, get_args, get_origin
 
 import numpy as np
-import pandas as pd
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel, Field, validator
+from starlette.requests import ClientDisconnect
+from prometheus_client import CONTENT_TYPE_LATEST
+from pydantic import BaseModel, Field, TypeAdapter, validator
+from typing_extensions import TypedDict
+
+from admission import AdmissionController, AdmissionMiddleware
+from audit import AuditLog
+from binary_format import (
+    UnsupportedMediaType,
+    decode_matrix,
+    encode_prices,
+    negotiate,
+)
+from features import (
+    AREA,
+    BASE_FEATURE_NAMES,
+    FeaturePlan,
+    records_to_raw,
+    sample_raw_features,
+)
+from drift import DriftMonitor, baseline_path, load_baseline
+from explain import TreeExplainer, raw_contributions
+from shadow import ShadowScorer, load_candidates
+import metrics
+import profiling
+from inference_executor import InferenceExecutor
+from micro_batching import MicroBatcher
+from model_artifact import artifact_path, load_artifact
+from model_registry import ModelRegistry, ModelVersion
+from prediction_cache import PredictionCache, canonical_key
+from price_index import PriceIndex
+from tree_engine import FlatTreeEnsemble
+from validation import validate_columns, validate_raw
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Moteur d'inférence: "sklearn" (model.predict), "flat" (arbres aplatis)
+# ou "index" (marches de prix précalculées par profil, cf. price_index.py)
+PREDICTOR_ENGINE = os.getenv("PREDICTOR_ENGINE", "sklearn")
+# Au-delà de ce nombre de lignes, la boucle Cython de sklearn reste plus rapide
+FLAT_ENGINE_MAX_ROWS = int(os.getenv("FLAT_ENGINE_MAX_ROWS", "64"))
+# Format du modèle chargé: "pickle" (scikit-learn) ou "flat" (artefact compact
+# écrit par model_artifact.py, chargé sans importer scikit-learn)
+MODEL_FORMAT = os.getenv("MODEL_FORMAT", "pickle")
+
+# Cache des prédictions (taille 0 = désactivé, TTL 0 = sans expiration)
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL", "300"))
+
+# Bascule de version (/admin/models/.../promote, /rollback): en-tête
+# X-Admin-Token égal à ADMIN_TOKEN (vide = bascule HTTP désactivée)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# Exécution de l'inférence: "inline", "thread" (pool borné) ou "process"
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread")
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0")) or None
+
+# Micro-batching des requêtes /predict concurrentes
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "0") == "1"
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "2"))
+
+# Contrôle d'admission des routes /predict* (503 + Retry-After si surcharge),
+# désactivé par défaut
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "0") == "1"
+ADMISSION_INITIAL_LIMIT = int(os.getenv("ADMISSION_INITIAL_LIMIT", "16"))
+ADMISSION_MIN_LIMIT = int(os.getenv("ADMISSION_MIN_LIMIT", "2"))
+ADMISSION_MAX_LIMIT = int(os.getenv("ADMISSION_MAX_LIMIT", "64"))
+ADMISSION_QUEUE_TIMEOUT_MS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", "250"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "256"))
+ADMISSION_LATENCY_TOLERANCE = float(os.getenv("ADMISSION_LATENCY_TOLERANCE", "2"))
+ADMISSION_MAX_STREAMS = int(os.getenv("ADMISSION_MAX_STREAMS", "8"))
+
+# Prédiction en flux NDJSON: taille max d'un bloc interne et d'une ligne
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "256"))
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", "65536"))
+
+# Courbes de prix (/predict/sweep): points max de la grille, points d'une plage
+SWEEP_MAX_POINTS = int(os.getenv("SWEEP_MAX_POINTS", "20000"))
+SWEEP_DEFAULT_STEPS = 50
+
+# Surveillance de la dérive des entrées (/drift): comparaison périodique à la
+# référence du modèle, compteurs amortis de moitié toutes les DRIFT_HALF_LIFE s
+DRIFT_ENABLED = os.getenv("DRIFT_ENABLED", "1") == "1"
+DRIFT_CHECK_INTERVAL = float(os.getenv("DRIFT_CHECK_INTERVAL", "60"))
+DRIFT_HALF_LIFE = float(os.getenv("DRIFT_HALF_LIFE", "3600"))
+
+# Journal d'audit des prédictions (JSONL, écrit par lots hors des requêtes)
+AUDIT_ENABLED = os.getenv("AUDIT_ENABLED", "0") == "1"
+AUDIT_DIR = os.getenv("AUDIT_DIR", "audit")
+AUDIT_POLICY = os.getenv("AUDIT_POLICY", "drop")
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "512"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1"))
+AUDIT_MAX_BYTES = int(os.getenv("AUDIT_MAX_BYTES", str(64 * 1024 * 1024)))
+AUDIT_MAX_AGE = float(os.getenv("AUDIT_MAX_AGE", "3600"))
+
+# Scoring fantôme: les autres versions de models/ rejouent une fraction des
+# lots servis dans un thread dédié (SHADOW_MODELS vide = toutes les versions)
+SHADOW_ENABLED = os.getenv("SHADOW_ENABLED", "0") == "1"
+SHADOW_MODELS = [name for name in os.getenv("SHADOW_MODELS", "").split(",") if name]
+SHADOW_FRACTION = float(os.getenv("SHADOW_FRACTION", "0.1"))
+SHADOW_MAX_PENDING = int(os.getenv("SHADOW_MAX_PENDING", "256"))
+
 
 class HouseFeatures(BaseModel):
     """Modèle de validation pour les caractéristiques de la maison"""
@@ -54,6 +161,21 @@ class HouseFeatures(BaseModel):
         return v
 
 
+class PredictionExplanation(BaseModel):
+    """Contributions additives au prix prédit (``?explain=true``)
+
+    ``base_value`` + somme des ``contributions`` = ``price``.
+    """
+
+    base_value: float = Field(..., description="Prix moyen du modèle")
+    contributions: Dict[str, float] = Field(
+        ..., description="Contribution de chaque caractéristique d'entrée"
+    )
+    feature_contributions: Dict[str, float] = Field(
+        ..., description="Contribution de chaque feature du modèle (TreeSHAP)"
+    )
+
+
 class PredictionResponse(BaseModel):
     """Modèle de réponse pour les prédictions"""
 
@@ -63,6 +185,181 @@ class PredictionResponse(BaseModel):
     confidence: str = Field(..., description="Niveau de confiance")
     features_used: Dict[str, Any] = Field(..., description="Caractéristiques utilisées")
     prediction_time: str = Field(..., description="Timestamp de la prédiction")
+    explanation: Optional[PredictionExplanation] = Field(
+        None, description="Contributions par caractéristique (``explain=true``)"
+    )
+
+
+class SlimPredictionResponse(BaseModel):
+    """Réponse réduite (``?slim=true``): sans caractéristiques ni prix formaté"""
+
+    price: float = Field(..., description="Prix prédit")
+    confidence: str = Field(..., description="Niveau de confiance")
+    explanation: Optional[PredictionExplanation] = Field(
+        None, description="Contributions par caractéristique (``explain=true``)"
+    )
+
+
+def _as_dict_type(annotation):
+    """Remplace les modèles pydantic d'une annotation par des TypedDict
+
+    Les modèles imbriqués (``Optional[...]``, ``List[...]``) sont eux aussi
+    attendus sous forme de dict : sans cela, pydantic signale chaque valeur
+    comme inattendue à la sérialisation.
+    """
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        fields = {
+            name: _as_dict_type(field.annotation)
+            for name, field in annotation.model_fields.items()
+        }
+        return TypedDict(f"{annotation.__name__}Dict", fields)
+    args = get_args(annotation)
+    if args:
+        converted = tuple(_as_dict_type(arg) for arg in args)
+        if converted != args:
+            return get_origin(annotation)[converted]
+    return annotation
+
+
+def _dict_serializer(model_class) -> TypeAdapter:
+    """Sérialiseur JSON compilé pour un dict ayant les champs de ``model_class``
+
+    Le dict n'est ni revalidé ni converti en instance du modèle ; les clés en
+    trop sont ignorées.
+    """
+    return TypeAdapter(_as_dict_type(model_class))
+
+
+class BatchPredictionRequest(BaseModel):
+    """Requête de prédiction en lot (validation ligne par ligne)"""
+
+    houses: List[Dict[str, Any]] = Field(
+        ..., description="Liste des caractéristiques de maisons"
+    )
+
+
+class BatchPredictionItem(BaseModel):
+    """Résultat d'une ligne d'un lot"""
+
+    index: int = Field(..., description="Position de la ligne dans le lot")
+    prediction: Optional[PredictionResponse] = Field(
+        None, description="Prédiction (absente si la ligne est invalide)"
+    )
+    error: Optional[str] = Field(None, description="Erreur de validation")
+
+
+class BatchPredictionResponse(BaseModel):
+    """Modèle de réponse pour les prédictions en lot"""
+
+    count: int = Field(..., description="Nombre de lignes reçues")
+    success_count: int = Field(..., description="Nombre de lignes prédites")
+    error_count: int = Field(..., description="Nombre de lignes rejetées")
+    results: List[BatchPredictionItem]
+
+
+class ColumnarBatchRequest(BaseModel):
+    """Lot en colonnes: une liste de valeurs par caractéristique
+
+    Les colonnes sont validées de façon vectorisée avec les mêmes contraintes
+    que HouseFeatures ; une colonne absente rend toutes les lignes invalides.
+    """
+
+    area: Optional[List[Any]] = Field(None, description="Surfaces (sq ft)")
+    bedrooms: Optional[List[Any]] = Field(None, description="Chambres")
+    bathrooms: Optional[List[Any]] = Field(None, description="Salles de bain")
+    stories: Optional[List[Any]] = Field(None, description="Étages")
+    mainroad: Optional[List[Any]] = Field(None, description="Route principale")
+    guestroom: Optional[List[Any]] = Field(None, description="Chambre d'amis")
+    basement: Optional[List[Any]] = Field(None, description="Sous-sol")
+    hotwaterheating: Optional[List[Any]] = Field(None, description="Eau chaude")
+    airconditioning: Optional[List[Any]] = Field(None, description="Climatisation")
+    parking: Optional[List[Any]] = Field(None, description="Places de parking")
+    prefarea: Optional[List[Any]] = Field(None, description="Zone préférée")
+    furnishingstatus: Optional[List[Any]] = Field(None, description="Ameublement")
+
+
+class ColumnarRowError(BaseModel):
+    """Erreur de validation d'une ligne d'un lot en colonnes"""
+
+    index: int = Field(..., description="Position de la ligne dans le lot")
+    error: str = Field(..., description="Erreur de validation")
+
+
+class ColumnarPredictionResponse(BaseModel):
+    """Résultats en colonnes (null pour les lignes rejetées)"""
+
+    count: int = Field(..., description="Nombre de lignes reçues")
+    success_count: int = Field(..., description="Nombre de lignes prédites")
+    error_count: int = Field(..., description="Nombre de lignes rejetées")
+    prices: List[Optional[float]] = Field(..., description="Prix prédits")
+    price_per_sqft: List[Optional[float]] = Field(
+        ..., description="Prix par pied carré"
+    )
+    errors: List[ColumnarRowError] = Field(..., description="Lignes rejetées")
+
+
+class SweepAxis(BaseModel):
+    """Caractéristique à faire varier: liste de valeurs ou plage ``start``-``stop``
+
+    Sans ``steps``, une plage d'entiers prend chaque entier et une plage de
+    surfaces ``SWEEP_DEFAULT_STEPS`` points régulièrement espacés.
+    """
+
+    feature: str = Field(..., description="Caractéristique (area, bedrooms...)")
+    values: Optional[List[float]] = Field(None, description="Valeurs explicites")
+    start: Optional[float] = Field(None, description="Début de la plage (inclus)")
+    stop: Optional[float] = Field(None, description="Fin de la plage (incluse)")
+    steps: Optional[int] = Field(None, ge=2, description="Nombre de points")
+
+    @validator("feature")
+    def validate_feature(cls, v):
+        if v not in BASE_FEATURE_NAMES:
+            raise ValueError(f"Caractéristique inconnue: {v}")
+        return v
+
+    def grid_values(self) -> np.ndarray:
+        """Valeurs de l'axe (ValueError si l'axe est mal défini)"""
+        if self.values is not None:
+            if self.start is not None or self.stop is not None:
+                raise ValueError(f"{self.feature}: values ou start/stop, pas les deux")
+            if not self.values:
+                raise ValueError(f"{self.feature}: values est vide")
+            return np.array(self.values, dtype=np.float64)
+        if self.start is None or self.stop is None:
+            raise ValueError(f"{self.feature}: values ou start et stop requis")
+
+        steps = self.steps
+        if steps is None:
+            if self.feature == "area":
+                steps = SWEEP_DEFAULT_STEPS
+            else:
+                steps = int(abs(self.stop - self.start)) + 1
+        return np.linspace(self.start, self.stop, steps)
+
+
+class SweepRequest(BaseModel):
+    """Variantes d'une maison selon un ou deux axes"""
+
+    base: HouseFeatures
+    axes: List[SweepAxis] = Field(..., min_length=1, max_length=2)
+
+
+class SweepAxisValues(BaseModel):
+    """Valeurs effectives d'un axe de la grille"""
+
+    feature: str
+    values: List[float]
+
+
+class SweepResponse(BaseModel):
+    """Courbe (1 axe) ou surface (2 axes: ``prices[i][j]``) de prix"""
+
+    axes: List[SweepAxisValues]
+    shape: List[int] = Field(..., description="Nombre de valeurs par axe")
+    count: int = Field(..., description="Nombre de points de la grille")
+    prices: List[Any] = Field(..., description="Prix, une dimension par axe")
+    min_price: float
+    max_price: float
 
 
 class ModelInfo(BaseModel):
@@ -73,141 +370,474 @@ class ModelInfo(BaseModel):
     feature_names: List[str]
     training_date: Optional[str]
     model_version: str
+    active_version: Optional[str] = None
+    model_file: Optional[str] = None
+
+
+def _format_validation_error(error: Exception) -> str:
+    """Résume une erreur de validation pydantic sur une seule ligne"""
+    if hasattr(error, "errors"):
+        return "; ".join(
+            f"{'.'.join(str(loc) for loc in err['loc'])}: {err['msg']}"
+            for err in error.errors()
+        )
+    return str(error)
 
 
 class HousePricePredictor:
     """Service de prédiction des prix de maisons"""
 
-    def __init__(self, model=None, feature_names=None):
+    def __init__(
+        self,
+        model=None,
+        feature_names=None,
+        engine="sklearn",
+        cache=None,
+        model_format="pickle",
+        version: Optional[ModelVersion] = None,
+    ):
+        if engine not in ("sklearn", "flat", "index"):
+            raise ValueError(f"Moteur d'inférence inconnu: {engine}")
+        if model_format not in ("pickle", "flat"):
+            raise ValueError(f"Format de modèle inconnu: {model_format}")
+
         self.model = model
-        self.feature_names = feature_names or [
-            "area",
-            "bedrooms",
-            "bathrooms",
-            "stories",
-            "mainroad",
-            "guestroom",
-            "basement",
-            "hotwaterheating",
-            "airconditioning",
-            "parking",
-            "prefarea",
-            "furnishingstatus",
-        ]
+        self.feature_names = feature_names or list(BASE_FEATURE_NAMES)
         self.model_info = {}
+        self.engine = engine
+        self.model_format = model_format
+        self.model_type = type(model).__name__ if model is not None else None
+        self.tree_engine = None
+        self.price_index = None
+        self._explainer: Optional[TreeExplainer] = None
+        self.drift: Optional[DriftMonitor] = DriftMonitor() if DRIFT_ENABLED else None
+        self.shadow: Optional[ShadowScorer] = None
+        # Processus du pool (mode process): lignes servies à renvoyer au parent
+        self.served: Optional[List[Tuple[np.ndarray, np.ndarray]]] = None
+        self.cache: Optional[PredictionCache] = cache
+        self.version: Optional[ModelVersion] = None
 
         if model is None:
-            self.load_model()
-
-    def load_model(self):
-        """Charge le modèle et ses métadonnées"""
-        models_path = Path("models")
-
-        if not models_path.exists():
-            raise FileNotFoundError("Dossier 'models' non trouvé")
-
-        # Chercher le modèle
-        model_files = list(models_path.glob("best_model_*.pkl"))
-        if not model_files:
-            raise FileNotFoundError("Aucun modèle trouvé dans 'models/'")
+            self.load_model(version)
+        else:
+            self.model_hash = f"memory-{id(model):x}"
+            self.feature_plan = FeaturePlan(self.feature_names)
+            self._build_inference_engine()
+
+    def load_model(self, version: Optional[ModelVersion] = None):
+        """Charge une version du modèle (par défaut la version active du registre)"""
+        if version is None:
+            version = ModelRegistry(Path("models")).active_version()
+        self.version = version
+        model_file = version.model_file
+
+        flat_file = artifact_path(model_file)
+        if self.model_format == "flat":
+            if self._load_artifact(flat_file, version.version):
+                return
+            logger.warning(
+                f"Artefact {flat_file.name} absent ou périmé "
+                "(python model_artifact.py) - chargement du pickle"
+            )
 
-        model_file = model_files[0]  # Prendre le premier trouvé
         logger.info(f"Chargement du modèle: {model_file.name}")
 
-        # Charger le modèle
-        with open(model_file, "rb") as f:
-            self.model = pickle.load(f)
+        # Charger le modèle (l'empreinte du fichier identifie sa version)
+        model_bytes = model_file.read_bytes()
+        self.model = pickle.loads(model_bytes)
+        self.model_hash = hashlib.sha256(model_bytes).hexdigest()[:16]
+        self.model_type = type(self.model).__name__
 
-        # Charger les métadonnées
-        metadata_files = list(models_path.glob("model_metadata_*.json"))
-        if metadata_files:
-            with open(metadata_files[0], "r") as f:
+        # Charger les métadonnées associées à cette version
+        self.model_info = {}
+        if version.metadata_file is not None:
+            with open(version.metadata_file, "r") as f:
                 metadata = json.load(f)
                 self.model_info = metadata
                 if "data_info" in metadata and "feature_names" in metadata["data_info"]:
                     self.feature_names = metadata["data_info"]["feature_names"]
 
-        logger.info(f"Modèle chargé: {type(self.model).__name__}")
+        # Compiler le plan de feature engineering une seule fois
+        self.feature_plan = FeaturePlan(self.feature_names)
+        self._build_inference_engine()
+        self._model_loaded()
+
+    def _load_artifact(self, flat_file: Path, model_hash: str) -> bool:
+        """Charge l'artefact compact s'il correspond à la version demandée"""
+        if not flat_file.exists():
+            return False
+        ensemble, header = load_artifact(flat_file)
+        if header["model_hash"] != model_hash:
+            return False
+        logger.info(f"Chargement de l'artefact: {flat_file.name}")
+
+        # L'ensemble aplati tient lieu de modèle (même interface predict)
+        self.model = ensemble
+        self.tree_engine = ensemble
+        self.price_index = None
+        self._explainer = None
+        self.model_hash = header["model_hash"]
+        self.model_type = header["model_type"]
+        self.model_info = header["metadata"]
+        self.feature_names = header["feature_names"]
+        self.feature_plan = FeaturePlan(self.feature_names)
+        if self.engine == "index":
+            logger.warning("Moteur index indisponible sans le modèle scikit-learn")
+        self._model_loaded()
+        return True
+
+    def _model_loaded(self):
+        # Les prédictions en cache appartiennent à l'ancien modèle
+        if self.cache is not None:
+            self.cache.clear()
+
+        # Référence de dérive écrite à côté des métadonnées (python drift.py)
+        if self.drift is not None:
+            # Prix prédits par l'ancien modèle: plus comparables à sa référence
+            self.drift.sketch.reset_field("price")
+            metadata_file = self.version.metadata_file if self.version else None
+            if metadata_file is not None:
+                self.drift.baseline = load_baseline(baseline_path(metadata_file))
+
+        logger.info(f"Modèle chargé: {self.model_type}")
+
+    def _build_inference_engine(self):
+        """Prépare le moteur "flat" ou "index" à partir du modèle chargé"""
+        self.tree_engine = None
+        self.price_index = None
+        self._explainer = None
 
-    def predict(self, features: Dict) -> Dict:
-        """Prédit le prix d'une maison"""
+        try:
+            if self.engine == "flat":
+                self.tree_engine = FlatTreeEnsemble.from_sklearn(self.model)
+                logger.info(
+                    f"Moteur aplati: {self.tree_engine.n_trees} arbres, "
+                    f"profondeur {self.tree_engine.depth}"
+                )
+            elif self.engine == "index":
+                self.price_index = PriceIndex(self.model, self.feature_plan)
+                index_file = Path("models") / "price_index.npz"
+                if index_file.exists():
+                    try:
+                        count = self.price_index.load(index_file)
+                        logger.info(f"Index de prix chargé: {count} profils")
+                    except ValueError as e:
+                        # L'index reste exact: ses profils sont calculés à la demande
+                        logger.warning(f"{e} - profils calculés à la demande")
+        except (TypeError, AttributeError, ValueError) as e:
+            self.tree_engine = None
+            self.price_index = None
+            logger.warning(f"{e} - utilisation de model.predict")
+
+    @property
+    def explainable(self) -> bool:
+        """Le modèle chargé peut-il expliquer ses prédictions (``explain=true``) ?"""
+        return TreeExplainer.supports(self.model)
+
+    def _explain_raw(self, raw: np.ndarray) -> List[Dict]:
+        """Explication TreeSHAP de chaque ligne d'une matrice brute N×12"""
+        if not self.explainable:
+            raise ValueError(f"Explications indisponibles pour {self.model_type}")
+        # Construit à la première demande: le mode est optionnel
+        if self._explainer is None:
+            self._explainer = TreeExplainer(self.model)
+
+        start = metrics.stage_start()
+        contributions = self._explainer.shap_values(self.feature_plan.transform(raw))
+        by_input, unattributed = raw_contributions(
+            contributions, raw, self.feature_names
+        )
+        base_values = self._explainer.base_value + unattributed
+        explanations = [
+            {
+                "base_value": float(base_value),
+                "contributions": dict(zip(BASE_FEATURE_NAMES, row_by_input)),
+                "feature_contributions": dict(zip(self.feature_names, row)),
+            }
+            for base_value, row_by_input, row in zip(
+                base_values, by_input.tolist(), contributions.tolist()
+            )
+        ]
+        metrics.observe_stage("explanation", start)
+        return explanations
+
+    def _predict_matrix(self, feature_matrix: np.ndarray) -> np.ndarray:
+        """Prédit une matrice de features avec le moteur configuré"""
+        if self.tree_engine is not None and len(feature_matrix) <= FLAT_ENGINE_MAX_ROWS:
+            return self.tree_engine.predict(feature_matrix)
+        return self.model.predict(feature_matrix)
+
+    def _predict_raw(self, raw: np.ndarray) -> np.ndarray:
+        """Prédit une matrice brute N×12 (feature engineering inclus)"""
+        metrics.count_predictions(self.model_hash, len(raw))
+        try:
+            start = metrics.stage_start()
+            if self.price_index is not None:
+                prices = self.price_index.predict(raw)
+                metrics.observe_stage("inference", start)
+                return prices
+
+            feature_matrix = self.feature_plan.transform(raw)
+            metrics.observe_stage("feature_engineering", start)
+            start = metrics.stage_start()
+            prices = self._predict_matrix(feature_matrix)
+            metrics.observe_stage("inference", start)
+        except Exception:
+            metrics.count_error("prediction")
+            raise
+
+        return prices
+
+    def _observe_served(self, raw: np.ndarray, prices: np.ndarray):
+        """Lignes servies (validées): esquisse de dérive et scoring fantôme"""
+        if self.served is not None:
+            self.served.append((raw, prices))
+            return
+        if self.drift is not None:
+            self.drift.observe(raw, prices)
+        if self.shadow is not None:
+            self.shadow.submit(raw, prices, self.model_hash)
+
+    def predict_prices(self, raw) -> np.ndarray:
+        """Prix bruts d'une matrice N×12 déjà validée (sans cache ni mise en forme)"""
         if self.model is None:
             raise Exception("Modèle non chargé")
+        return self._predict_raw(np.asarray(raw, dtype=np.float64))
+
+    def score_matrix(self, raw: np.ndarray) -> Tuple[np.ndarray, Dict[int, str]]:
+        """Valide et prédit une matrice brute N×12 (NaN pour les lignes invalides)
+
+        Sans ligne invalide, la matrice est transmise telle quelle au feature
+        engineering, sans copie.
+        """
+        # Matrice vide: rien à valider ni à prédire (comme un lot JSON vide)
+        if len(raw) == 0:
+            return np.empty(0, dtype=np.float64), {}
+
+        start = metrics.stage_start()
+        valid, errors = validate_raw(raw)
+        metrics.observe_stage("validation", start)
+        metrics.count_error("row_validation", len(errors))
+
+        if valid.all():
+            prices = self.predict_prices(raw)
+            self._observe_served(raw, prices)
+            return prices, errors
+
+        prices = np.full(len(raw), np.nan)
+        if valid.any():
+            prices[valid] = self.predict_prices(raw[valid])
+            self._observe_served(raw[valid], prices[valid])
+        return prices, errors
+
+    def predict_columns(self, columns: Dict[str, List], n_rows: int) -> Dict:
+        """Valide et prédit un lot en colonnes sans objet Python par ligne
+
+        Retourne les colonnes ``prices`` et ``price_per_sqft`` (None pour les
+        lignes invalides) et la liste des erreurs avec leur index de ligne.
+        """
+        start = metrics.stage_start()
+        raw, valid, errors = validate_columns(columns, n_rows)
+        metrics.observe_stage("validation", start)
+        metrics.count_error("row_validation", len(errors))
+
+        prices = np.full(n_rows, np.nan)
+        if valid.any():
+            prices[valid] = self.predict_prices(raw[valid])
+            self._observe_served(raw[valid], prices[valid])
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            per_sqft = prices / raw[:, AREA]
+        price_list, per_sqft_list = prices.tolist(), per_sqft.tolist()
+        for index in errors:
+            price_list[index] = per_sqft_list[index] = None
 
-        try:
-            # Créer un DataFrame avec feature engineering
-            df = pd.DataFrame([features])
-
-            # Feature engineering (identique à l'entraînement)
-            df["price_per_sqft"] = 0  # Placeholder, sera calculé après prédiction
-            df["rooms_total"] = df["bedrooms"] + df["bathrooms"]
-            df["area_per_room"] = df["area"] / df["rooms_total"]
-            df["bathroom_bedroom_ratio"] = df["bathrooms"] / df["bedrooms"]
-            df["luxury_score"] = (
-                df["airconditioning"]
-                + df["parking"] / 2
-                + df["prefarea"]
-                + df["guestroom"]
-                + df["basement"]
-            )
-            df["has_luxury"] = (df["luxury_score"] > 2).astype(int)
-            df["area_bedrooms_interaction"] = df["area"] * df["bedrooms"]
-            df["luxury_area_interaction"] = df["luxury_score"] * df["area"]
-
-            # Catégories de taille
-            size_conditions = [
-                (df["area"] <= 3000),
-                (df["area"] <= 6000),
-                (df["area"] <= 10000),
-                (df["area"] > 10000),
-            ]
-            size_choices = ["small", "medium", "large", "very_large"]
-            df["size_category"] = np.select(
-                size_conditions, size_choices, default="medium"
-            )
+        return {
+            "prices": price_list,
+            "price_per_sqft": per_sqft_list,
+            "errors": [
+                {"index": index, "error": errors[index]} for index in sorted(errors)
+            ],
+        }
 
-            # One-hot encoding pour size_category
-            for category in ["small", "medium", "very_large"]:
-                df[f"size_category_{category}"] = (
-                    df["size_category"] == category
-                ).astype(int)
-
-            # Sélectionner les features dans le bon ordre
-            feature_values = []
-            for name in self.feature_names:
-                if name in df.columns:
-                    feature_values.append(df[name].iloc[0])
-                else:
-                    logger.warning(f"Feature manquante: {name}")
-                    feature_values.append(0)  # Valeur par défaut
+    def predict_sweep(self, base: Dict, axes: List[Tuple[str, List[float]]]) -> Dict:
+        """Prix de la grille des variantes de ``base`` (un ou deux axes)
 
-            feature_array = np.array(feature_values).reshape(1, -1)
+        La grille est construite d'un bloc (``np.meshgrid``) et prédite en un
+        seul passage vectorisé, feature engineering compris.
+        """
+        values = [np.asarray(axis_values, dtype=np.float64) for _, axis_values in axes]
+        shape = tuple(len(axis_values) for axis_values in values)
 
-            # Prédiction
-            predicted_price = self.model.predict(feature_array)[0]
+        raw = np.empty((int(np.prod(shape)), len(BASE_FEATURE_NAMES)))
+        raw[:] = records_to_raw([base])[0]
+        grids = np.meshgrid(*values, indexing="ij")
+        for (name, _), grid in zip(axes, grids):
+            raw[:, BASE_FEATURE_NAMES.index(name)] = grid.ravel()
 
-            # Calculer le prix par pied carré réel
-            area_value = features["area"]
-            price_per_sqft_value = predicted_price / area_value
+        prices = self.predict_prices(raw)
+        return {
+            "axes": [
+                {"feature": name, "values": axis_values.tolist()}
+                for (name, _), axis_values in zip(axes, values)
+            ],
+            "shape": list(shape),
+            "count": len(prices),
+            "prices": prices.reshape(shape).tolist(),
+            "min_price": float(prices.min()),
+            "max_price": float(prices.max()),
+        }
 
-            # Déterminer le niveau de confiance
+    def _format_prediction(
+        self,
+        features: Dict,
+        predicted_price: float,
+        confidence: Optional[str] = None,
+        explanation: Optional[Dict] = None,
+    ) -> Dict:
+        """Construit le dictionnaire de réponse pour une prédiction"""
+        # Calculer le prix par pied carré réel
+        area_value = features["area"]
+        price_per_sqft_value = predicted_price / area_value
+
+        # Déterminer le niveau de confiance
+        if confidence is None:
             confidence = self._calculate_confidence(features, predicted_price)
 
-            result = {
-                "price": float(predicted_price),
-                "formatted_price": f"${predicted_price:,.0f}",
-                "price_per_sqft": float(price_per_sqft_value),
-                "confidence": confidence,
-                "features_used": features,
-                "prediction_time": datetime.now().isoformat(),
-            }
+        result = {
+            "price": float(predicted_price),
+            "formatted_price": f"${predicted_price:,.0f}",
+            "price_per_sqft": float(price_per_sqft_value),
+            "confidence": confidence,
+            "features_used": features,
+            "prediction_time": datetime.now().isoformat(),
+        }
+        if explanation is not None:
+            result["explanation"] = explanation
+        return result
+
+    def predict_many(
+        self, features_list: List[Dict], explain: bool = False, cached: bool = False
+    ) -> List[Dict]:
+        """Prédit des caractéristiques déjà validées en un seul passage vectorisé
+
+        Avec ``explain``, chaque résultat contient aussi son ``explanation``.
+        Le cache ne sert qu'aux devis unitaires (``cached``) : sur un lot, une
+        recherche par ligne coûte plus que le modèle vectorisé, et ses lignes
+        évinceraient les annonces fréquemment demandées.
+        """
+        if self.model is None:
+            raise Exception("Modèle non chargé")
+        if explain and not self.explainable:
+            raise ValueError(f"Explications indisponibles pour {self.model_type}")
 
-            return result
+        try:
+            prices: List[Optional[float]] = [None] * len(features_list)
+            cache_keys: List[Optional[Tuple]] = [None] * len(features_list)
+            cache = self.cache if cached else None
+            if cache is not None:
+                for index, features in enumerate(features_list):
+                    cache_keys[index] = canonical_key(features, self.model_hash)
+                    prices[index] = cache.get(cache_keys[index])
+
+            raw = records_to_raw(features_list)
+            missing = [index for index, price in enumerate(prices) if price is None]
+            if missing:
+                # Feature engineering via le plan compilé, puis prédiction
+                missing_raw = raw if len(missing) == len(raw) else raw[missing]
+                for index, price in zip(missing, self._predict_raw(missing_raw)):
+                    prices[index] = float(price)
+                    if cache is not None:
+                        cache.put(cache_keys[index], prices[index])
+            self._observe_served(raw, np.array(prices))
+
+            start = metrics.stage_start()
+            confidences = [
+                self._calculate_confidence(features, price)
+                for features, price in zip(features_list, prices)
+            ]
+            metrics.observe_stage("confidence", start)
+
+            explanations: List[Optional[Dict]] = [None] * len(features_list)
+            if explain:
+                explanations = self._explain_raw(raw)
+
+            return [
+                self._format_prediction(features, price, confidence, explanation)
+                for features, price, confidence, explanation in zip(
+                    features_list, prices, confidences, explanations
+                )
+            ]
 
         except Exception as e:
             logger.error(f"Erreur de prédiction: {e}")
             raise Exception(f"Erreur de prédiction: {str(e)}")
 
+    def predict(self, features: Dict, explain: bool = False) -> Dict:
+        """Prédit le prix d'une maison"""
+        return self.predict_many([features], explain, cached=True)[0]
+
+    def predict_quotes(self, features_list: List[Dict]) -> List[Dict]:
+        """Requêtes ``/predict`` unitaires regroupées par le micro-batching"""
+        return self.predict_many(features_list, cached=True)
+
+    def _validate_batch(self, rows) -> Tuple[List[Dict], List[int], Dict[int, str]]:
+        """Valide chaque ligne avec HouseFeatures sans faire échouer le lot"""
+        valid_rows, valid_indices, errors = [], [], {}
+
+        for index, row in enumerate(rows):
+            try:
+                if isinstance(row, dict):
+                    values = row
+                else:
+                    row = list(row)
+                    if len(row) != len(BASE_FEATURE_NAMES):
+                        raise ValueError(
+                            f"{len(BASE_FEATURE_NAMES)} valeurs attendues, "
+                            f"{len(row)} reçues"
+                        )
+                    values = dict(zip(BASE_FEATURE_NAMES, row))
+                valid_rows.append(HouseFeatures(**values).dict())
+                valid_indices.append(index)
+            except Exception as e:
+                errors[index] = _format_validation_error(e)
+
+        return valid_rows, valid_indices, errors
+
+    def predict_batch(self, rows, explain: bool = False) -> List[Dict]:
+        """Prédit le prix d'un lot de maisons en un seul passage vectorisé
+
+        Accepte une liste de dictionnaires ou une matrice N×12 dans l'ordre de
+        BASE_FEATURE_NAMES. Chaque élément du résultat contient l'index de la
+        ligne et soit une ``prediction``, soit une ``error`` de validation.
+        """
+        if self.model is None:
+            raise Exception("Modèle non chargé")
+
+        if isinstance(rows, np.ndarray):
+            if rows.ndim != 2:
+                raise ValueError("Matrice 2D attendue pour la prédiction en lot")
+            rows = rows.tolist()
+
+        start = metrics.stage_start()
+        valid_rows, valid_indices, errors = self._validate_batch(rows)
+        metrics.observe_stage("validation", start)
+        metrics.count_error("row_validation", len(errors))
+
+        predictions = {}
+        if valid_rows:
+            results = self.predict_many(valid_rows, explain)
+            predictions = dict(zip(valid_indices, results))
+
+        return [
+            {
+                "index": index,
+                "prediction": predictions.get(index),
+                "error": errors.get(index),
+            }
+            for index in range(len(rows))
+        ]
+
     def _calculate_confidence(self, features: Dict, price: float) -> str:
         """Calcule un niveau de confiance basé sur les caractéristiques"""
         # Heuristiques simples pour la confiance
@@ -227,16 +857,91 @@ class HousePricePredictor:
     def get_model_info(self) -> Dict:
         """Retourne les informations du modèle"""
         return {
-            "model_type": type(self.model).__name__ if self.model else "Non chargé",
+            "model_type": self.model_type if self.model else "Non chargé",
             "performance_metrics": self.model_info.get("performance", {}),
             "feature_names": self.feature_names,
             "training_date": self.model_info.get("training_date", "Inconnue"),
             "model_version": self.model_info.get("model_version", "1.0.0"),
+            "active_version": self.model_hash,
+            "model_file": self.version.model_file.name if self.version else None,
         }
 
+    def warm_up(self, n_rows: int = 8):
+        """Quelques prédictions hors cache avant la mise en service"""
+        prices = self._predict_raw(sample_raw_features(n_rows, seed=0))
+        if not np.all(np.isfinite(prices)):
+            raise ValueError(
+                f"Prédictions non finies pour la version {self.model_hash}"
+            )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """SIGUSR1 = relire le registre; un worker recyclé rattrape la version active"""
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(
+            signal.SIGUSR1, lambda: loop.create_task(_sync_with_registry())
+        )
+    except (NotImplementedError, RuntimeError, ValueError):
+        logger.info("SIGUSR1 indisponible - rechargement par /admin/models seulement")
+    await _sync_with_registry()
+
+    flush_task = drift_task = None
+    if metrics.METRICS_DIR:
+        flush_task = asyncio.create_task(_flush_metrics())
+    if DRIFT_ENABLED and DRIFT_CHECK_INTERVAL > 0:
+        drift_task = asyncio.create_task(_check_drift())
+    if audit is not None:
+        audit.start()
+    yield
+    if audit is not None:
+        await asyncio.to_thread(audit.close)
+    if drift_task is not None:
+        drift_task.cancel()
+    if flush_task is not None:
+        flush_task.cancel()
+        metrics.write_snapshot()
+
+
+async def _flush_metrics():
+    """Publie périodiquement les métriques de ce worker dans METRICS_DIR"""
+    while True:
+        try:
+            metrics.write_snapshot()
+        except OSError as e:
+            logger.warning(f"Écriture des métriques impossible: {e}")
+        await asyncio.sleep(metrics.METRICS_FLUSH_INTERVAL)
+
+
+def _drift_report(decay: float = 1.0) -> Optional[Dict]:
+    """Dérive du trafic des workers actifs (esquisses publiées dans METRICS_DIR)
+
+    Les workers arrêtés sont exclus par ``metrics.worker_snapshots`` : leur
+    esquisse, plus amortie, pèserait sans fin sur les scores.
+    """
+    if predictor is None or predictor.drift is None:
+        return None
+    sketches = [s["drift"] for s in metrics.worker_snapshots() if s.get("drift")]
+    return predictor.drift.check(sketches, decay)
+
+
+async def _check_drift():
+    """Compare périodiquement le trafic à la référence et signale les dérives"""
+    decay = 0.5 ** (DRIFT_CHECK_INTERVAL / DRIFT_HALF_LIFE) if DRIFT_HALF_LIFE else 1.0
+    while True:
+        await asyncio.sleep(DRIFT_CHECK_INTERVAL)
+        report = _drift_report(decay)
+        if report and report["drifted"]:
+            logger.warning(
+                f"Dérive des entrées détectée: {', '.join(report['drifted'])} "
+                f"(PSI max {report['max_psi']:.2f})"
+            )
+
 
 # Initialisation de l'API
 app = FastAPI(
+    lifespan=lifespan,
     title="House Price Predictor API",
     description="API de prédiction des prix immobiliers basée sur l'apprentissage automatique",
     version="1.0.0",
@@ -244,6 +949,20 @@ app = FastAPI(
     redoc_url="/redoc",
 )
 
+# Ajouté avant CORS: les réponses 503 portent aussi les en-têtes CORS
+admission = None
+if ADMISSION_ENABLED:
+    admission = AdmissionController(
+        initial_limit=ADMISSION_INITIAL_LIMIT,
+        min_limit=ADMISSION_MIN_LIMIT,
+        max_limit=ADMISSION_MAX_LIMIT,
+        queue_timeout_ms=ADMISSION_QUEUE_TIMEOUT_MS,
+        max_queue=ADMISSION_MAX_QUEUE,
+        tolerance=ADMISSION_LATENCY_TOLERANCE,
+        max_streams=ADMISSION_MAX_STREAMS,
+    )
+    app.add_middleware(AdmissionMiddleware, controller=admission)
+
 # Configuration CORS
 app.add_middleware(
     CORSMiddleware,
@@ -252,6 +971,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(profiling.ProfilingMiddleware)
+# Ajouté en dernier: mesure la requête complète, middlewares compris
+app.add_middleware(metrics.MetricsMiddleware)
 
 # Servir les fichiers statiques
 try:
@@ -259,14 +981,74 @@ try:
 except Exception:
     logger.warning("Dossier 'static' non trouvé - fichiers statiques non disponibles")
 
+
+def _make_cache() -> Optional[PredictionCache]:
+    if PREDICTION_CACHE_SIZE <= 0:
+        return None
+    return PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL)
+
+
+# Registre des versions de modèle (version active partagée via models/registry.json)
+registry = ModelRegistry(Path("models"))
+
 # Initialiser le service de prédiction
 try:
-    predictor = HousePricePredictor()
+    predictor = HousePricePredictor(
+        engine=PREDICTOR_ENGINE, model_format=MODEL_FORMAT, cache=_make_cache()
+    )
     logger.info("Service de prédiction initialisé avec succès")
 except Exception as e:
     logger.error(f"Erreur d'initialisation du service: {e}")
     predictor = None
 
+# Sortir l'inférence (CPU) de la boucle d'événements
+inference = None
+if predictor is not None:
+    inference = InferenceExecutor(
+        predictor, mode=INFERENCE_EXECUTOR, max_workers=INFERENCE_WORKERS
+    )
+
+# La limite d'admission suit la latence d'inférence
+if inference is not None and admission is not None:
+    inference.on_complete = admission.observe
+
+# Journal d'audit: un fichier par worker, thread d'écriture démarré au lifespan
+audit = None
+if AUDIT_ENABLED:
+    audit = AuditLog(
+        AUDIT_DIR,
+        policy=AUDIT_POLICY,
+        max_queue=AUDIT_QUEUE_SIZE,
+        batch_size=AUDIT_BATCH_SIZE,
+        flush_interval=AUDIT_FLUSH_INTERVAL,
+        max_bytes=AUDIT_MAX_BYTES,
+        max_age=AUDIT_MAX_AGE,
+    )
+
+# Candidats du scoring fantôme, partagés par les versions successivement servies
+shadow = None
+if SHADOW_ENABLED:
+    try:
+        shadow = ShadowScorer(
+            load_candidates(registry, SHADOW_MODELS),
+            fraction=SHADOW_FRACTION,
+            max_pending=SHADOW_MAX_PENDING,
+        )
+        logger.info(f"Scoring fantôme: {len(shadow.candidates)} candidat(s)")
+    except Exception as e:
+        logger.error(f"Scoring fantôme indisponible: {e}")
+if predictor is not None:
+    predictor.shadow = shadow
+
+# Regrouper les requêtes concurrentes en lots vectorisés
+batcher = None
+if inference is not None and MICROBATCH_ENABLED:
+    batcher = MicroBatcher(
+        lambda items: inference.run("predict_quotes", items),
+        max_batch_size=MICROBATCH_MAX_SIZE,
+        max_wait_ms=MICROBATCH_MAX_WAIT_MS,
+    )
+
 
 @app.get("/")
 async def root():
@@ -277,8 +1059,17 @@ async def root():
         "status": "active" if predictor else "error",
         "endpoints": {
             "predict": "/predict",
+            "predict_batch": "/predict/batch",
+            "predict_columnar": "/predict/columnar",
+            "predict_binary": "/predict/binary",
+            "predict_stream": "/predict/stream",
+            "predict_sweep": "/predict/sweep",
             "health": "/health",
             "model_info": "/model/info",
+            "cache_stats": "/cache/stats",
+            "batching_stats": "/batching/stats",
+            "admin_models": "/admin/models",
+            "metrics": "/metrics",
             "docs": "/docs",
         },
     }
@@ -299,19 +1090,336 @@ async def health_check():
     }
 
 
+# Les résultats de predict() ont déjà les types des modèles de réponse
+_prediction_serializer = _dict_serializer(PredictionResponse)
+_slim_prediction_serializer = _dict_serializer(SlimPredictionResponse)
+
+
+async def _audit(request: Request, endpoint: str, **fields):
+    """Dépose l'enregistrement d'audit de la requête (aucune E/S ici)
+
+    La latence est mesurée depuis l'entrée dans MetricsMiddleware. Avec
+    ``AUDIT_POLICY=block``, une file pleine suspend cette requête seule.
+    """
+    if audit is None:
+        return
+    start = request.scope.get("metrics_start")
+    await audit.record_async(
+        {
+            "time": time.time(),
+            "endpoint": endpoint,
+            "model_version": predictor.model_hash,
+            "latency_ms": (
+                round(1000 * (time.perf_counter() - start), 3) if start else None
+            ),
+            **fields,
+        }
+    )
+
+
+def _prices(results: List[Dict]) -> List[Optional[float]]:
+    """Prix de chaque ligne d'un résultat par lot (None pour les erreurs)"""
+    return [
+        item["prediction"]["price"] if item["prediction"] else None for item in results
+    ]
+
+
+def _check_explainable(explain: bool):
+    """501 si ``explain=true`` et que le modèle servi ne sait pas s'expliquer"""
+    if explain and not predictor.explainable:
+        raise HTTPException(
+            status_code=501,
+            detail=f"Explications indisponibles pour {predictor.model_type}",
+        )
+
+
 @app.post("/predict", response_model=PredictionResponse)
-async def predict_price(features: HouseFeatures):
-    """Prédit le prix d'une maison basé sur ses caractéristiques"""
+async def predict_price(
+    features: HouseFeatures, request: Request, slim: bool = False, explain: bool = False
+):
+    """Prédit le prix d'une maison basé sur ses caractéristiques
+
+    Avec ``slim=true``, seuls ``price`` et ``confidence`` sont renvoyés. Avec
+    ``explain=true``, la réponse détaille la contribution de chaque
+    caractéristique au prix (TreeSHAP).
+    """
+    # Lecture et validation du corps, depuis l'entrée dans le middleware
+    if "metrics_start" in request.scope:
+        metrics.observe_stage("validation", request.scope["metrics_start"])
     if predictor is None:
         raise HTTPException(status_code=503, detail="Service non disponible")
+    _check_explainable(explain)
 
     # Convertir en dictionnaire
     features_dict = features.dict()
 
-    # Faire la prédiction
-    result = predictor.predict(features_dict)
+    # Faire la prédiction (regroupée avec les requêtes concurrentes si activé)
+    if explain:
+        result = await inference.run("predict", features_dict, True)
+    elif batcher is not None:
+        result = await batcher.submit(features_dict)
+    else:
+        result = await inference.run("predict", features_dict)
+    await _audit(request, "/predict", input=features_dict, price=result["price"])
+
+    # Réponse sérialisée directement: pas de seconde validation par response_model
+    serializer = _slim_prediction_serializer if slim else _prediction_serializer
+    start = metrics.stage_start()
+    content = serializer.dump_json(result)
+    metrics.observe_stage("serialization", start)
+    return Response(content=content, media_type="application/json")
+
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_price_batch(
+    request: BatchPredictionRequest, http_request: Request, explain: bool = False
+):
+    """Prédit le prix d'un lot de maisons (erreurs de validation par ligne)"""
+    if predictor is None:
+        raise HTTPException(status_code=503, detail="Service non disponible")
+    _check_explainable(explain)
+
+    results = await inference.run("predict_batch", request.houses, explain)
+    await _audit(
+        http_request, "/predict/batch", inputs=request.houses, prices=_prices(results)
+    )
+    error_count = sum(1 for item in results if item["error"] is not None)
+
+    return BatchPredictionResponse(
+        count=len(results),
+        success_count=len(results) - error_count,
+        error_count=error_count,
+        results=results,
+    )
+
+
+@app.post("/predict/columnar", response_model=ColumnarPredictionResponse)
+async def predict_price_columnar(request: ColumnarBatchRequest, http_request: Request):
+    """Prédit un lot en colonnes (validation vectorisée, erreurs par index)"""
+    if predictor is None:
+        raise HTTPException(status_code=503, detail="Service non disponible")
+
+    columns = request.dict(exclude_none=True)
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) > 1:
+        raise HTTPException(
+            status_code=422, detail="Toutes les colonnes doivent avoir la même longueur"
+        )
+    n_rows = lengths.pop() if lengths else 0
+
+    result = await inference.run("predict_columns", columns, n_rows)
+    await _audit(
+        http_request, "/predict/columnar", inputs=columns, prices=result["prices"]
+    )
+    error_count = len(result["errors"])
+
+    return ColumnarPredictionResponse(
+        count=n_rows,
+        success_count=n_rows - error_count,
+        error_count=error_count,
+        **result,
+    )
+
+
+def _sweep_axes(request: SweepRequest, base: Dict) -> List[Tuple[str, List[float]]]:
+    """Valeurs validées de chaque axe (mêmes règles que HouseFeatures)"""
+    names = [axis.feature for axis in request.axes]
+    if len(set(names)) != len(names):
+        raise ValueError("Chaque axe doit porter sur une caractéristique différente")
+
+    axes, n_points = [], 1
+    base_row = records_to_raw([base])
+    for axis in request.axes:
+        values = axis.grid_values()
+        n_points *= len(values)
+        if n_points > SWEEP_MAX_POINTS:
+            raise ValueError(f"Grille limitée à {SWEEP_MAX_POINTS} points")
+
+        # La maison de base est valide: seule la colonne de l'axe peut fauter
+        raw = np.repeat(base_row, len(values), axis=0)
+        raw[:, BASE_FEATURE_NAMES.index(axis.feature)] = values
+        _, errors = validate_raw(raw)
+        if errors:
+            row = min(errors)
+            raise ValueError(f"Valeur {values[row]:g} refusée - {errors[row]}")
+        axes.append((axis.feature, values.tolist()))
+    return axes
+
+
+_sweep_serializer = _dict_serializer(SweepResponse)
+
+
+@app.post("/predict/sweep", response_model=SweepResponse)
+async def predict_price_sweep(request: SweepRequest, http_request: Request):
+    """Courbe ou surface de prix: une maison de base, un ou deux axes variés
+
+    Toute la grille est prédite en un seul passage vectorisé.
+    """
+    if predictor is None:
+        raise HTTPException(status_code=503, detail="Service non disponible")
+
+    base = request.base.dict()
+    try:
+        axes = _sweep_axes(request, base)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    result = await inference.run("predict_sweep", base, axes)
+    await _audit(
+        http_request,
+        "/predict/sweep",
+        inputs={"base": base, "axes": dict(axes)},
+        prices=result["prices"],
+    )
+
+    start = metrics.stage_start()
+    content = _sweep_serializer.dump_json(result)
+    metrics.observe_stage("serialization", start)
+    return Response(content=content, media_type="application/json")
 
-    return PredictionResponse(**result)
+
+@app.post("/predict/binary")
+async def predict_price_binary(request: Request):
+    """Prédit une matrice binaire (.npy ou Arrow IPC), prix float64 en retour
+
+    Le format d'entrée suit ``Content-Type``, celui de la réponse ``Accept``
+    (par défaut le même). Les lignes invalides valent NaN ; leur nombre est
+    indiqué par l'en-tête ``X-Error-Count``.
+    """
+    if predictor is None:
+        raise HTTPException(status_code=503, detail="Service non disponible")
+
+    content_type = request.headers.get("content-type")
+    try:
+        raw = decode_matrix(await request.body(), content_type)
+    except UnsupportedMediaType as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        media_type = negotiate(request.headers.get("accept"), content_type)
+    except UnsupportedMediaType as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+    prices, errors = await inference.run("score_matrix", raw)
+    # Tableaux convertis en listes par le thread d'écriture
+    await _audit(request, "/predict/binary", inputs=raw, prices=prices)
+
+    start = metrics.stage_start()
+    content = encode_prices(prices, media_type)
+    metrics.observe_stage("serialization", start)
+    return Response(
+        content=content,
+        media_type=media_type,
+        headers={"X-Error-Count": str(len(errors))},
+    )
+
+
+class _BodyStreamingResponse(StreamingResponse):
+    """Réponse en flux qui laisse le générateur lire le corps de la requête
+
+    Sans ASGI 2.4, Starlette écoute la déconnexion du client via ``receive``
+    en parallèle et consommerait le corps encore en cours de réception.
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+
+
+async def _stream_predictions(request: Request):
+    """Lit le corps NDJSON au fil de l'eau et renvoie les résultats par bloc
+
+    Un bloc est prédit dès qu'il atteint STREAM_CHUNK_SIZE lignes ou que les
+    données reçues sont épuisées : le client reçoit ses premiers résultats
+    sans attendre la fin de l'envoi. La lecture du corps n'avance qu'au rythme
+    de la consommation de la réponse, la mémoire reste donc bornée.
+    """
+    buffer = b""
+    index = 0
+    pending: List[Tuple[int, Any]] = []  # (index, dict ou message d'erreur)
+
+    async def flush():
+        records = [(i, value) for i, value in pending if isinstance(value, dict)]
+        results = {}
+        if records:
+            items = await inference.run(
+                "predict_batch", [value for _, value in records]
+            )
+            for (i, _), item in zip(records, items):
+                results[i] = {**item, "index": i}
+            # Un enregistrement par bloc, latence depuis le début du flux
+            await _audit(
+                request,
+                "/predict/stream",
+                inputs=[value for _, value in records],
+                prices=_prices(items),
+            )
+        lines = []
+        for i, value in pending:
+            item = results.get(i) or {"index": i, "prediction": None, "error": value}
+            lines.append(json.dumps(item))
+        pending.clear()
+        return ("\n".join(lines) + "\n").encode()
+
+    too_long = f"Ligne de plus de {STREAM_MAX_LINE_BYTES} octets"
+
+    def parse(line: bytes):
+        nonlocal index
+        if not line.strip():
+            return
+        if len(line) > STREAM_MAX_LINE_BYTES:
+            value = too_long
+        else:
+            try:
+                value = json.loads(line)
+                if not isinstance(value, dict):
+                    value = "Objet JSON attendu"
+            except ValueError as e:
+                value = f"JSON invalide: {e}"
+        pending.append((index, value))
+        index += 1
+
+    skipping = False  # fin d'une ligne trop longue à ignorer
+    async for data in request.stream():
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        if skipping:
+            if not lines:
+                buffer = b""
+                continue
+            lines, skipping = lines[1:], False
+
+        for line in lines:
+            parse(line)
+            if len(pending) >= STREAM_CHUNK_SIZE:
+                yield await flush()
+
+        # Ligne incomplète déjà trop longue: inutile de la garder en mémoire
+        if len(buffer) > STREAM_MAX_LINE_BYTES:
+            pending.append((index, too_long))
+            index += 1
+            buffer, skipping = b"", True
+        if pending:
+            yield await flush()
+
+    if not skipping:
+        parse(buffer)
+    if pending:
+        yield await flush()
+
+
+@app.post("/predict/stream")
+async def predict_price_stream(request: Request):
+    """Prédiction en flux: corps NDJSON de HouseFeatures, réponse NDJSON"""
+    if predictor is None:
+        raise HTTPException(status_code=503, detail="Service non disponible")
+
+    return _BodyStreamingResponse(
+        _stream_predictions(request), media_type="application/x-ndjson"
+    )
 
 
 @app.get("/model/info", response_model=ModelInfo)
@@ -324,6 +1432,266 @@ async def get_model_info():
     return ModelInfo(**info)
 
 
+def _metrics_info() -> Dict:
+    """Modèle servi, compteurs du cache et de l'admission, lus par /metrics"""
+    if predictor is None:
+        return {}
+    return {
+        "model": {
+            "version": predictor.model_hash,
+            "model_type": predictor.model_type,
+            "engine": predictor.engine,
+            "model_format": predictor.model_format,
+        },
+        "cache": predictor.cache.stats() if predictor.cache is not None else None,
+        "admission": admission.stats() if admission is not None else None,
+        "drift": predictor.drift.sketch.to_dict() if predictor.drift else None,
+        "audit": audit.stats() if audit is not None else None,
+        "shadow": shadow.snapshot() if shadow is not None else None,
+    }
+
+
+metrics.set_info_provider(_metrics_info)
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Métriques au format Prometheus"""
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """Compteurs du cache de prédictions"""
+    if predictor is None:
+        raise HTTPException(status_code=503, detail="Service non disponible")
+
+    if predictor.cache is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "model_hash": predictor.model_hash,
+        **predictor.cache.stats(),
+    }
+
+
+@app.get("/batching/stats")
+async def get_batching_stats():
+    """Profondeur de file et distribution des tailles de lot du micro-batching"""
+    if batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **batcher.stats()}
+
+
+@app.get("/admission/stats")
+async def get_admission_stats():
+    """Limite de concurrence adaptative, file d'attente et rejets"""
+    if admission is None:
+        return {"enabled": False}
+    return {"enabled": True, **admission.stats()}
+
+
+@app.get("/audit/stats")
+async def get_audit_stats():
+    """Occupation de la file et compteurs du journal d'audit de ce worker"""
+    if audit is None:
+        return {"enabled": False}
+    return {"enabled": True, **audit.stats()}
+
+
+@app.get("/shadow/stats")
+async def get_shadow_stats():
+    """Écarts au prix servi et latence de chaque candidat du scoring fantôme"""
+    if shadow is None:
+        return {"enabled": False}
+    return {"enabled": True, **shadow.snapshot()}
+
+
+@app.get("/drift")
+async def get_drift():
+    """Dérive des entrées et des prix prédits par rapport à l'entraînement
+
+    PSI par champ (et KS, quantiles pour ``area`` et le prix) entre le trafic
+    récent de tous les workers et la référence du modèle servi.
+    """
+    if predictor is None:
+        raise HTTPException(status_code=503, detail="Service non disponible")
+    if predictor.drift is None:
+        return {"enabled": False}
+    report = _drift_report()
+    if predictor.drift.baseline is None:
+        report["warning"] = "Référence absente (python drift.py --input ...)"
+    return {"enabled": True, **report}
+
+
+def _build_predictor(version: ModelVersion) -> HousePricePredictor:
+    """Charge et préchauffe une version (appelé hors de la boucle d'événements)"""
+    candidate = HousePricePredictor(
+        engine=PREDICTOR_ENGINE,
+        model_format=MODEL_FORMAT,
+        cache=predictor.cache if predictor is not None else _make_cache(),
+        version=version,
+    )
+    candidate.warm_up()
+    return candidate
+
+
+def _install_predictor(candidate: HousePricePredictor):
+    """Bascule atomique: les requêtes en cours terminent sur l'ancien prédicteur"""
+    global predictor, inference
+    if predictor is not None and None not in (predictor.drift, candidate.drift):
+        # Le trafic déjà observé survit à la bascule (hors prix)
+        candidate.drift.carry_over(predictor.drift)
+    if inference is None:
+        inference = InferenceExecutor(
+            candidate, mode=INFERENCE_EXECUTOR, max_workers=INFERENCE_WORKERS
+        )
+        if admission is not None:
+            inference.on_complete = admission.observe
+    else:
+        inference.swap(candidate)
+    candidate.shadow = shadow
+    predictor = candidate
+    logger.info(f"Version {candidate.model_hash} en service")
+
+
+# Une seule bascule de version à la fois
+_swap_lock = asyncio.Lock()
+
+
+async def _switch_version(version: ModelVersion, commit=None) -> HousePricePredictor:
+    """Charge, préchauffe puis met en service ``version``
+
+    ``commit`` (mise à jour du registre) n'est appelé qu'une fois la nouvelle
+    version chargée avec succès.
+    """
+    async with _swap_lock:
+        if predictor is not None and predictor.model_hash == version.version:
+            candidate = predictor
+        else:
+            candidate = await asyncio.to_thread(_build_predictor, version)
+        if commit is not None:
+            commit()
+        if candidate is not predictor:
+            _install_predictor(candidate)
+        return candidate
+
+
+async def _sync_with_registry():
+    """Aligne ce processus sur la version active du registre"""
+    try:
+        await _switch_version(registry.active_version())
+    except Exception as e:
+        logger.error(f"Synchronisation avec le registre impossible: {e}")
+
+
+def _notify_workers():
+    """Sous run_api.py --workers, demande au parent de synchroniser les autres workers"""
+    parent = os.getenv("PREFORK_PARENT_PID")
+    if parent and int(parent) == os.getppid():
+        os.kill(os.getppid(), signal.SIGUSR1)
+
+
+@app.get("/admin/models")
+async def list_model_versions():
+    """Versions disponibles, version active du registre et version servie"""
+    try:
+        description = registry.describe()
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {
+        "serving": predictor.model_hash if predictor else None,
+        **description,
+    }
+
+
+def _require_token(request: Request, header: str, expected: str):
+    """403 sauf si l'en-tête ``header`` porte le jeton ``expected`` (non vide)"""
+    supplied = request.headers.get(header, "").encode()
+    if not expected or not hmac.compare_digest(supplied, expected.encode()):
+        raise HTTPException(status_code=403, detail=f"En-tête {header} requis")
+
+
+@app.post("/admin/models/{version}/promote")
+async def promote_model_version(version: str, request: Request):
+    """Charge, préchauffe et met en service une version, sans redémarrage"""
+    _require_token(request, "X-Admin-Token", ADMIN_TOKEN)
+    try:
+        target = registry.get(version)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+    try:
+        candidate = await _switch_version(
+            target, commit=lambda: registry.promote(version)
+        )
+    except Exception as e:
+        logger.error(f"Échec de la promotion de {version}: {e}")
+        raise HTTPException(status_code=500, detail=f"Échec du chargement: {e}")
+
+    _notify_workers()
+    return candidate.get_model_info()
+
+
+@app.post("/admin/models/rollback")
+async def rollback_model_version(request: Request):
+    """Revient à la version promue précédemment"""
+    _require_token(request, "X-Admin-Token", ADMIN_TOKEN)
+    try:
+        target = registry.previous_version()
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    try:
+        candidate = await _switch_version(target, commit=registry.rollback)
+    except Exception as e:
+        logger.error(f"Échec du retour à {target.version}: {e}")
+        raise HTTPException(status_code=500, detail=f"Échec du chargement: {e}")
+
+    _notify_workers()
+    return candidate.get_model_info()
+
+
+@app.get("/admin/profiles")
+async def list_profiles(request: Request):
+    """Profils récents de ce worker (sans le détail des fonctions)"""
+    _require_token(request, "X-Profile-Token", profiling.TOKEN)
+    return {
+        "sample_rate": profiling.SAMPLE_RATE,
+        "token_enabled": bool(profiling.TOKEN),
+        "buffer_size": profiling.BUFFER_SIZE,
+        "profiles": profiling.summaries(),
+    }
+
+
+@app.get("/admin/profiles/{profile_id}")
+async def download_profile(profile_id: int, request: Request, format: str = "json"):
+    """Un profil: JSON (étapes et fonctions), ``text`` (pstats) ou ``pstats``
+
+    Le format ``pstats`` se relit avec ``pstats.Stats(fichier)`` ou snakeviz.
+    """
+    _require_token(request, "X-Profile-Token", profiling.TOKEN)
+    record = profiling.get_profile(profile_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Profil {profile_id} inconnu")
+
+    if format == "json":
+        return {key: value for key, value in record.items() if key != "stats"}
+    if format == "text":
+        return Response(profiling.profile_text(record), media_type="text/plain")
+    if format == "pstats":
+        if record["stats"] is None:
+            raise HTTPException(status_code=404, detail="Profil sans statistiques")
+        return Response(
+            record["stats"],
+            media_type="application/octet-stream",
+            headers={
+                "Content-Disposition": f'attachment; filename="profile-{profile_id}.prof"'
+            },
+        )
+    raise HTTPException(status_code=400, detail=f"Format inconnu: {format}")
+
+
 @app.get("/predict/example")
 async def get_example_prediction():
     """Exemple de prédiction avec des données par défaut"""
@@ -345,7 +1713,7 @@ async def get_example_prediction():
         "furnishingstatus": 1,
     }
 
-    result = predictor.predict(example_features)
+    result = await inference.run("predict", example_features)
     return {"example_input": example_features, "prediction": result}
 
 
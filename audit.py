@@ -0,0 +1,310 @@
+"""
+🧾 Journal d'audit des prédictions, écrit hors du chemin des requêtes
+
+Chaque requête de prédiction dépose un enregistrement (entrées, prix,
+version du modèle, latence) dans une file bornée en mémoire : un simple
+``deque.append``, sans sérialisation ni entrée/sortie. Un thread d'écriture
+vide la file par lots (``batch_size`` enregistrements ou toutes les
+``flush_interval`` secondes), sérialise en JSONL (un objet JSON par ligne,
+comme ``requests.jsonl``) et écrit chaque lot d'un seul ``write`` en fin de
+fichier.
+
+Chaque worker écrit son propre fichier ``audit-<pid>.jsonl``. Au-delà de
+``max_bytes`` octets ou de ``max_age`` secondes, il est renommé avec son
+horodatage puis compressé en ``.jsonl.gz`` par le thread d'écriture.
+
+Politique quand la file est pleine (``policy``) :
+
+- ``drop``   : l'enregistrement est abandonné (compteur ``dropped``) ; la
+  latence des requêtes n'est jamais affectée ;
+- ``block``  : la requête attend qu'une place se libère, au plus
+  ``block_timeout`` secondes, puis l'enregistrement est abandonné. Aucune
+  perte tant que le disque suit, au prix de la latence de cette requête :
+  depuis la boucle d'événements (``record_async``), l'attente suspend la
+  seule requête auditée, les autres continuent d'être servies ;
+- ``sample`` : au-delà de la moitié de la file, chaque enregistrement est
+  gardé avec une probabilité égale à la place restante (de 1 à 0) : la
+  perte est étalée plutôt que concentrée sur la fin des rafales.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import math
+import os
+import random
+import shutil
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("drop", "block", "sample")
+
+
+def _finite(value):
+    """NaN et infinis (lignes invalides) en null: le JSON reste standard"""
+    if isinstance(value, list):
+        return [_finite(item) for item in value]
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _to_json(value):
+    # Tableaux NumPy (lots binaires): convertis dans le thread d'écriture
+    if hasattr(value, "tolist"):
+        return _finite(value.tolist())
+    raise TypeError(f"Type non sérialisable: {type(value).__name__}")
+
+
+class AuditLog:
+    """File bornée d'enregistrements et thread d'écriture par lots"""
+
+    def __init__(
+        self,
+        directory,
+        policy: str = "drop",
+        max_queue: int = 10000,
+        batch_size: int = 512,
+        flush_interval: float = 1.0,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_age: float = 3600.0,
+        block_timeout: float = 0.05,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"Politique d'audit inconnue: {policy}")
+        if max_queue < 1 or batch_size < 1:
+            raise ValueError("max_queue et batch_size doivent être >= 1")
+
+        self.directory = Path(directory)
+        self.policy = policy
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.block_timeout = block_timeout
+
+        self._queue: Deque[Dict] = deque()
+        self._wake = threading.Event()
+        self._space = threading.Event()
+        # Requêtes en attente d'une place dans la boucle d'événements (block)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_space: Optional[asyncio.Event] = None
+        self._async_waiters = 0
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._file = None
+        self._path: Optional[Path] = None
+        self._opened_at = 0.0
+        self._size = 0
+
+        self.enqueued = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.blocked = 0
+        self.written = 0
+        self.batches = 0
+        self.bytes_written = 0
+        self.rotations = 0
+        self.write_errors = 0
+
+    # --- Chemin des requêtes ---------------------------------------------
+
+    def record(self, entry: Dict) -> bool:
+        """Dépose un enregistrement ; False s'il est abandonné (file pleine)"""
+        depth = len(self._queue)
+        if depth >= self.max_queue // 2 and not self._admit(depth):
+            return False
+        self._queue.append(entry)
+        self.enqueued += 1
+        if depth + 1 >= self.batch_size:
+            self._wake.set()
+        return True
+
+    async def record_async(self, entry: Dict) -> bool:
+        """``record`` depuis la boucle d'événements, sans jamais la bloquer
+
+        Avec ``block`` et une file pleine, la requête attend une place sur un
+        ``asyncio.Event`` signalé par le thread d'écriture.
+        """
+        full = len(self._queue) >= self.max_queue
+        if self.policy != "block" or not full or self._thread is None:
+            return self.record(entry)
+
+        self.blocked += 1
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._async_space = loop, asyncio.Event()
+        event = self._async_space
+        self._async_waiters += 1
+        self._wake.set()
+        deadline = loop.time() + self.block_timeout
+        try:
+            while len(self._queue) >= self.max_queue:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                event.clear()
+                try:
+                    await asyncio.wait_for(event.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+        finally:
+            self._async_waiters -= 1
+        if len(self._queue) >= self.max_queue:
+            self.dropped += 1
+            return False
+        return self.record(entry)
+
+    def _admit(self, depth: int) -> bool:
+        """Politique de file pleine (ou à moitié pleine pour ``sample``)"""
+        if self.policy == "sample":
+            free = (self.max_queue - depth) / (self.max_queue - self.max_queue // 2)
+            if random.random() < free:
+                return True
+            self.sampled_out += 1
+            return False
+
+        if depth < self.max_queue:
+            return True
+        if self.policy == "block" and self._thread is not None:
+            self.blocked += 1
+            self._space.clear()
+            self._wake.set()
+            deadline = time.monotonic() + self.block_timeout
+            while len(self._queue) >= self.max_queue:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._space.wait(remaining):
+                    break
+                self._space.clear()
+            if len(self._queue) < self.max_queue:
+                return True
+        self.dropped += 1
+        return False
+
+    # --- Thread d'écriture -----------------------------------------------
+
+    def start(self):
+        """Démarre le thread d'écriture (dans chaque worker, après le fork)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._stopping = False
+        self._thread = threading.Thread(
+            target=self._run, name="audit-writer", daemon=True
+        )
+        self._thread.start()
+
+    def close(self, timeout: float = 5.0):
+        """Écrit les enregistrements en attente et ferme le fichier courant"""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self._drain()
+        self._close_file()
+
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self._drain()
+            if self._file is not None and self._expired():
+                self._rotate()
+
+    def _drain(self):
+        while self._queue:
+            batch: List[Dict] = []
+            while self._queue and len(batch) < self.batch_size:
+                batch.append(self._queue.popleft())
+            self._space.set()
+            if self._async_waiters:
+                self._notify_async()
+            self._write(batch)
+
+    def _notify_async(self):
+        try:
+            self._loop.call_soon_threadsafe(self._async_space.set)
+        except RuntimeError:
+            pass  # Boucle fermée: plus personne n'attend
+
+    def _write(self, batch: List[Dict]):
+        try:
+            data = "".join(
+                json.dumps(entry, default=_to_json, ensure_ascii=False) + "\n"
+                for entry in batch
+            ).encode()
+            if self._file is None:
+                self._open_file()
+            self._file.write(data)
+            self._file.flush()
+        except (OSError, TypeError, ValueError) as e:
+            self.write_errors += 1
+            logger.warning(f"Écriture du journal d'audit impossible: {e}")
+            return
+        self._size += len(data)
+        self.written += len(batch)
+        self.batches += 1
+        self.bytes_written += len(data)
+        if self._expired():
+            self._rotate()
+
+    def _open_file(self):
+        self._path = self.directory / f"audit-{os.getpid()}.jsonl"
+        self._file = open(self._path, "ab")
+        self._size = self._file.tell()
+        self._opened_at = time.time()
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _expired(self) -> bool:
+        return self._size >= self.max_bytes or (
+            self.max_age > 0 and time.time() - self._opened_at >= self.max_age
+        )
+
+    def _rotate(self):
+        """Renomme le fichier courant avec son horodatage et le compresse"""
+        self._close_file()
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        rotated = self._path.with_name(f"{self._path.stem}-{stamp}.jsonl")
+        try:
+            self._path.rename(rotated)
+            with open(rotated, "rb") as source, gzip.open(
+                rotated.with_suffix(".jsonl.gz"), "wb"
+            ) as target:
+                shutil.copyfileobj(source, target)
+            rotated.unlink()
+        except OSError as e:
+            self.write_errors += 1
+            logger.warning(f"Rotation du journal d'audit impossible: {e}")
+            return
+        self.rotations += 1
+
+    def stats(self) -> Dict:
+        """Politique, occupation de la file et compteurs d'écriture"""
+        return {
+            "policy": self.policy,
+            "directory": str(self.directory),
+            "queue_depth": len(self._queue),
+            "max_queue": self.max_queue,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+            "blocked": self.blocked,
+            "batches": self.batches,
+            "bytes_written": self.bytes_written,
+            "rotations": self.rotations,
+            "write_errors": self.write_errors,
+        }
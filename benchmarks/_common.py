@@ -0,0 +1,55 @@
+"""
+⏱️ Utilitaires partagés par les scripts de benchmark
+
+Les benchmarks se lancent depuis la racine du projet, par exemple:
+    python benchmarks/bench_tree_engine.py
+"""
+
+import json
+import pickle
+import sys
+import time
+import warnings
+from pathlib import Path
+from typing import Callable, Dict
+
+# Configuration du path pour les imports depuis la racine du projet
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+# sklearn avertit à chaque appel quand X n'a pas de noms de colonnes
+warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+
+def load_model_and_metadata():
+    """Charge le modèle sauvegardé et ses métadonnées"""
+    models_path = ROOT_DIR / "models"
+    model_file = next(models_path.glob("best_model_*.pkl"))
+    with open(model_file, "rb") as f:
+        model = pickle.load(f)
+
+    metadata_file = next(models_path.glob("model_metadata_*.json"))
+    with open(metadata_file, "r") as f:
+        metadata = json.load(f)
+
+    return model, metadata
+
+
+def time_call(func: Callable, repeat: int = 7, number: int = 10) -> Dict[str, float]:
+    """Mesure un appel (secondes par appel): meilleur et médian sur ``repeat``"""
+    func()  # Échauffement
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    samples.sort()
+    return {"best": samples[0], "median": samples[len(samples) // 2]}
+
+
+def format_duration(seconds: float) -> str:
+    """Formate une durée en µs / ms lisibles"""
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:8.1f} µs"
+    return f"{seconds * 1e3:8.2f} ms"
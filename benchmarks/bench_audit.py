@@ -0,0 +1,122 @@
+"""
+🧾 Benchmark du journal d'audit: latences p50 / p99 de /predict sans audit,
+avec le journal asynchrone (par politique) et avec une écriture synchrone
+(un ``write`` + ``flush`` par requête) pour comparaison
+
+L'application est appelée en processus via ``httpx.ASGITransport``, avec
+``--concurrency`` clients simultanés et des maisons toutes différentes (le
+cache de prédictions ne masque pas le coût de l'inférence).
+
+Usage:
+    python benchmarks/bench_audit.py [--requests 3000] [--concurrency 8]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import tempfile
+import time
+import warnings
+from pathlib import Path
+
+import httpx
+from load_test import make_houses, summarize
+
+import api
+from audit import AuditLog
+
+warnings.filterwarnings("ignore")
+for name in ("api", "httpx"):
+    logging.getLogger(name).setLevel(logging.WARNING)
+
+
+class SyncAuditLog:
+    """Écriture synchrone sur le chemin de la requête (référence naïve)"""
+
+    def __init__(self, directory: Path):
+        self._file = open(directory / "audit-sync.jsonl", "a")
+
+    def record(self, entry):
+        self._file.write(json.dumps(entry) + "\n")
+        self._file.flush()
+
+    async def record_async(self, entry):
+        self.record(entry)
+
+    def start(self):
+        pass
+
+    def close(self):
+        self._file.close()
+
+    def stats(self):
+        return {}
+
+
+async def run(houses, concurrency: int):
+    """Latences de /predict, ``concurrency`` clients en boucle fermée"""
+    transport = httpx.ASGITransport(app=api.app)
+    latencies = []
+    queue = iter(houses)
+
+    async def client_loop(client):
+        for house in queue:
+            start = time.perf_counter()
+            response = await client.post("/predict", json=house)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as c:
+        await asyncio.gather(*(client_loop(c) for _ in range(concurrency)))
+    return latencies
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="🧾 Benchmark du journal d'audit")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    if api.predictor.cache is not None:
+        api.predictor.cache = None
+    houses = make_houses(args.requests, seed=0)
+    asyncio.run(run(houses[:200], args.concurrency))  # préchauffage
+
+    print("🧾 BENCHMARK DU JOURNAL D'AUDIT (/predict)")
+    print(f"{args.requests} requêtes, {args.concurrency} clients simultanés")
+    print("=" * 72)
+    print(
+        f"{'configuration':>14} | {'p50 (ms)':>9} | {'p99 (ms)':>9} | "
+        f"{'écrits':>7} | {'perdus':>7}"
+    )
+    print("-" * 72)
+
+    with tempfile.TemporaryDirectory() as directory:
+        configurations = {
+            "désactivé": lambda: None,
+            "drop": lambda: AuditLog(Path(directory) / "drop", policy="drop"),
+            "block": lambda: AuditLog(Path(directory) / "block", policy="block"),
+            "sample": lambda: AuditLog(Path(directory) / "sample", policy="sample"),
+            "synchrone": lambda: SyncAuditLog(Path(directory)),
+        }
+        for name, factory in configurations.items():
+            api.audit = factory()
+            if api.audit is not None:
+                api.audit.start()
+            result = summarize(asyncio.run(run(houses, args.concurrency)))
+            stats = {}
+            if api.audit is not None:
+                api.audit.close()
+                stats = api.audit.stats()
+            lost = stats.get("dropped", 0) + stats.get("sampled_out", 0)
+            print(
+                f"{name:>14} | {result['p50']:>9.3f} | {result['p99']:>9.3f} | "
+                f"{stats.get('written', '-'):>7} | {lost if stats else '-':>7}"
+            )
+    api.audit = None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+📡 Benchmark de l'esquisse de dérive: coût d'une mise à jour par taille de
+requête, comparé à la prédiction, et mémoire constante quel que soit le trafic
+
+Usage:
+    python benchmarks/bench_drift.py [--rows 1 16 256 4096]
+"""
+
+import argparse
+import tracemalloc
+
+from _common import format_duration, load_model_and_metadata, time_call
+
+from api import HousePricePredictor
+from drift import DriftSketch
+from features import sample_raw_features
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="📡 Benchmark de l'esquisse de dérive")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 16, 256, 4096])
+    args = parser.parse_args()
+
+    model, metadata = load_model_and_metadata()
+    predictor = HousePricePredictor(
+        model=model, feature_names=metadata["data_info"]["feature_names"]
+    )
+    sketch = DriftSketch()
+
+    print("📡 BENCHMARK DE L'ESQUISSE DE DÉRIVE")
+    print(
+        f"Taille fixe: {sketch.counts.nbytes} octets ({len(sketch.counts)} compteurs)"
+    )
+    print("=" * 66)
+    print(
+        f"{'lignes':>7} | {'mise à jour':>12} | {'par ligne':>12} | "
+        f"{'prédiction':>12} | part"
+    )
+    print("-" * 66)
+
+    for n_rows in args.rows:
+        raw = sample_raw_features(n_rows, seed=0)
+        prices = predictor.predict_prices(raw)
+        number = max(1, 20000 // n_rows)
+        update = time_call(lambda: sketch.update(raw, prices), number=number)
+        predict = time_call(lambda: predictor.predict_prices(raw), number=number)
+        print(
+            f"{n_rows:>7} | {format_duration(update['median'])} | "
+            f"{format_duration(update['median'] / n_rows)} | "
+            f"{format_duration(predict['median'])} | "
+            f"{100 * update['median'] / predict['median']:.1f}%"
+        )
+
+    # Mémoire retenue après un gros volume de mises à jour
+    raw = sample_raw_features(64, seed=1)
+    prices = predictor.predict_prices(raw)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for _ in range(10000):
+        sketch.update(raw, prices)
+    after = tracemalloc.take_snapshot()
+    retained = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    tracemalloc.stop()
+    print("-" * 66)
+    print(f"Mémoire retenue après 640 000 lignes: {retained} octets")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+🧵 Test de charge: latence de /health pendant que /predict est saturé
+
+Compare les modes d'exécution de l'inférence (inline / thread / process) en
+pilotant l'application ASGI en mémoire avec httpx.
+
+Usage:
+    python benchmarks/bench_event_loop.py [--clients 16] [--duration 3]
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+import httpx
+import numpy as np
+
+from _common import format_duration
+
+import api
+from features import BASE_FEATURE_NAMES, sample_raw_features
+from inference_executor import InferenceExecutor
+
+
+def _random_batches(n_batches, batch_size):
+    """Lots de maisons aléatoires (évite les hits du cache de prédictions)"""
+    raw = sample_raw_features(n_batches * batch_size, seed=0)
+    records = [dict(zip(BASE_FEATURE_NAMES, row)) for row in raw.tolist()]
+    return [records[i : i + batch_size] for i in range(0, len(records), batch_size)]
+
+
+async def _measure(client, batches, clients, duration):
+    """Latences de /health, au repos puis sous saturation de /predict/batch"""
+    stop = asyncio.Event()
+    predicted = 0
+
+    async def probe(samples, until):
+        while time.perf_counter() < until:
+            # Mesuré depuis l'instant prévu: inclut l'attente de la boucle
+            scheduled = time.perf_counter() + 0.005
+            await asyncio.sleep(0.005)
+            response = await client.get("/health")
+            response.raise_for_status()
+            samples.append(time.perf_counter() - scheduled)
+
+    async def load(worker):
+        nonlocal predicted
+        index = worker
+        while not stop.is_set():
+            batch = batches[index % len(batches)]
+            response = await client.post("/predict/batch", json={"houses": batch})
+            response.raise_for_status()
+            predicted += len(batch)
+            index += clients
+            # ASGITransport ne rend pas toujours la main à la boucle
+            await asyncio.sleep(0)
+
+    idle = []
+    await probe(idle, time.perf_counter() + 0.5)
+
+    loaded = []
+    workers = [asyncio.create_task(load(i)) for i in range(clients)]
+    await asyncio.sleep(0.2)
+    start = time.perf_counter()
+    await probe(loaded, start + duration)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await asyncio.gather(*workers)
+
+    return idle, loaded, predicted / elapsed
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="🧵 Latence de /health sous charge")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--modes", nargs="+", default=["inline", "thread", "process"])
+    args = parser.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    batches = _random_batches(64, args.batch_size)
+    transport = httpx.ASGITransport(app=api.app)
+
+    print("🧵 LATENCE DE /health PENDANT LA SATURATION DE /predict/batch")
+    print("=" * 72)
+    print(
+        f"{'mode':>8} | {'p50 repos':>11} | {'p50 charge':>11} | "
+        f"{'p99 charge':>11} | lignes/s"
+    )
+    print("-" * 72)
+
+    for mode in args.modes:
+        api.inference = InferenceExecutor(
+            api.predictor, mode=mode, max_workers=args.workers
+        )
+
+        async def run():
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench"
+            ) as client:
+                # Échauffement (démarrage des processus en mode "process")
+                await client.post("/predict/batch", json={"houses": batches[0]})
+                return await _measure(client, batches, args.clients, args.duration)
+
+        idle, loaded, throughput = asyncio.run(run())
+        api.inference.shutdown()
+
+        print(
+            f"{mode:>8} | {format_duration(np.percentile(idle, 50))} | "
+            f"{format_duration(np.percentile(loaded, 50))} | "
+            f"{format_duration(np.percentile(loaded, 99))} | {throughput:,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+🔍 Benchmark du mode ``explain=true``: surcoût de TreeSHAP par rapport à la
+prédiction seule, pour le modèle (shap_values contre model.predict) et pour
+le chemin de service complet (predict_many, cache désactivé)
+
+Usage:
+    python benchmarks/bench_explain.py [--rows 1 16 100 1000]
+"""
+
+import argparse
+import time
+import warnings
+
+from _common import format_duration, load_model_and_metadata, time_call
+
+from api import HousePricePredictor
+from explain import TreeExplainer
+from features import BASE_FEATURE_NAMES, records_to_raw, sample_raw_features
+
+# .dict() est l'API utilisée par le service (pydantic v1)
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="🔍 Benchmark des explications")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 16, 100, 1000])
+    args = parser.parse_args()
+
+    model, metadata = load_model_and_metadata()
+    predictor = HousePricePredictor(
+        model=model, feature_names=metadata["data_info"]["feature_names"]
+    )
+
+    start = time.perf_counter()
+    explainer = TreeExplainer(model)
+    print("🔍 BENCHMARK DES EXPLICATIONS (TreeSHAP)")
+    print(
+        f"Préparation: {format_duration(time.perf_counter() - start).strip()} "
+        f"({len(explainer.leaf_value)} feuilles, profondeur {explainer.depth})"
+    )
+    print("=" * 78)
+    print(
+        f"{'lignes':>7} | {'étape':>11} | {'prédiction':>12} | "
+        f"{'explication':>12} | surcoût"
+    )
+    print("-" * 78)
+
+    for n_rows in args.rows:
+        raw = sample_raw_features(n_rows, seed=0)
+        rows = [dict(zip(BASE_FEATURE_NAMES, row)) for row in raw.tolist()]
+        X = predictor.feature_plan.transform(records_to_raw(rows))
+
+        number = max(1, 2000 // n_rows)
+        scenarios = {
+            "modèle": (
+                lambda: model.predict(X),
+                lambda: explainer.shap_values(X),
+            ),
+            "service": (
+                lambda: predictor.predict_many(rows),
+                lambda: predictor.predict_many(rows, explain=True),
+            ),
+        }
+        for stage, (plain, explained) in scenarios.items():
+            plain_time = time_call(plain, repeat=5, number=number)["median"]
+            explain_time = time_call(explained, repeat=5, number=number)["median"]
+            print(
+                f"{n_rows:>7} | {stage:>11} | {format_duration(plain_time)} | "
+                f"{format_duration(explain_time)} | x{explain_time / plain_time:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
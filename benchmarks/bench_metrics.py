@@ -0,0 +1,164 @@
+"""
+📈 Benchmark du surcoût de l'instrumentation (metrics.py)
+
+Mesure le coût unitaire des primitives, le surcoût du middleware ASGI seul,
+puis une requête /predict complète (appelée directement en ASGI, sans
+réseau) avec et sans métriques, en alternant les deux pour limiter le bruit.
+Enfin, le coût du profilage (profiling.py) : désactivé, activé par jeton
+mais sans en-tête, et requête profilée.
+
+Usage:
+    python benchmarks/bench_metrics.py [--requests 2000]
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from _common import format_duration, time_call
+
+import api
+import metrics
+import profiling
+
+HOUSE = {
+    "area": 7420,
+    "bedrooms": 4,
+    "bathrooms": 2,
+    "stories": 2,
+    "mainroad": 1,
+    "guestroom": 1,
+    "basement": 0,
+    "hotwaterheating": 0,
+    "airconditioning": 1,
+    "parking": 2,
+    "prefarea": 1,
+    "furnishingstatus": 1,
+}
+
+
+def _scope(path: str) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("127.0.0.1", 8000),
+    }
+
+
+async def _call(app, path: str, body: bytes):
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(_scope(path), receive, send)
+
+
+async def _per_request(app, path: str, body: bytes, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        await _call(app, path, body)
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="📈 Surcoût des métriques")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=7)
+    args = parser.parse_args()
+
+    print("📈 SURCOÛT DE L'INSTRUMENTATION")
+    print("=" * 50)
+
+    histogram = metrics.Histogram()
+    primitives = {
+        "perf_counter()": time.perf_counter,
+        "Histogram.observe": lambda: histogram.observe(1e-4),
+        "count_error": lambda: metrics.count_error("bench"),
+        "étape (début et fin)": lambda: metrics.observe_stage(
+            "validation", metrics.stage_start()
+        ),
+    }
+    for name, func in primitives.items():
+        timing = time_call(func, number=100000)["median"]
+        print(f"{name:>24} | {format_duration(timing)}")
+    metrics.errors.pop("bench", None)
+
+    loop = asyncio.new_event_loop()
+
+    async def empty_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    wrapped = metrics.MetricsMiddleware(empty_app)
+    bare = statistics.median(
+        loop.run_until_complete(_per_request(empty_app, "/", b"", 10000))
+        for _ in range(args.rounds)
+    )
+    middleware = statistics.median(
+        loop.run_until_complete(_per_request(wrapped, "/", b"", 10000))
+        for _ in range(args.rounds)
+    )
+    print(f"{'middleware ASGI':>24} | {format_duration(middleware - bare)}")
+
+    # Requête complète (réponse servie par le cache après la première)
+    body = json.dumps(HOUSE).encode()
+    samples = {True: [], False: []}
+    loop.run_until_complete(_per_request(api.app, "/predict", body, 100))
+    for _ in range(args.rounds):
+        for enabled in (False, True):
+            metrics.ENABLED = enabled
+            samples[enabled].append(
+                loop.run_until_complete(
+                    _per_request(api.app, "/predict", body, args.requests)
+                )
+            )
+    metrics.ENABLED = True
+
+    without = statistics.median(samples[False])
+    with_metrics = statistics.median(samples[True])
+    print("-" * 50)
+    print(f"{'/predict sans métriques':>24} | {format_duration(without)}")
+    print(f"{'/predict avec métriques':>24} | {format_duration(with_metrics)}")
+    print(f"{'surcoût par requête':>24} | {format_duration(with_metrics - without)}")
+
+    # Profilage: (taux d'échantillonnage, jeton) de chaque configuration
+    configurations = {
+        "profilage désactivé": (0.0, ""),
+        "jeton, sans en-tête": (0.0, "secret"),
+        "requête profilée": (1.0, ""),
+    }
+    samples = {name: [] for name in configurations}
+    for _ in range(args.rounds):
+        for name, (rate, token) in configurations.items():
+            profiling.SAMPLE_RATE, profiling.TOKEN = rate, token
+            # Peu de requêtes profilées: chacune coûte des millisecondes
+            n = 50 if rate else args.requests
+            samples[name].append(
+                loop.run_until_complete(_per_request(api.app, "/predict", body, n))
+            )
+    profiling.SAMPLE_RATE, profiling.TOKEN = 0.0, ""
+    profiling.clear()
+    loop.close()
+
+    print("-" * 50)
+    print("/predict et profilage:")
+    for name, values in samples.items():
+        print(f"{name:>24} | {format_duration(statistics.median(values))}")
+
+
+if __name__ == "__main__":
+    main()
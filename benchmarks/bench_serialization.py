@@ -0,0 +1,85 @@
+"""
+🧾 Microbenchmark de la sérialisation d'une réponse /predict
+
+Compare, pour un même résultat de prédiction, le chemin historique
+(``PredictionResponse(**result)`` puis validation et sérialisation par
+``response_model`` dans FastAPI) au sérialiseur compilé utilisé par l'API,
+en réponse complète et réduite (``?slim=true``).
+
+Usage:
+    python benchmarks/bench_serialization.py
+"""
+
+import asyncio
+
+from _common import format_duration, time_call
+
+import api
+from fastapi.responses import Response
+from fastapi.routing import serialize_response
+
+HOUSE = {
+    "area": 7420,
+    "bedrooms": 4,
+    "bathrooms": 2,
+    "stories": 2,
+    "mainroad": 1,
+    "guestroom": 1,
+    "basement": 0,
+    "hotwaterheating": 0,
+    "airconditioning": 1,
+    "parking": 2,
+    "prefarea": 1,
+    "furnishingstatus": 1,
+}
+
+
+def main():
+    """Fonction principale"""
+    result = api.predictor.predict(HOUSE)
+    route = next(route for route in api.app.routes if route.path == "/predict")
+    loop = asyncio.new_event_loop()
+
+    def before():
+        content = loop.run_until_complete(
+            serialize_response(
+                field=route.response_field,
+                response_content=api.PredictionResponse(**result),
+                dump_json=True,
+            )
+        )
+        return Response(content=content, media_type="application/json")
+
+    def after(serializer):
+        return lambda: Response(
+            content=serializer.dump_json(result), media_type="application/json"
+        )
+
+    # Coût de la boucle d'événements seule, retranché du chemin historique
+    async def noop():
+        pass
+
+    scenarios = {
+        "response_model": before,
+        "compilé": after(api._prediction_serializer),
+        "compilé, slim": after(api._slim_prediction_serializer),
+    }
+
+    assert before().body == scenarios["compilé"]().body
+
+    overhead = time_call(lambda: loop.run_until_complete(noop()), number=2000)
+    print("🧾 SÉRIALISATION D'UNE RÉPONSE /predict")
+    print("=" * 52)
+    print(f"{'chemin':>15} | {'par requête':>11} | {'octets':>6}")
+    print("-" * 52)
+    for name, func in scenarios.items():
+        timing = time_call(func, number=2000)["median"]
+        if func is before:
+            timing -= overhead["median"]
+        size = len(func().body)
+        print(f"{name:>15} | {format_duration(timing)} | {size:>6}")
+    loop.close()
+
+
+if __name__ == "__main__":
+    main()
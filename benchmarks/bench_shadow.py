@@ -0,0 +1,103 @@
+"""
+👥 Benchmark du scoring fantôme: latences p50 / p99 de /predict sans
+candidat, puis avec une fraction croissante des requêtes rejouées
+
+Les candidats sont les autres versions de ``models/``. S'il n'y en a pas, le
+modèle servi est rejoué sous une autre version (même coût d'inférence, écart
+nul). L'application est appelée en processus via ``httpx.ASGITransport``.
+Les configurations sont alternées sur ``--rounds`` tours et la médiane des
+percentiles est retenue : le p99 d'un seul tour varie du simple au double.
+Sur une machine à un seul cœur, le scoring fantôme partage ce cœur avec le
+service : seule une fraction modeste laisse la latence inchangée.
+
+Usage:
+    python benchmarks/bench_shadow.py [--requests 3000] [--concurrency 8]
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import warnings
+
+from bench_audit import run
+from load_test import make_houses, summarize
+
+import api
+from shadow import ShadowModel, ShadowScorer, load_candidates
+
+warnings.filterwarnings("ignore")
+for name in ("api", "httpx"):
+    logging.getLogger(name).setLevel(logging.WARNING)
+
+
+def _candidates():
+    served = api.predictor.model_hash
+    candidates = [c for c in load_candidates(api.registry) if c.version != served]
+    if not candidates:
+        stand_in = ShadowModel(api.predictor.version)
+        stand_in.version, stand_in.name = f"{served}-copie", "copie"
+        candidates = [stand_in]
+    return candidates
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="👥 Benchmark du scoring fantôme")
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--fractions", type=float, nargs="+", default=[0.1, 1.0])
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    api.predictor.cache = None
+    candidates = _candidates()
+    houses = make_houses(args.requests, seed=0)
+    asyncio.run(run(houses[:200], args.concurrency))  # préchauffage
+
+    fractions = [0.0, *args.fractions]
+    results = {fraction: [] for fraction in fractions}
+    snapshots = {}
+    for _ in range(args.rounds):
+        for fraction in fractions:
+            scorer = ShadowScorer(candidates, fraction=fraction) if fraction else None
+            api.predictor.shadow = scorer
+            results[fraction].append(
+                summarize(asyncio.run(run(houses, args.concurrency)))
+            )
+            if scorer is not None:
+                scorer.wait()
+                snapshots[fraction] = scorer.snapshot()
+                scorer.close()
+
+    print("👥 BENCHMARK DU SCORING FANTÔME (/predict)")
+    print(
+        f"{args.requests} requêtes, {args.concurrency} clients simultanés, "
+        f"médiane de {args.rounds} tours, "
+        f"candidats: {', '.join(c.name for c in candidates)}"
+    )
+    print("=" * 72)
+    print(
+        f"{'fraction':>9} | {'p50 (ms)':>9} | {'p99 (ms)':>9} | "
+        f"{'rejouées':>8} | {'ignorées':>8} | {'MAE':>9}"
+    )
+    print("-" * 72)
+    for fraction in fractions:
+        p50, p99 = (
+            statistics.median(result[key] for result in results[fraction])
+            for key in ("p50", "p99")
+        )
+        submitted = skipped = mae = "-"
+        if fraction in snapshots:
+            snapshot = snapshots[fraction]
+            submitted, skipped = snapshot["submitted"], snapshot["skipped"]
+            mae = f"{next(iter(snapshot['candidates'].values()))['mae']:.0f}"
+        print(
+            f"{fraction:>9.2f} | {p50:>9.3f} | {p99:>9.3f} | "
+            f"{submitted:>8} | {skipped:>8} | {mae:>9}"
+        )
+    api.predictor.shadow = None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+🥶 Benchmark du démarrage à froid: pickle scikit-learn contre artefact compact
+
+Chaque mesure lance un interpréteur neuf qui importe ``api`` (chargement du
+modèle compris) puis fait une première prédiction.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from _common import ROOT_DIR, format_duration
+
+from model_artifact import artifact_path, export_model
+
+# Exécuté dans un processus neuf pour chaque mesure
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import api
+imported = time.perf_counter()
+api.predictor.predict({
+    "area": 5000, "bedrooms": 3, "bathrooms": 2, "stories": 2, "mainroad": 1,
+    "guestroom": 0, "basement": 1, "hotwaterheating": 0, "airconditioning": 1,
+    "parking": 2, "prefarea": 1, "furnishingstatus": 1,
+})
+predicted = time.perf_counter()
+print(json.dumps({
+    "import": imported - start,
+    "first_prediction": predicted - start,
+    "sklearn": "sklearn" in sys.modules,
+    "pandas": "pandas" in sys.modules,
+}))
+"""
+
+
+def _measure(model_format: str, runs: int):
+    """Médianes du temps d'import et du temps jusqu'à la première prédiction"""
+    env = {**os.environ, "MODEL_FORMAT": model_format}
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", PROBE],
+            cwd=ROOT_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    return {
+        "import": float(np.median([s["import"] for s in samples])),
+        "first_prediction": float(np.median([s["first_prediction"] for s in samples])),
+        "sklearn": samples[-1]["sklearn"],
+        "pandas": samples[-1]["pandas"],
+    }
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="🥶 Benchmark du démarrage à froid")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    model_file = next((ROOT_DIR / "models").glob("best_model_*.pkl"))
+    if not artifact_path(model_file).exists():
+        metadata_file = next((ROOT_DIR / "models").glob("model_metadata_*.json"))
+        export_model(model_file, metadata_file)
+
+    print("🥶 DÉMARRAGE À FROID DE L'API")
+    print("=" * 72)
+    print(
+        f"{'format':>8} | {'import api':>11} | {'1re prédiction':>14} | "
+        f"{'sklearn':>7} | pandas"
+    )
+    print("-" * 72)
+
+    for model_format in ("pickle", "flat"):
+        result = _measure(model_format, args.runs)
+        print(
+            f"{model_format:>8} | {format_duration(result['import'])} | "
+            f"{format_duration(result['first_prediction']):>14} | "
+            f"{'oui' if result['sklearn'] else 'non':>7} | "
+            f"{'oui' if result['pandas'] else 'non'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
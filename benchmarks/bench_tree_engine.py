@@ -0,0 +1,49 @@
+"""
+🌲 Benchmark du moteur aplati contre GradientBoostingRegressor.predict
+
+Usage:
+    python benchmarks/bench_tree_engine.py [--rows 1 10000]
+"""
+
+import argparse
+
+import numpy as np
+
+from _common import format_duration, load_model_and_metadata, time_call
+
+from features import FeaturePlan, sample_raw_features
+from tree_engine import FlatTreeEnsemble
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="🌲 Benchmark du moteur aplati")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 10000])
+    args = parser.parse_args()
+
+    model, metadata = load_model_and_metadata()
+    plan = FeaturePlan(metadata["data_info"]["feature_names"])
+    engine = FlatTreeEnsemble.from_sklearn(model)
+
+    print("🌲 BENCHMARK DU MOTEUR D'INFÉRENCE")
+    print("=" * 60)
+    print(f"📋 {engine.n_trees} arbres, profondeur {engine.depth}")
+    print(f"{'lignes':>8} | {'sklearn':>11} | {'aplati':>11} | accélération")
+    print("-" * 60)
+
+    for n_rows in args.rows:
+        X = plan.transform(sample_raw_features(n_rows, seed=0))
+        np.testing.assert_allclose(engine.predict(X), model.predict(X), rtol=1e-10)
+
+        number = max(1, 2000 // n_rows)
+        sklearn_time = time_call(lambda: model.predict(X), number=number)["median"]
+        flat_time = time_call(lambda: engine.predict(X), number=number)["median"]
+
+        print(
+            f"{n_rows:>8} | {format_duration(sklearn_time)} | "
+            f"{format_duration(flat_time)} | x{sklearn_time / flat_time:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
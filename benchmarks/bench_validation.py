@@ -0,0 +1,98 @@
+"""
+✅ Benchmark de la validation d'un lot: HouseFeatures ligne par ligne contre
+validation vectorisée d'un lot en colonnes (/predict/batch vs /predict/columnar)
+
+Usage:
+    python benchmarks/bench_validation.py [--rows 100 10000] [--invalid 0.05]
+"""
+
+import argparse
+import warnings
+
+import numpy as np
+
+from _common import load_model_and_metadata, time_call
+
+from api import HousePricePredictor, HouseFeatures
+from features import AREA, BASE_FEATURE_NAMES, sample_raw_features
+from validation import validate_columns
+
+# .dict() est l'API utilisée par le service (pydantic v1)
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+
+def make_rows(n_rows: int, invalid_ratio: float):
+    """Lignes comme reçues en JSON (entiers hors surface), une part invalide"""
+    raw = sample_raw_features(n_rows, seed=0)
+    rows = [
+        {
+            name: value if column == AREA else int(value)
+            for column, (name, value) in enumerate(zip(BASE_FEATURE_NAMES, row))
+        }
+        for row in raw.tolist()
+    ]
+    rng = np.random.default_rng(1)
+    for index in rng.choice(n_rows, int(n_rows * invalid_ratio), replace=False):
+        rows[index]["area"] = 500.0
+    return rows
+
+
+def validate_per_row(rows):
+    valid = []
+    for row in rows:
+        try:
+            valid.append(HouseFeatures(**row).dict())
+        except Exception:
+            pass
+    return valid
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="✅ Benchmark de la validation")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--invalid", type=float, default=0.05)
+    args = parser.parse_args()
+
+    model, metadata = load_model_and_metadata()
+    predictor = HousePricePredictor(
+        model=model, feature_names=metadata["data_info"]["feature_names"]
+    )
+
+    print("✅ BENCHMARK DE LA VALIDATION (lignes/s)")
+    print("=" * 72)
+    print(
+        f"{'lignes':>8} | {'étape':>11} | {'pydantic':>12} | "
+        f"{'colonnes':>12} | accélération"
+    )
+    print("-" * 72)
+
+    for n_rows in args.rows:
+        rows = make_rows(n_rows, args.invalid)
+        columns = {name: [row[name] for row in rows] for name in BASE_FEATURE_NAMES}
+
+        _, valid, _ = validate_columns(columns, n_rows)
+        assert valid.sum() == len(validate_per_row(rows))
+
+        number = max(1, 20000 // n_rows)
+        scenarios = {
+            "validation": (
+                lambda: validate_per_row(rows),
+                lambda: validate_columns(columns, n_rows),
+            ),
+            "bout à bout": (
+                lambda: predictor.predict_batch(rows),
+                lambda: predictor.predict_columns(columns, n_rows),
+            ),
+        }
+        for stage, (per_row, columnar) in scenarios.items():
+            row_time = time_call(per_row, repeat=5, number=number)["median"]
+            column_time = time_call(columnar, repeat=5, number=number)["median"]
+            print(
+                f"{n_rows:>8} | {stage:>11} | {n_rows / row_time:>12,.0f} | "
+                f"{n_rows / column_time:>12,.0f} | x{row_time / column_time:.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,622 @@
+"""
+🏋️ Tests de charge de l'API: débit et latences p50 / p95 / p99
+
+Cibles:
+- en processus (défaut): ``api.app`` appelée via ``httpx.ASGITransport``,
+  sans réseau ni serveur ;
+- ``--url``: serveur déjà lancé ;
+- ``--launch``: lance ``run_api.py`` sur un port libre le temps du test.
+
+Scénarios:
+- ``single``: requêtes /predict séquentielles ;
+- ``batch``: lots /predict/batch séquentiels ;
+- ``concurrent``: ``--concurrency`` clients simultanés, requêtes tirées
+  selon ``--mix`` (ou rejouées depuis ``--replay``) ;
+- ``overload`` (sur demande): arrivées à débit fixe, ``--overload-factor``
+  fois le débit mesuré par ``concurrent``, sans attendre les réponses. Les
+  rejets 503 du contrôle d'admission sont comptés à part des erreurs.
+
+Les maisons sont tirées avec une graine fixe : deux exécutions envoient les
+mêmes requêtes. Les résultats sont écrits en JSON (``--output``) et comparés
+à une référence (``--baseline``) : le script échoue (code 1) si la latence
+p50 / p95 ou le débit se dégradent au-delà de ``--threshold``.
+
+Usage:
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --launch --workers 2 --concurrency 32
+    python benchmarks/load_test.py --replay traffic.jsonl --scenarios concurrent
+    python benchmarks/load_test.py --scenarios concurrent overload
+    python benchmarks/load_test.py --save-baseline benchmarks/baseline.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+from _common import ROOT_DIR
+
+from features import AREA, BASE_FEATURE_NAMES, sample_raw_features
+
+SCENARIOS = ("single", "batch", "concurrent", "overload")
+DEFAULT_SCENARIOS = ["single", "batch", "concurrent"]
+# Connexions ouvertes au plus par le scénario overload (serveur distant)
+OVERLOAD_CONNECTIONS = 1024
+DEFAULT_MIX = "predict=8,predict_slim=2,batch=1,columnar=1,health=1"
+DEFAULT_BASELINE = ROOT_DIR / "benchmarks" / "baseline.json"
+
+# (méthode, chemin, arguments httpx, lignes prédites)
+Request = Tuple[str, str, Dict, int]
+
+
+def make_houses(n: int, seed: int = 0) -> List[Dict]:
+    """Maisons valides, comme envoyées en JSON par un client"""
+    raw = sample_raw_features(n, seed=seed)
+    return [
+        {
+            name: value if column == AREA else int(value)
+            for column, (name, value) in enumerate(zip(BASE_FEATURE_NAMES, row))
+        }
+        for row in raw.tolist()
+    ]
+
+
+def build_request(kind: str, houses: List[Dict], rng, batch_size: int) -> Request:
+    """Construit une requête d'un type du mélange"""
+    if kind == "predict":
+        return "POST", "/predict", {"json": rng.choice(houses)}, 1
+    if kind == "predict_slim":
+        return "POST", "/predict?slim=true", {"json": rng.choice(houses)}, 1
+    if kind == "batch":
+        batch = rng.sample(houses, batch_size)
+        return "POST", "/predict/batch", {"json": {"houses": batch}}, batch_size
+    if kind == "columnar":
+        batch = rng.sample(houses, batch_size)
+        columns = {name: [house[name] for house in batch] for name in houses[0]}
+        return "POST", "/predict/columnar", {"json": columns}, batch_size
+    if kind == "health":
+        return "GET", "/health", {}, 0
+    if kind == "model_info":
+        return "GET", "/model/info", {}, 0
+    raise ValueError(f"Type de requête inconnu: {kind}")
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """``predict=8,batch=1`` -> poids par type de requête"""
+    weights = {}
+    for part in mix.split(","):
+        kind, _, weight = part.partition("=")
+        weights[kind.strip()] = float(weight or 1)
+    return weights
+
+
+def mix_source(
+    weights: Dict[str, float], houses: List[Dict], batch_size: int, seed: int
+) -> Iterator[Request]:
+    """Suite infinie et reproductible de requêtes tirées selon le mélange"""
+    rng = random.Random(seed)
+    kinds, cum_weights = list(weights), list(itertools.accumulate(weights.values()))
+    while True:
+        kind = rng.choices(kinds, cum_weights=cum_weights)[0]
+        yield build_request(kind, houses, rng, batch_size)
+
+
+def load_replay(path: Path) -> List[Request]:
+    """Requêtes à rejouer, une par ligne JSON
+
+    Une ligne est soit ``{"method", "path", "json"}``, soit directement les
+    caractéristiques d'une maison (envoyées à /predict). Les autres lignes
+    sont ignorées.
+    """
+    requests, skipped = [], 0
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                skipped += 1
+                continue
+            if isinstance(item, dict) and "path" in item:
+                body = item.get("json")
+                kwargs = {"json": body} if body is not None else {}
+                rows = len(body.get("houses", [])) if isinstance(body, dict) else 0
+                requests.append(
+                    (item.get("method", "POST").upper(), item["path"], kwargs, rows)
+                )
+            elif isinstance(item, dict) and all(n in item for n in BASE_FEATURE_NAMES):
+                requests.append(("POST", "/predict", {"json": item}, 1))
+            else:
+                skipped += 1
+
+    if skipped:
+        print(f"⚠️  {skipped} lignes de {path} ignorées (ni requête ni maison)")
+    if not requests:
+        raise ValueError(f"Aucune requête rejouable dans {path}")
+    return requests
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    source: Iterator[Request],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+) -> Dict:
+    """``concurrency`` clients envoient les requêtes de ``source`` pendant ``duration``"""
+    latencies: Dict[str, List[float]] = {}
+    counters = {"errors": 0, "rows": 0}
+
+    async def worker(deadline: float, record: bool):
+        while time.perf_counter() < deadline:
+            method, path, kwargs, rows = next(source)
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            elapsed = time.perf_counter() - start
+            if not record:
+                continue
+            if ok:
+                route = path.split("?", 1)[0]
+                latencies.setdefault(route, []).append(elapsed)
+                counters["rows"] += rows
+            else:
+                counters["errors"] += 1
+
+    if warmup > 0:
+        deadline = time.perf_counter() + warmup
+        await asyncio.gather(*(worker(deadline, False) for _ in range(concurrency)))
+
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(worker(deadline, True) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "concurrency": concurrency,
+        "duration_seconds": elapsed,
+        "requests": len(all_latencies),
+        "errors": counters["errors"],
+        "throughput_rps": len(all_latencies) / elapsed,
+        "rows_per_second": counters["rows"] / elapsed,
+        "latency_ms": summarize(all_latencies),
+        "by_route": {
+            route: summarize(values) for route, values in sorted(latencies.items())
+        },
+    }
+
+
+async def run_open_loop(
+    client: httpx.AsyncClient,
+    source: Iterator[Request],
+    rate: float,
+    duration: float,
+    warmup: float,
+) -> Dict:
+    """Requêtes de ``source`` envoyées à ``rate`` req/s sans attendre les réponses
+
+    Contrairement aux clients fermés de ``run_scenario``, la charge ne baisse
+    pas quand le serveur ralentit : c'est une surcharge réelle.
+    """
+    latencies: Dict[str, List[float]] = {}
+    rejected: List[float] = []
+    counters = {"errors": 0, "rows": 0}
+
+    async def send(request: Request, record: bool):
+        method, path, kwargs, rows = request
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError:
+            status = None
+        elapsed = time.perf_counter() - start
+        if not record:
+            return
+        if status is not None and status < 400:
+            latencies.setdefault(path.split("?", 1)[0], []).append(elapsed)
+            counters["rows"] += rows
+        elif status == 503:
+            rejected.append(elapsed)
+        else:
+            counters["errors"] += 1
+
+    async def arrivals(period: float, record: bool):
+        tasks, start, sent = set(), time.perf_counter(), 0
+        while True:
+            now = time.perf_counter()
+            if now - start >= period:
+                break
+            # Rattrape les arrivées dues depuis le dernier réveil
+            due = int((now - start) * rate) + 1
+            for _ in range(due - sent):
+                task = asyncio.ensure_future(send(next(source), record))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            sent = due
+            await asyncio.sleep(1 / rate)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    if warmup > 0:
+        await arrivals(warmup, False)
+
+    start = time.perf_counter()
+    await arrivals(duration, True)
+    elapsed = time.perf_counter() - start
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "offered_rps": rate,
+        "duration_seconds": elapsed,
+        "requests": len(all_latencies),
+        "rejected": len(rejected),
+        "errors": counters["errors"],
+        "throughput_rps": len(all_latencies) / elapsed,
+        "rows_per_second": counters["rows"] / elapsed,
+        "latency_ms": summarize(all_latencies),
+        "rejected_latency_ms": summarize(rejected),
+        "by_route": {
+            route: summarize(values) for route, values in sorted(latencies.items())
+        },
+    }
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    """Percentiles de latence en millisecondes"""
+    if not latencies:
+        return {"count": 0}
+    values = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": len(values),
+        "p50": float(p50),
+        "p95": float(p95),
+        "p99": float(p99),
+        "mean": float(values.mean()),
+        "max": float(values.max()),
+    }
+
+
+def compare_to_baseline(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Régressions au-delà de ``threshold`` (latence p50/p95 et débit)"""
+    regressions = []
+    for name, reference in baseline.get("scenarios", {}).items():
+        current = results["scenarios"].get(name)
+        if current is None:
+            continue
+        for percentile in ("p50", "p95"):
+            before = reference["latency_ms"].get(percentile)
+            after = current["latency_ms"].get(percentile)
+            if before and after and after > before * (1 + threshold):
+                regressions.append(
+                    f"{name}: latence {percentile} {after:.2f} ms "
+                    f"(référence {before:.2f} ms)"
+                )
+        before, after = reference["throughput_rps"], current["throughput_rps"]
+        if after < before * (1 - threshold):
+            regressions.append(
+                f"{name}: débit {after:,.0f} req/s (référence {before:,.0f} req/s)"
+            )
+        if current["errors"] > reference.get("errors", 0):
+            regressions.append(f"{name}: {current['errors']} erreurs")
+    return regressions
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def launch_server(workers: int, port: int, timeout: float = 60.0):
+    """Lance run_api.py et attend que /health réponde"""
+    command = [sys.executable, "run_api.py", "--port", str(port), "--no-reload"]
+    if workers:
+        command += ["--workers", str(workers)]
+    process = subprocess.Popen(
+        command,
+        cwd=ROOT_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Le serveur s'est arrêté (code {process.returncode})")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f"Le serveur n'a pas répondu en {timeout:.0f}s")
+
+
+def stop_server(process):
+    """Arrêt gracieux du serveur (et de ses workers)"""
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+    except ProcessLookupError:
+        pass
+
+
+class DirectASGIClient:
+    """Appels ASGI directs, sans httpx, pour le scénario overload en processus
+
+    Le générateur de charge partage alors le CPU du serveur : avec httpx, il
+    coûterait plus cher que les rejets qu'il provoque et saturerait seul la
+    boucle d'événements.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def request(self, method: str, path: str, json=None):
+        path, _, query = path.partition("?")
+        body = b"" if json is None else _json_dumps(json)
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [
+                (b"host", b"test"),
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+            "client": ("127.0.0.1", 1234),
+            "server": ("test", 80),
+        }
+        response = _Status()
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                response.status_code = message["status"]
+
+        try:
+            await self.app(scope, receive, send)
+        except Exception:
+            pass  # déjà répondu 500 par ServerErrorMiddleware
+        return response
+
+
+class _Status:
+    """Réponse réduite au code HTTP (construire un ``httpx.Response`` coûte cher)"""
+
+    status_code = 500
+
+
+def _json_dumps(value) -> bytes:
+    return json.dumps(value).encode()
+
+
+def _client(url: Optional[str], connections: int) -> httpx.AsyncClient:
+    # Une ligne de log par requête fausserait les mesures
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    if url is None:
+        import api
+
+        transport = httpx.ASGITransport(app=api.app)
+        return httpx.AsyncClient(transport=transport, base_url="http://test")
+    limits = httpx.Limits(max_connections=connections)
+    return httpx.AsyncClient(base_url=url, limits=limits, timeout=30.0)
+
+
+async def run_suite(args, url: Optional[str]) -> Dict:
+    houses = make_houses(1000, seed=args.seed)
+    replay = load_replay(args.replay) if args.replay else None
+    weights = parse_mix(args.mix)
+    for kind in weights:
+        build_request(kind, houses, random.Random(0), args.batch_size)
+
+    plans = {
+        "single": (mix_source({"predict": 1}, houses, args.batch_size, args.seed), 1),
+        "batch": (mix_source({"batch": 1}, houses, args.batch_size, args.seed), 1),
+        "concurrent": (
+            (
+                itertools.cycle(replay)
+                if replay
+                else mix_source(weights, houses, args.batch_size, args.seed)
+            ),
+            args.concurrency,
+        ),
+    }
+
+    results = {}
+    connections = args.concurrency
+    if "overload" in args.scenarios:
+        connections = max(connections, OVERLOAD_CONNECTIONS)
+    async with _client(url, connections) as client:
+        for name in args.scenarios:
+            if name == "overload":
+                results[name] = await run_overload(client, args, plans, results, url)
+            else:
+                source, concurrency = plans[name]
+                results[name] = await run_scenario(
+                    client, source, concurrency, args.duration, args.warmup
+                )
+            print_scenario(name, results[name])
+    return results
+
+
+async def run_overload(client, args, plans: Dict, results: Dict, url) -> Dict:
+    """Arrivées à ``--overload-factor`` fois le débit du scénario concurrent
+
+    En processus, la capacité est recalibrée avec ``DirectASGIClient``, plus
+    rapide que httpx : le facteur de surcharge porte sur le serveur seul.
+    """
+    source, concurrency = plans["concurrent"]
+    capacity = results.get("concurrent")
+    if url is None:
+        import api
+
+        client, capacity = DirectASGIClient(api.app), None
+    if capacity is None:
+        capacity = await run_scenario(client, source, concurrency, 2.0, args.warmup)
+    rate = args.overload_factor * capacity["throughput_rps"]
+    return await run_open_loop(client, source, rate, args.duration, args.warmup)
+
+
+def print_scenario(name: str, result: Dict):
+    latency = result["latency_ms"]
+    if not latency.get("count"):
+        print(f"{name:>11} | aucune requête réussie ({result['errors']} erreurs)")
+        return
+    print(
+        f"{name:>11} | {result['throughput_rps']:>8,.0f} req/s | "
+        f"{result['rows_per_second']:>9,.0f} lignes/s | "
+        f"p50 {latency['p50']:7.2f} | p95 {latency['p95']:7.2f} | "
+        f"p99 {latency['p99']:7.2f} ms | {result['errors']} erreurs"
+    )
+    if "offered_rps" in result:
+        rejected = result["rejected_latency_ms"]
+        line = (
+            f"{'':>11} | offert {result['offered_rps']:,.0f} req/s | "
+            f"{result['rejected']} rejets 503"
+        )
+        if rejected.get("count"):
+            line += f" (p99 {rejected['p99']:.2f} ms)"
+        print(line)
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="🏋️ Tests de charge de l'API")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="Serveur déjà lancé (ex. http://127.0.0.1:8000)")
+    target.add_argument(
+        "--launch", action="store_true", help="Lancer run_api.py pour le test"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=0, help="Workers pré-forkés avec --launch"
+    )
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=SCENARIOS, default=DEFAULT_SCENARIOS
+    )
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Poids par type de requête")
+    parser.add_argument("--replay", type=Path, help="Requêtes à rejouer (JSONL)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=5.0, help="Par scénario (s)")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Échauffement (s)")
+    parser.add_argument(
+        "--overload-factor",
+        type=float,
+        default=5.0,
+        help="Débit offert par overload, en multiple du débit de concurrent",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Résultats JSON")
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=DEFAULT_BASELINE,
+        help="Référence à comparer (ignorée si absente)",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Dégradation tolérée (0.25 = 25%%)",
+    )
+    parser.add_argument(
+        "--save-baseline", type=Path, help="Enregistrer les résultats comme référence"
+    )
+    args = parser.parse_args()
+
+    server, url = None, args.url
+    if args.launch:
+        port = _free_port()
+        print(f"🚀 Lancement de run_api.py sur le port {port}...")
+        server = launch_server(args.workers, port)
+        url = f"http://127.0.0.1:{port}"
+    target_name = url or "en processus"
+
+    print("🏋️ TESTS DE CHARGE")
+    print("=" * 100)
+    print(f"🎯 Cible: {target_name} - {args.duration:.0f}s par scénario")
+    try:
+        scenarios = asyncio.run(run_suite(args, url))
+    finally:
+        if server is not None:
+            stop_server(server)
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "target": "in_process" if url is None else ("launch" if server else "url"),
+            "workers": args.workers if server else None,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "config": {
+                "mix": args.mix,
+                "replay": str(args.replay) if args.replay else None,
+                "concurrency": args.concurrency,
+                "batch_size": args.batch_size,
+                "duration": args.duration,
+                "seed": args.seed,
+                "overload_factor": args.overload_factor,
+            },
+        },
+        "scenarios": scenarios,
+    }
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"💾 Résultats: {args.output}")
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(results, indent=2))
+        print(f"📌 Référence enregistrée: {args.save_baseline}")
+        return
+
+    if args.baseline and args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        if baseline["meta"]["target"] != results["meta"]["target"]:
+            print("⚠️  Référence mesurée sur une autre cible: comparaison indicative")
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"❌ Régressions (> {args.threshold:.0%}) face à {args.baseline}:")
+            for regression in regressions:
+                print(f"   - {regression}")
+            sys.exit(1)
+        print(f"✅ Aucune régression face à {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
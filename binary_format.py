@@ -0,0 +1,144 @@
+"""
+🔢 Formats binaires pour le scoring de service à service
+
+Deux formats d'entrée, choisis par ``Content-Type`` :
+- ``application/x-npy``: matrice ``.npy`` N×12 (colonnes dans l'ordre de
+  BASE_FEATURE_NAMES), vue directement sur le corps de la requête ;
+- ``application/vnd.apache.arrow.stream``: flux Arrow IPC avec une colonne
+  par caractéristique (nécessite ``pyarrow``, dépendance optionnelle).
+
+Les prix sont renvoyés en float64 selon ``Accept`` : ``.npy``, flux Arrow
+(colonne ``price``) ou tableau brut little-endian (``application/octet-stream``).
+"""
+
+import io
+from typing import Optional
+
+import numpy as np
+
+from features import BASE_FEATURE_NAMES
+
+NPY_MEDIA_TYPE = "application/x-npy"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+RAW_MEDIA_TYPE = "application/octet-stream"
+
+INPUT_MEDIA_TYPES = (NPY_MEDIA_TYPE, ARROW_MEDIA_TYPE)
+OUTPUT_MEDIA_TYPES = (NPY_MEDIA_TYPE, ARROW_MEDIA_TYPE, RAW_MEDIA_TYPE)
+
+
+class UnsupportedMediaType(ValueError):
+    """Format binaire inconnu ou non disponible (pyarrow absent)"""
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc  # noqa: F401
+    except ImportError:
+        raise UnsupportedMediaType(
+            f"{ARROW_MEDIA_TYPE} nécessite pyarrow (pip install pyarrow)"
+        )
+    return pyarrow
+
+
+def _media_type(header: Optional[str]) -> str:
+    return (header or "").split(";", 1)[0].strip().lower()
+
+
+def decode_npy(body: bytes) -> np.ndarray:
+    """Vue N×12 float64 sur un corps ``.npy`` (copie seulement si le dtype diffère)"""
+    stream = io.BytesIO(body)
+    try:
+        version = np.lib.format.read_magic(stream)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(stream)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(stream)
+    except ValueError as e:
+        raise ValueError(f"Fichier .npy invalide: {e}")
+
+    if len(shape) != 2 or shape[1] != len(BASE_FEATURE_NAMES):
+        raise ValueError(f"Matrice N×{len(BASE_FEATURE_NAMES)} attendue, reçu {shape}")
+    if dtype.hasobject or dtype.kind not in "biuf":
+        raise ValueError(f"Type numérique attendu, reçu {dtype}")
+
+    count = shape[0] * shape[1]
+    if len(body) - stream.tell() != count * dtype.itemsize:
+        raise ValueError("Taille des données .npy incohérente avec l'en-tête")
+
+    values = np.frombuffer(body, dtype=dtype, count=count, offset=stream.tell())
+    raw = values.reshape(shape, order="F" if fortran_order else "C")
+    return raw.astype(np.float64, copy=False)
+
+
+def decode_arrow(body: bytes) -> np.ndarray:
+    """Matrice N×12 float64 à partir d'un flux Arrow IPC (colonnes par nom)
+
+    Chaque colonne float64 sans valeur nulle est lue sans copie ; elles sont
+    ensuite rangées dans une seule matrice en ordre Fortran (une copie).
+    Une valeur nulle devient NaN, donc une ligne rejetée à la validation.
+    """
+    pa = _pyarrow()
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    except pa.ArrowInvalid as e:
+        raise ValueError(f"Flux Arrow invalide: {e}")
+
+    missing = [name for name in BASE_FEATURE_NAMES if name not in table.column_names]
+    if missing:
+        raise ValueError(f"Colonnes manquantes: {', '.join(missing)}")
+
+    raw = np.empty((len(BASE_FEATURE_NAMES), table.num_rows), dtype=np.float64).T
+    for column, name in enumerate(BASE_FEATURE_NAMES):
+        values = table.column(name)
+        if not pa.types.is_floating(values.type) and not pa.types.is_integer(
+            values.type
+        ):
+            raise ValueError(f"{name}: type numérique attendu, reçu {values.type}")
+        raw[:, column] = values.cast(pa.float64()).to_numpy(zero_copy_only=False)
+    return raw
+
+
+def decode_matrix(body: bytes, content_type: Optional[str]) -> np.ndarray:
+    """Décode le corps selon son ``Content-Type``"""
+    media_type = _media_type(content_type)
+    if media_type == NPY_MEDIA_TYPE:
+        return decode_npy(body)
+    if media_type == ARROW_MEDIA_TYPE:
+        return decode_arrow(body)
+    raise UnsupportedMediaType(
+        f"Content-Type attendu: {' ou '.join(INPUT_MEDIA_TYPES)}"
+    )
+
+
+def negotiate(accept: Optional[str], content_type: Optional[str]) -> str:
+    """Format de réponse: premier type accepté supporté, sinon celui de la requête"""
+    default = _media_type(content_type)
+    for part in (accept or "").split(","):
+        media_type = _media_type(part)
+        if media_type in OUTPUT_MEDIA_TYPES:
+            return media_type
+        if media_type in ("*/*", "application/*"):
+            return default
+    if not accept or not accept.strip():
+        return default
+    raise UnsupportedMediaType(f"Accept supportés: {', '.join(OUTPUT_MEDIA_TYPES)}")
+
+
+def encode_prices(prices: np.ndarray, media_type: str) -> bytes:
+    """Sérialise les prix float64 dans le format négocié"""
+    prices = np.ascontiguousarray(prices, dtype="<f8")
+    if media_type == NPY_MEDIA_TYPE:
+        stream = io.BytesIO()
+        np.lib.format.write_array(stream, prices, allow_pickle=False)
+        return stream.getvalue()
+    if media_type == ARROW_MEDIA_TYPE:
+        pa = _pyarrow()
+        table = pa.table({"price": pa.array(prices)})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+    if media_type == RAW_MEDIA_TYPE:
+        return prices.tobytes()
+    raise UnsupportedMediaType(f"Format de réponse inconnu: {media_type}")
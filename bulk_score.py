@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+📦 Scoring en masse de fichiers CSV / JSONL
+
+Le fichier d'entrée est lu par blocs de taille fixe ; chaque bloc est validé
+de façon vectorisée (règles de HouseFeatures) puis prédit par un pool de
+processus qui chargent chacun le modèle une seule fois. Les résultats sont
+écrits au fil de l'eau, dans l'ordre d'entrée : la mémoire reste constante
+quelle que soit la taille du fichier. La progression est enregistrée après
+chaque bloc dans ``<sortie>.progress`` (reprise avec ``--resume``).
+
+Usage:
+    python bulk_score.py listings.csv scored.csv --workers 8
+    python bulk_score.py snapshot.jsonl scored.jsonl --resume
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from features import BASE_FEATURE_NAMES
+from validation import validate_records
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 10000
+RESULT_FIELDS = ["price", "error"]
+
+# Prédicteur propre à chaque processus du pool
+_predictor = None
+
+
+def _load_predictor():
+    import warnings
+
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    import api
+
+    if api.predictor is None:
+        raise RuntimeError("Modèle non disponible")
+    return api.predictor
+
+
+def _init_worker():
+    """Charge le modèle une fois par processus (sans cache ni pool interne)"""
+    global _predictor
+
+    os.environ["PREDICTION_CACHE_SIZE"] = "0"
+    os.environ["INFERENCE_EXECUTOR"] = "inline"
+    os.environ["MICROBATCH_ENABLED"] = "0"
+    _predictor = _load_predictor()
+
+
+def score_records(records: List[Dict]) -> Tuple[np.ndarray, Dict[int, str]]:
+    """Valide et prédit un bloc: prix (NaN si invalide) et erreurs par ligne"""
+    global _predictor
+    if _predictor is None:
+        _predictor = _load_predictor()
+
+    raw, valid, errors = validate_records(records)
+    prices = np.full(len(records), np.nan)
+    if valid.any():
+        prices[valid] = _predictor.predict_prices(raw[valid])
+    return prices, errors
+
+
+def _file_format(path: Path) -> str:
+    return "jsonl" if path.suffix in (".jsonl", ".ndjson") else "csv"
+
+
+def read_chunks(
+    path: Path, chunk_size: int, skip_rows: int = 0
+) -> Iterator[List[Dict]]:
+    """Lit le fichier par blocs de ``chunk_size`` enregistrements"""
+    with open(path, "r", newline="") as f:
+        if _file_format(path) == "jsonl":
+            rows = (_parse_json_line(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+
+        chunk = []
+        for index, record in enumerate(rows):
+            if index < skip_rows:
+                continue
+            chunk.append(record)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def _parse_json_line(line: str) -> Dict:
+    try:
+        record = json.loads(line)
+    except json.JSONDecodeError:
+        return {}
+    return record if isinstance(record, dict) else {}
+
+
+def csv_fieldnames(path: Path) -> List[str]:
+    """Colonnes d'entrée d'un CSV (reprises telles quelles en sortie)"""
+    with open(path, "r", newline="") as f:
+        return next(csv.reader(f), [])
+
+
+class BulkScorer:
+    """Pipeline lecture → pool de processus → écriture ordonnée, avec reprise"""
+
+    def __init__(
+        self,
+        input_path,
+        output_path,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        workers: int = 0,
+        report_every: float = 5.0,
+    ):
+        self.input_path = Path(input_path)
+        self.output_path = Path(output_path)
+        self.progress_path = self.output_path.with_name(
+            self.output_path.name + ".progress"
+        )
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.report_every = report_every
+
+        self.rows = 0
+        self.valid = 0
+        self.invalid = 0
+
+    def _input_signature(self) -> Dict:
+        stat = self.input_path.stat()
+        return {
+            "input": str(self.input_path.resolve()),
+            "input_size": stat.st_size,
+            "input_mtime": stat.st_mtime,
+        }
+
+    def _load_progress(self) -> Optional[Dict]:
+        """Progression enregistrée, si elle concerne le même fichier d'entrée"""
+        if not self.progress_path.exists() or not self.output_path.exists():
+            return None
+        with open(self.progress_path, "r") as f:
+            progress = json.load(f)
+        signature = self._input_signature()
+        if any(progress.get(key) != value for key, value in signature.items()):
+            logger.warning("Progression ignorée: le fichier d'entrée a changé")
+            return None
+        return progress
+
+    def _save_progress(self, output_bytes: int, done: bool = False):
+        progress = {
+            **self._input_signature(),
+            "rows": self.rows,
+            "valid": self.valid,
+            "invalid": self.invalid,
+            "output_bytes": output_bytes,
+            "done": done,
+        }
+        tmp_path = self.progress_path.with_name(self.progress_path.name + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(progress, f)
+        tmp_path.replace(self.progress_path)
+
+    def run(self, resume: bool = False) -> Dict:
+        """Score tout le fichier (ou la partie restante avec ``resume``)"""
+        progress = self._load_progress() if resume else None
+        if progress is not None:
+            self.rows = progress["rows"]
+            self.valid = progress["valid"]
+            self.invalid = progress["invalid"]
+            # Un bloc écrit après le dernier point de reprise est réécrit
+            with open(self.output_path, "r+b") as f:
+                f.truncate(progress["output_bytes"])
+            if progress.get("done"):
+                return self.summary(0.0, self.rows)
+            logger.info(f"Reprise après {self.rows} lignes")
+
+        output_format = _file_format(self.output_path)
+        fieldnames = None
+        if output_format == "csv":
+            input_fields = (
+                csv_fieldnames(self.input_path)
+                if _file_format(self.input_path) == "csv"
+                else []
+            )
+            fieldnames = [name for name in input_fields if name not in RESULT_FIELDS]
+            if not fieldnames:
+                fieldnames = list(BASE_FEATURE_NAMES)
+            fieldnames += RESULT_FIELDS
+
+        start_rows = self.rows
+        start = last_report = time.perf_counter()
+        pool = None
+        if self.workers > 0:
+            pool = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker
+            )
+        # Blocs en vol bornés: la mémoire ne dépend pas de la taille du fichier
+        max_in_flight = max(2, 2 * self.workers)
+
+        # Sans reprise, la sortie existante est remplacée
+        mode = "a" if progress is not None else "w"
+        with open(self.output_path, mode, newline="") as out:
+            writer = None
+            if fieldnames is not None:
+                writer = csv.DictWriter(
+                    out, fieldnames=fieldnames, extrasaction="ignore"
+                )
+                if out.tell() == 0:
+                    writer.writeheader()
+
+            pending = deque()
+            chunks = read_chunks(self.input_path, self.chunk_size, skip_rows=self.rows)
+            try:
+                for records in chunks:
+                    pending.append((records, self._submit(pool, records)))
+                    while len(pending) >= max_in_flight:
+                        self._write(out, writer, *pending.popleft())
+                        last_report = self._report(start, start_rows, last_report)
+                while pending:
+                    self._write(out, writer, *pending.popleft())
+                    last_report = self._report(start, start_rows, last_report)
+            finally:
+                if pool is not None:
+                    pool.shutdown(cancel_futures=True)
+
+            out.flush()
+            self._save_progress(os.fstat(out.fileno()).st_size, done=True)
+
+        return self.summary(time.perf_counter() - start, self.rows - start_rows)
+
+    @staticmethod
+    def _submit(pool, records) -> Future:
+        if pool is not None:
+            return pool.submit(score_records, records)
+        future = Future()
+        future.set_result(score_records(records))
+        return future
+
+    def _write(self, out, writer, records: List[Dict], future: Future):
+        """Écrit un bloc terminé puis enregistre la progression"""
+        prices, errors = future.result()
+        for index, record in enumerate(records):
+            error = errors.get(index)
+            price = None if error else float(prices[index])
+            if writer is not None:
+                writer.writerow({**record, "price": price, "error": error})
+            else:
+                out.write(json.dumps({**record, "price": price, "error": error}) + "\n")
+
+        self.rows += len(records)
+        self.invalid += len(errors)
+        self.valid += len(records) - len(errors)
+        out.flush()
+        self._save_progress(os.fstat(out.fileno()).st_size)
+
+    def _report(self, start: float, start_rows: int, last_report: float) -> float:
+        now = time.perf_counter()
+        if now - last_report < self.report_every:
+            return last_report
+        rate = (self.rows - start_rows) / (now - start)
+        print(f"⏱️  {self.rows:,} lignes ({rate:,.0f} lignes/s)", file=sys.stderr)
+        return now
+
+    def summary(self, elapsed: float, scored_rows: int) -> Dict:
+        return {
+            "rows": self.rows,
+            "valid": self.valid,
+            "invalid": self.invalid,
+            "elapsed_seconds": elapsed,
+            "rows_per_second": scored_rows / elapsed if elapsed else 0.0,
+        }
+
+
+def main():
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(
+        description="📦 Scoring en masse de fichiers CSV / JSONL"
+    )
+    parser.add_argument("input", type=Path, help="Fichier d'entrée (.csv ou .jsonl)")
+    parser.add_argument("output", type=Path, help="Fichier de sortie (.csv ou .jsonl)")
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DEFAULT_CHUNK_SIZE,
+        help=f"Lignes par bloc (défaut: {DEFAULT_CHUNK_SIZE})",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Processus de scoring (0 = dans le processus courant)",
+    )
+    parser.add_argument(
+        "--resume", action="store_true", help="Reprendre après la dernière progression"
+    )
+    parser.add_argument(
+        "--report-every", type=float, default=5.0, help="Intervalle de rapport (s)"
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    scorer = BulkScorer(
+        args.input,
+        args.output,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        report_every=args.report_every,
+    )
+    summary = scorer.run(resume=args.resume)
+
+    print(
+        f"✅ {summary['rows']:,} lignes ({summary['valid']:,} valides, "
+        f"{summary['invalid']:,} invalides) - "
+        f"{summary['rows_per_second']:,.0f} lignes/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
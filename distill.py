@@ -0,0 +1,457 @@
+"""
+✂️ Modèles de service allégés : troncature et substitut compact
+
+À partir du modèle servi (le « professeur »), produit des candidats plus
+petits et les compare en précision et en latence d'inférence :
+
+- ``truncate``  : les ``k`` premiers étages du boosting, tels quels ;
+- ``surrogate`` : un GradientBoostingRegressor plus petit (moins d'arbres,
+  moins profonds, éventuellement limité aux features les plus importantes)
+  réentraîné sur les prédictions du professeur (distillation).
+
+Les données d'entraînement d'origine ne sont pas livrées avec le service :
+le substitut apprend sur des maisons tirées dans les bornes de
+HouseFeatures (ou lues dans ``--input``), et la précision de chaque candidat
+est d'abord sa fidélité au professeur (RMSE et MAPE de ses prix face à ceux
+du professeur, sur des maisons jamais vues). Avec ``--data`` (maisons
+étiquetées, colonne ``price``), RMSE et MAPE sont aussi mesurées sur les
+prix réels, à comparer aux métriques de test enregistrées du professeur.
+
+Le candidat retenu est le plus rapide (sur un lot) dont la fidélité MAPE ne dépasse pas
+``--max-mape``. Avec ``--save``, il est écrit dans ``models/`` avec ses
+métadonnées (``best_model_<nom>.pkl``, ``model_metadata_<nom>.json``) sans
+devenir actif : la version servie est épinglée dans le registre, la mise en
+service passe par ``python model_registry.py promote <version>``.
+
+Usage:
+    python distill.py                                  # rapport seul
+    python distill.py --data housing_test.csv --report distill_report.json
+    python distill.py --max-mape 1.0 --save --name gradient_boosting_compact
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import logging
+import pickle
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor
+
+from features import FeaturePlan, read_houses, sample_raw_features
+from model_registry import METADATA_PREFIX, MODEL_PREFIX, ModelRegistry
+from tree_engine import FlatTreeEnsemble
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STAGES = [25, 50, 100, 150]
+# (arbres, profondeur, features retenues ; None = toutes)
+DEFAULT_SURROGATES = [(50, 4, None), (100, 3, None), (50, 4, 8), (30, 5, 8)]
+DEFAULT_TRAIN_ROWS = 20000
+DEFAULT_TEST_ROWS = 5000
+BATCH_ROWS = 1000
+
+
+def truncate(model, n_stages: int):
+    """Copie de ``model`` limitée à ses ``n_stages`` premiers étages"""
+    if not 1 <= n_stages <= len(model.estimators_):
+        raise ValueError(
+            f"n_stages doit être entre 1 et {len(model.estimators_)}, reçu {n_stages}"
+        )
+    truncated = copy.copy(model)
+    truncated.estimators_ = model.estimators_[:n_stages]
+    truncated.train_score_ = model.train_score_[:n_stages]
+    truncated.n_estimators = n_stages
+    if hasattr(model, "oob_improvement_"):
+        truncated.oob_improvement_ = model.oob_improvement_[:n_stages]
+    return truncated
+
+
+def top_features(model, feature_names: List[str], X: np.ndarray, k: int) -> List[str]:
+    """Les ``k`` features les plus importantes qui varient réellement sur ``X``
+
+    Une feature constante au service (``price_per_sqft``, toujours nulle) peut
+    avoir pesé à l'entraînement : elle n'apporte rien au substitut.
+    """
+    varying = X.max(axis=0) > X.min(axis=0)
+    ranked = np.argsort(-model.feature_importances_, kind="stable")
+    selected = [i for i in ranked if varying[i]][:k]
+    # Ordre d'origine des colonnes (plan de features plus lisible)
+    return [feature_names[i] for i in sorted(selected)]
+
+
+def fit_surrogate(
+    raw: np.ndarray,
+    target: np.ndarray,
+    feature_names: List[str],
+    n_estimators: int,
+    max_depth: int,
+    learning_rate: float = 0.1,
+    random_state: int = 0,
+) -> GradientBoostingRegressor:
+    """Substitut entraîné sur les prix du professeur (maisons brutes N×12)"""
+    model = GradientBoostingRegressor(
+        n_estimators=n_estimators,
+        max_depth=max_depth,
+        learning_rate=learning_rate,
+        subsample=0.9,
+        random_state=random_state,
+    )
+    model.fit(FeaturePlan(feature_names).transform(raw), target)
+    return model
+
+
+def error_metrics(predicted: np.ndarray, reference: np.ndarray) -> Dict[str, float]:
+    """RMSE et MAPE (%) de ``predicted`` face à ``reference``"""
+    errors = predicted - reference
+    return {
+        "rmse": float(np.sqrt(np.mean(errors**2))),
+        "mape": float(np.mean(np.abs(errors) / np.abs(reference)) * 100),
+    }
+
+
+def _median_time(func, repeat: int = 7, number: int = 20) -> float:
+    func()  # Échauffement
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return sorted(samples)[len(samples) // 2]
+
+
+def measure_latency(model, plan: FeaturePlan, raw: np.ndarray) -> Dict[str, float]:
+    """Latence d'inférence (feature engineering inclus) des moteurs du service"""
+    one = raw[:1]
+    batch = raw[:BATCH_ROWS]
+    flat = FlatTreeEnsemble.from_sklearn(model)
+    return {
+        "single_us": _median_time(lambda: model.predict(plan.transform(one))) * 1e6,
+        "single_flat_us": _median_time(lambda: flat.predict(plan.transform(one))) * 1e6,
+        "batch_ms": _median_time(lambda: model.predict(plan.transform(batch)), number=3)
+        * 1e3,
+    }
+
+
+class Distiller:
+    """Construit, évalue et enregistre les candidats allégés d'un modèle"""
+
+    def __init__(
+        self,
+        teacher,
+        feature_names: List[str],
+        metadata: Optional[Dict] = None,
+        train_raw: Optional[np.ndarray] = None,
+        test_raw: Optional[np.ndarray] = None,
+        seed: int = 0,
+    ):
+        self.teacher = teacher
+        self.feature_names = list(feature_names)
+        self.metadata = metadata or {}
+        self.plan = FeaturePlan(self.feature_names)
+        self.seed = seed
+
+        if train_raw is None:
+            train_raw = sample_raw_features(DEFAULT_TRAIN_ROWS, seed=seed)
+        if test_raw is None:
+            test_raw = sample_raw_features(DEFAULT_TEST_ROWS, seed=seed + 1)
+        self.train_raw = train_raw
+        self.test_raw = test_raw
+        self.train_target = teacher.predict(self.plan.transform(train_raw))
+        self.test_target = teacher.predict(self.plan.transform(test_raw))
+        self.candidates: Dict[str, Dict] = {}
+
+    def add_truncations(self, stages: List[int] = DEFAULT_STAGES):
+        for n_stages in stages:
+            if n_stages >= len(self.teacher.estimators_):
+                continue
+            self.candidates[f"truncate_{n_stages}"] = {
+                "method": "truncate",
+                "model": truncate(self.teacher, n_stages),
+                "feature_names": self.feature_names,
+                "params": {"n_stages": n_stages},
+            }
+
+    def add_surrogates(self, configs=DEFAULT_SURROGATES):
+        X = self.plan.transform(self.train_raw)
+        for n_estimators, max_depth, k in configs:
+            names = self.feature_names
+            if k is not None:
+                names = top_features(self.teacher, self.feature_names, X, k)
+            name = f"surrogate_{n_estimators}x{max_depth}"
+            if k is not None:
+                name += f"_top{k}"
+            self.candidates[name] = {
+                "method": "surrogate",
+                "model": fit_surrogate(
+                    self.train_raw,
+                    self.train_target,
+                    names,
+                    n_estimators,
+                    max_depth,
+                    random_state=self.seed,
+                ),
+                "feature_names": names,
+                "params": {
+                    "n_estimators": n_estimators,
+                    "max_depth": max_depth,
+                    "top_features": k,
+                },
+            }
+
+    def _evaluate(
+        self, model, feature_names: List[str], labeled: Optional[Tuple]
+    ) -> Dict:
+        plan = FeaturePlan(feature_names)
+        entry = {
+            "n_trees": int(len(model.estimators_)),
+            "max_depth": int(max(e.tree_.max_depth for e in model.estimators_[:, 0])),
+            "n_features": len(feature_names),
+            "fidelity": error_metrics(
+                model.predict(plan.transform(self.test_raw)), self.test_target
+            ),
+            "latency": measure_latency(model, plan, self.test_raw),
+        }
+        if labeled is not None:
+            raw, prices = labeled
+            entry["test"] = error_metrics(model.predict(plan.transform(raw)), prices)
+        return entry
+
+    def report(self, labeled: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Dict:
+        """Précision et latence du professeur et de chaque candidat"""
+        teacher = self._evaluate(self.teacher, self.feature_names, labeled)
+        teacher["stored"] = {
+            key: self.metadata.get("performance", {}).get(f"test_{key}")
+            for key in ("rmse", "mape")
+        }
+        base = teacher["latency"]["batch_ms"]
+
+        candidates = {}
+        for name, candidate in self.candidates.items():
+            entry = self._evaluate(
+                candidate["model"], candidate["feature_names"], labeled
+            )
+            entry["method"] = candidate["method"]
+            entry["params"] = candidate["params"]
+            entry["speedup"] = base / entry["latency"]["batch_ms"]
+            candidates[name] = entry
+
+        return {
+            "teacher": teacher,
+            "candidates": candidates,
+            "train_rows": len(self.train_raw),
+            "test_rows": len(self.test_raw),
+            "labeled_rows": len(labeled[0]) if labeled is not None else 0,
+        }
+
+    @staticmethod
+    def choose(report: Dict, max_mape: float) -> Optional[str]:
+        """Candidat le plus rapide dont la fidélité MAPE reste sous ``max_mape``
+
+        La latence d'un lot sert de critère : à une ligne, le surcoût fixe de
+        scikit-learn domine et masque la taille du modèle.
+        """
+        eligible = [
+            (entry["latency"]["batch_ms"], name)
+            for name, entry in report["candidates"].items()
+            if entry["fidelity"]["mape"] <= max_mape
+        ]
+        return min(eligible)[1] if eligible else None
+
+    def save(
+        self, name: str, candidate_name: str, report: Dict, models_path="models"
+    ) -> Tuple[Path, str]:
+        """Écrit le candidat et ses métadonnées; renvoie le fichier et sa version
+
+        La version servie jusque-là est épinglée dans le registre : le nouveau
+        fichier, plus récent, ne devient pas actif sans promotion explicite.
+        """
+        models_path = Path(models_path)
+        registry = ModelRegistry(models_path)
+        teacher_version = registry.active_version()
+        if registry._read_state().get("active") is None:
+            registry.promote(teacher_version.version)
+
+        candidate = self.candidates[candidate_name]
+        entry = report["candidates"][candidate_name]
+        model = candidate["model"]
+        model_bytes = pickle.dumps(model)
+
+        performance = {
+            "fidelity_rmse": entry["fidelity"]["rmse"],
+            "fidelity_mape": entry["fidelity"]["mape"],
+        }
+        if "test" in entry:
+            performance["test_rmse"] = entry["test"]["rmse"]
+            performance["test_mape"] = entry["test"]["mape"]
+
+        model_file = models_path / f"{MODEL_PREFIX}{name}.pkl"
+        metadata = {
+            "model_info": {
+                "name": name,
+                "type": type(model).__name__,
+                "training_date": datetime.now().isoformat(),
+                "filename": model_file.name,
+                "distilled_from": teacher_version.version,
+                "method": candidate["method"],
+            },
+            "performance": performance,
+            "hyperparameters": {
+                key: value
+                for key, value in model.get_params().items()
+                if key in ("n_estimators", "max_depth", "learning_rate", "subsample")
+            },
+            "data_info": {
+                "features_count": len(candidate["feature_names"]),
+                "feature_names": candidate["feature_names"],
+                "train_samples": len(self.train_raw),
+                "test_samples": len(self.test_raw),
+            },
+            "distillation": {
+                "params": candidate["params"],
+                "latency": entry["latency"],
+                "teacher_latency": report["teacher"]["latency"],
+            },
+            "feature_importance": [
+                {"feature": feature, "importance": float(importance)}
+                for feature, importance in sorted(
+                    zip(candidate["feature_names"], model.feature_importances_),
+                    key=lambda item: -item[1],
+                )
+            ],
+        }
+
+        model_file.write_bytes(model_bytes)
+        metadata_file = models_path / f"{METADATA_PREFIX}{name}.json"
+        with open(metadata_file, "w") as f:
+            json.dump(metadata, f, indent=2, ensure_ascii=False)
+
+        version = hashlib.sha256(model_bytes).hexdigest()[:16]
+        logger.info(f"Candidat {candidate_name} écrit: {model_file} ({version})")
+        return model_file, version
+
+
+def print_report(report: Dict, chosen: Optional[str]):
+    teacher = report["teacher"]
+    labeled = report["labeled_rows"] > 0
+
+    header = (
+        f"{'candidat':>22} | {'arbres':>6} | {'prof.':>5} | {'feat.':>5} | "
+        f"{'fid. RMSE':>10} | {'fid. MAPE':>9} | {'1 ligne':>9} | "
+        f"{'aplati':>9} | {f'{BATCH_ROWS} lignes':>11} | {'gain':>5}"
+    )
+    if labeled:
+        header += f" | {'RMSE test':>10} | {'MAPE test':>9}"
+    print(header)
+    print("-" * len(header))
+
+    rows = [("professeur", teacher)] + list(report["candidates"].items())
+    for name, entry in rows:
+        marker = "👉" if name == chosen else "  "
+        latency = entry["latency"]
+        line = (
+            f"{marker}{name:>20} | {entry['n_trees']:>6} | {entry['max_depth']:>5} | "
+            f"{entry['n_features']:>5} | {entry['fidelity']['rmse']:>10,.0f} | "
+            f"{entry['fidelity']['mape']:>8.2f}% | "
+            f"{latency['single_us']:>6.0f} µs | {latency['single_flat_us']:>6.0f} µs | "
+            f"{latency['batch_ms']:>8.2f} ms | x{entry.get('speedup', 1.0):>4.1f}"
+        )
+        if labeled:
+            line += (
+                f" | {entry['test']['rmse']:>10,.0f} | {entry['test']['mape']:>8.2f}%"
+            )
+        print(line)
+
+    stored = teacher["stored"]
+    if stored["rmse"] is not None:
+        print(
+            f"📊 Métriques de test enregistrées du professeur: "
+            f"RMSE {stored['rmse']:,.0f} - MAPE {stored['mape']:.2f}%"
+        )
+
+
+def main():
+    """Fonction principale"""
+    import warnings
+
+    from api import HousePricePredictor
+
+    parser = argparse.ArgumentParser(
+        description="✂️ Distillation et troncature du modèle servi"
+    )
+    parser.add_argument("--input", type=Path, help="Maisons CSV/JSONL d'entraînement")
+    parser.add_argument(
+        "--data", type=Path, help="Maisons étiquetées (colonne price) pour le test"
+    )
+    parser.add_argument(
+        "--stages", type=int, nargs="*", default=DEFAULT_STAGES, help="Troncatures"
+    )
+    parser.add_argument(
+        "--max-mape",
+        type=float,
+        default=1.0,
+        help="Écart moyen maximal au professeur, en %% (défaut: 1.0)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--report", type=Path, help="Rapport JSON")
+    parser.add_argument(
+        "--save", action="store_true", help="Écrire le candidat retenu dans models/"
+    )
+    parser.add_argument(
+        "--name",
+        default="gradient_boosting_compact",
+        help="Nom du modèle écrit (best_model_<nom>.pkl)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    predictor = HousePricePredictor()
+    train_raw = read_houses(args.input) if args.input else None
+    labeled = read_houses(args.data, with_price=True) if args.data else None
+
+    print("✂️ DISTILLATION DU MODÈLE SERVI")
+    print("=" * 60)
+    start = time.perf_counter()
+    distiller = Distiller(
+        predictor.model,
+        predictor.feature_names,
+        predictor.model_info,
+        train_raw=train_raw,
+        seed=args.seed,
+    )
+    distiller.add_truncations(args.stages)
+    distiller.add_surrogates()
+    report = distiller.report(labeled)
+    chosen = Distiller.choose(report, args.max_mape)
+    report["chosen"] = chosen
+    report["max_mape"] = args.max_mape
+    print(
+        f"⏱️ {len(distiller.candidates)} candidats en {time.perf_counter() - start:.1f}s"
+    )
+
+    print_report(report, chosen)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Rapport écrit: {args.report}")
+
+    if chosen is None:
+        print(f"❌ Aucun candidat sous {args.max_mape}% d'écart au professeur")
+        raise SystemExit(1)
+    print(f"👉 Candidat retenu: {chosen}")
+    if args.save:
+        model_file, version = distiller.save(args.name, chosen, report)
+        print(f"💾 Modèle écrit: {model_file}")
+        print(f"💡 Mise en service: python model_registry.py promote {version}")
+
+
+if __name__ == "__main__":
+    main()
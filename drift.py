@@ -0,0 +1,396 @@
+"""
+📡 Surveillance en ligne de la dérive des entrées et des prix prédits
+
+Chaque ligne prédite met à jour une esquisse de taille fixe, préallouée au
+démarrage (``DriftSketch``) :
+
+- ``area`` et le prix prédit : compteurs par intervalle logarithmique de
+  rapport ``(1 + a) / (1 - a)`` sur une plage bornée (les valeurs hors plage
+  comptent dans l'intervalle extrême). C'est à la fois un histogramme et une
+  esquisse de quantiles à précision relative ``a`` (1 %, à la DDSketch) ;
+- les autres champs (entiers bornés par HouseFeatures) : un compteur par
+  valeur.
+
+Tous les compteurs tiennent dans un seul tableau : la mise à jour d'une ligne
+coûte O(1) et se fait par blocs de ``CHUNK_ROWS`` lignes dans des tampons
+préalloués (aucune allocation proportionnelle à la requête). Deux esquisses
+de même plage se fusionnent en additionnant leurs compteurs : les workers
+publient la leur avec leurs métriques (``METRICS_DIR``) et ``/drift``
+fusionne celles des workers actifs. Chaque worker amortit périodiquement ses
+compteurs (demi-vie ``DRIFT_HALF_LIFE``) pour refléter le trafic récent ;
+l'esquisse d'un worker arrêté, qui ne l'est plus, est écartée avec son
+fichier de métriques.
+Au changement de version servie, les compteurs des entrées sont conservés ;
+seuls ceux du prix, propres à l'ancien modèle, repartent de zéro.
+
+La référence est l'esquisse des maisons d'entraînement et de leurs prix
+prédits, écrite à côté des métadonnées du modèle
+(``models/drift_baseline_<nom>.json``) par :
+
+    python drift.py --input housing_train.csv
+
+Chaque champ reçoit un PSI (Population Stability Index, sur les valeurs ou
+sur 10 intervalles d'effectif égal dans la référence) et, pour ``area`` et
+le prix, la distance de Kolmogorov-Smirnov entre les deux répartitions.
+"""
+
+import argparse
+import json
+import logging
+import math
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from features import AREA, BASE_FEATURE_NAMES, RAW_FEATURE_BOUNDS
+from model_registry import METADATA_PREFIX
+
+logger = logging.getLogger(__name__)
+
+BASELINE_PREFIX = "drift_baseline_"
+
+RELATIVE_ACCURACY = 0.01
+PRICE_RANGE = (1e5, 1e8)
+# Lignes traitées par bloc (taille des tampons préalloués)
+CHUNK_ROWS = 256
+
+DISCRETE_FIELDS = [name for name in BASE_FEATURE_NAMES if name != "area"]
+CONTINUOUS_FIELDS = ["area", "price"]
+REPORTED_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+# Seuils usuels du PSI: stable / dérive modérée / dérive forte
+PSI_MODERATE = 0.1
+PSI_SIGNIFICANT = 0.25
+PSI_BINS = 10
+# Part minimale d'un intervalle (évite log(0) pour les valeurs jamais vues)
+PSI_EPSILON = 1e-4
+
+
+class DriftSketch:
+    """Compteurs fusionnables de taille fixe pour les 12 champs et le prix"""
+
+    def __init__(self, relative_accuracy: float = RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._inv_log_gamma = 1 / math.log(gamma)
+        self.gamma = gamma
+
+        # Disposition du tableau: un segment par champ, [début, fin)
+        self.segments: Dict[str, tuple] = {}
+        offset = 0
+        # Colonne d'entrée, décalage, minimum et maximum (indices bruts) par champ
+        columns, offsets, lows, highs = [], [], [], []
+        for name in DISCRETE_FIELDS:
+            low, high = RAW_FEATURE_BOUNDS[name]
+            columns.append(BASE_FEATURE_NAMES.index(name))
+            offsets.append(offset - low)
+            lows.append(low)
+            highs.append(high)
+            self.segments[name] = (offset, offset + high - low + 1)
+            offset += high - low + 1
+
+        self._log_index_low = {}
+        for name, (low, high) in (
+            ("area", RAW_FEATURE_BOUNDS["area"]),
+            ("price", PRICE_RANGE),
+        ):
+            first, last = self._log_index(low), self._log_index(high)
+            self._log_index_low[name] = first
+            offsets.append(offset - first)
+            lows.append(first)
+            highs.append(last)
+            self.segments[name] = (offset, offset + last - first + 1)
+            offset += last - first + 1
+
+        self.counts = np.zeros(offset)
+        self._columns = np.array(columns + [AREA])
+        self._offsets = np.array(offsets, dtype=np.float64)
+        self._lows = np.array(lows, dtype=np.float64)
+        self._highs = np.array(highs, dtype=np.float64)
+
+        # Tampons des mises à jour: colonnes discrètes, log(area), log(prix)
+        n_columns = len(offsets)
+        self._values = np.empty((CHUNK_ROWS, n_columns))
+        self._indices = np.empty((CHUNK_ROWS, n_columns), dtype=np.intp)
+        self._continuous = self._values[:, len(DISCRETE_FIELDS) :]
+        # Tampons partagés par les threads de l'exécuteur d'inférence
+        self._lock = threading.Lock()
+
+    def _log_index(self, value: float) -> int:
+        return math.ceil(math.log(value) * self._inv_log_gamma)
+
+    def update(self, raw: np.ndarray, prices: np.ndarray):
+        """Ajoute des lignes brutes N×12 validées et leurs prix prédits"""
+        with self._lock:
+            for start in range(0, len(raw), CHUNK_ROWS):
+                stop = min(start + CHUNK_ROWS, len(raw))
+                self._update_chunk(raw[start:stop], prices[start:stop])
+
+    def _update_chunk(self, raw: np.ndarray, prices: np.ndarray):
+        n_rows = len(raw)
+        values = self._values[:n_rows]
+        indices = self._indices[:n_rows]
+        continuous = self._continuous[:n_rows]
+
+        np.take(raw, self._columns, axis=1, out=values[:, :-1])
+        values[:, -1] = prices
+        # Indice logarithmique: ceil(log(x) / log(gamma))
+        np.log(continuous, out=continuous)
+        np.multiply(continuous, self._inv_log_gamma, out=continuous)
+        np.ceil(continuous, out=continuous)
+        np.clip(values, self._lows, self._highs, out=values)
+        np.add(values, self._offsets, out=values)
+        np.copyto(indices, values, casting="unsafe")
+        np.add.at(self.counts, indices.reshape(-1), 1.0)
+
+    @property
+    def n_rows(self) -> float:
+        start, stop = self.segments["area"]
+        return float(self.counts[start:stop].sum())
+
+    def reset_field(self, name: str):
+        """Remet à zéro les compteurs d'un champ"""
+        start, stop = self.segments[name]
+        with self._lock:
+            self.counts[start:stop] = 0.0
+
+    def decay(self, factor: float):
+        """Amortit tous les compteurs (les lignes anciennes pèsent moins)"""
+        with self._lock:
+            self.counts *= factor
+
+    def merge(self, other: "DriftSketch"):
+        """Ajoute les compteurs d'une esquisse de même disposition"""
+        if other.counts.shape != self.counts.shape:
+            raise ValueError("Esquisses de dispositions différentes")
+        self.counts += other.counts
+
+    def field_counts(self, name: str) -> np.ndarray:
+        start, stop = self.segments[name]
+        return self.counts[start:stop]
+
+    def quantiles(self, name: str, qs=REPORTED_QUANTILES) -> Optional[List[float]]:
+        """Quantiles d'un champ continu (précision relative ``relative_accuracy``)"""
+        counts = self.field_counts(name)
+        total = counts.sum()
+        if total <= 0:
+            return None
+        cumulative = np.cumsum(counts)
+        bins = np.searchsorted(cumulative, np.asarray(qs) * total, side="left")
+        bins = np.minimum(bins, len(counts) - 1)
+        first = self._log_index_low[name]
+        # Valeur représentative de l'intervalle (gamma**(i-1), gamma**i]
+        return (2 * self.gamma ** (first + bins) / (self.gamma + 1)).tolist()
+
+    def to_dict(self) -> Dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "counts": self.counts.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DriftSketch":
+        sketch = cls(data["relative_accuracy"])
+        counts = np.asarray(data["counts"], dtype=np.float64)
+        if counts.shape != sketch.counts.shape:
+            raise ValueError("Esquisse de disposition différente")
+        sketch.counts[:] = counts
+        return sketch
+
+
+def _psi(expected: np.ndarray, actual: np.ndarray) -> float:
+    expected = np.maximum(expected / expected.sum(), PSI_EPSILON)
+    actual = np.maximum(actual / actual.sum(), PSI_EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def _status(psi: float) -> str:
+    if psi >= PSI_SIGNIFICANT:
+        return "significative"
+    if psi >= PSI_MODERATE:
+        return "modérée"
+    return "stable"
+
+
+def compare_field(name: str, live: DriftSketch, baseline: DriftSketch) -> Dict:
+    """PSI (et KS, quantiles pour les champs continus) d'un champ"""
+    actual, expected = live.field_counts(name), baseline.field_counts(name)
+    if name in DISCRETE_FIELDS:
+        psi = _psi(expected, actual)
+        return {
+            "psi": psi,
+            "status": _status(psi),
+            "live": (actual / actual.sum()).tolist(),
+            "baseline": (expected / expected.sum()).tolist(),
+        }
+
+    # Intervalles fins regroupés en PSI_BINS groupes d'effectif égal (référence)
+    expected_cdf = np.cumsum(expected) / expected.sum()
+    actual_cdf = np.cumsum(actual) / actual.sum()
+    cuts = np.unique(
+        np.searchsorted(expected_cdf, np.arange(1, PSI_BINS) / PSI_BINS) + 1
+    )
+    psi = _psi(
+        np.add.reduceat(expected, np.r_[0, cuts[cuts < len(expected)]]),
+        np.add.reduceat(actual, np.r_[0, cuts[cuts < len(actual)]]),
+    )
+    return {
+        "psi": psi,
+        "ks": float(np.max(np.abs(actual_cdf - expected_cdf))),
+        "status": _status(psi),
+        "live_quantiles": live.quantiles(name),
+        "baseline_quantiles": baseline.quantiles(name),
+    }
+
+
+def drift_report(live: DriftSketch, baseline: Optional[DriftSketch]) -> Dict:
+    """Scores de dérive de chaque champ (vide tant que rien n'est observé)"""
+    report = {
+        "rows": live.n_rows,
+        "baseline_rows": baseline.n_rows if baseline is not None else None,
+        "quantiles": list(REPORTED_QUANTILES),
+        "fields": {},
+        "drifted": [],
+    }
+    if baseline is None or live.n_rows <= 0 or baseline.n_rows <= 0:
+        return report
+
+    for name in CONTINUOUS_FIELDS + DISCRETE_FIELDS:
+        # Prix remis à zéro au changement de version: rien à comparer encore
+        if live.field_counts(name).sum() > 0:
+            report["fields"][name] = compare_field(name, live, baseline)
+    report["drifted"] = [
+        name
+        for name, field in report["fields"].items()
+        if field["psi"] >= PSI_SIGNIFICANT
+    ]
+    report["max_psi"] = max(field["psi"] for field in report["fields"].values())
+    return report
+
+
+def baseline_path(metadata_file: Path) -> Path:
+    """``model_metadata_<nom>.json`` -> ``drift_baseline_<nom>.json``"""
+    name = metadata_file.stem[len(METADATA_PREFIX) :]
+    return metadata_file.with_name(f"{BASELINE_PREFIX}{name}.json")
+
+
+def load_baseline(path: Path) -> Optional[DriftSketch]:
+    """Esquisse de référence, None si absente ou illisible"""
+    try:
+        with open(path) as f:
+            return DriftSketch.from_dict(json.load(f)["sketch"])
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Référence de dérive {path.name} illisible: {e}")
+        return None
+
+
+def write_baseline(
+    path: Path, raw: np.ndarray, prices: np.ndarray, source: str
+) -> DriftSketch:
+    """Écrit l'esquisse des maisons d'entraînement et de leurs prix prédits"""
+    sketch = DriftSketch()
+    sketch.update(raw, prices)
+    with open(path, "w") as f:
+        json.dump(
+            {
+                "created": datetime.now().isoformat(),
+                "source": source,
+                "rows": len(raw),
+                "sketch": sketch.to_dict(),
+            },
+            f,
+        )
+    return sketch
+
+
+class DriftMonitor:
+    """Esquisse du trafic d'un worker et comparaison à la référence du modèle"""
+
+    def __init__(self, baseline: Optional[DriftSketch] = None):
+        self.sketch = DriftSketch()
+        self.baseline = baseline
+
+    def observe(self, raw: np.ndarray, prices: np.ndarray):
+        self.sketch.update(raw, prices)
+
+    def carry_over(self, previous: "DriftMonitor"):
+        """Reprend le trafic observé par le moniteur d'une version remplacée
+
+        Les entrées restent comparables à la nouvelle référence ; les prix,
+        prédits par l'ancien modèle, ne le sont pas et repartent de zéro.
+        """
+        with previous.sketch._lock:
+            counts = previous.sketch.counts.copy()
+        with self.sketch._lock:
+            self.sketch.counts[:] = counts
+        self.sketch.reset_field("price")
+
+    def check(self, sketches: List[Dict], decay: float = 1.0) -> Dict:
+        """Compare l'esquisse fusionnée de tous les workers à la référence
+
+        ``sketches`` contient les esquisses publiées par les autres workers
+        (``to_dict``) ; les compteurs locaux sont ensuite amortis de ``decay``.
+        """
+        merged = DriftSketch(self.sketch.relative_accuracy)
+        merged.merge(self.sketch)
+        for data in sketches:
+            try:
+                merged.merge(DriftSketch.from_dict(data))
+            except (ValueError, KeyError):
+                continue
+        report = drift_report(merged, self.baseline)
+        report["time"] = datetime.now().isoformat()
+        if decay != 1.0:
+            self.sketch.decay(decay)
+        return report
+
+
+def main():
+    """Fonction principale"""
+    import warnings
+
+    from api import HousePricePredictor
+    from features import read_houses, sample_raw_features
+
+    parser = argparse.ArgumentParser(
+        description="📡 Référence de dérive du modèle actif"
+    )
+    parser.add_argument("--input", type=Path, help="Maisons CSV/JSONL d'entraînement")
+    parser.add_argument(
+        "--sample",
+        type=int,
+        default=0,
+        help="Sans --input: maisons tirées dans les bornes de HouseFeatures",
+    )
+    args = parser.parse_args()
+    if args.input is None and not args.sample:
+        parser.error("--input (ou --sample N) est requis")
+
+    logging.basicConfig(level=logging.WARNING)
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    predictor = HousePricePredictor()
+    if predictor.version is None or predictor.version.metadata_file is None:
+        parser.error("Le modèle actif n'a pas de fichier de métadonnées")
+
+    if args.input is not None:
+        raw, source = read_houses(args.input), args.input.name
+    else:
+        raw, source = sample_raw_features(args.sample, seed=0), "sample"
+    prices = predictor.predict_prices(raw)
+
+    path = baseline_path(predictor.version.metadata_file)
+    sketch = write_baseline(path, raw, prices, source)
+    print(f"📡 Référence écrite: {path} ({len(raw)} maisons)")
+    for name in CONTINUOUS_FIELDS:
+        quantiles = ", ".join(f"{value:,.0f}" for value in sketch.quantiles(name))
+        print(f"   {name:>6} p5-p95: {quantiles}")
+
+
+if __name__ == "__main__":
+    main()
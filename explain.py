@@ -0,0 +1,323 @@
+"""
+🔍 Contributions exactes par feature pour l'ensemble d'arbres (TreeSHAP)
+
+Valeurs de Shapley « path-dependent » de TreeSHAP, calculées feuille par
+feuille. L'espérance conditionnelle de l'arbre pour un sous-ensemble S de
+features est une somme sur les feuilles ; le terme d'une feuille ne dépend
+que des features de son chemin (au plus ``depth``, 4 ici), chacune valant
+``o`` (1 si la ligne suit le chemin sur cette feature, 0 sinon) si elle est
+dans S, ``z`` (part de couverture du chemin) sinon. Par linéarité, la valeur
+de Shapley d'une feature est la somme des valeurs de Shapley de ces petits
+jeux à au plus ``depth`` joueurs. Leurs coefficients sont précalculés au
+chargement pour chaque feuille, chaque position sur le chemin et chacun des
+``2**depth`` sous-ensembles ; une explication se réduit alors à des
+comparaisons et à une contraction de tenseurs NumPy sur toutes les feuilles
+de tous les arbres à la fois.
+
+Les contributions vérifient ``base_value + somme = prédiction``. Celles des
+features dérivées (``luxury_area_interaction``, ``area_per_room``...) sont
+ensuite réparties sur les 12 caractéristiques brutes (cf. ``raw_shares``).
+"""
+
+from math import factorial
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from features import (
+    AIRCONDITIONING,
+    AREA,
+    BASE_FEATURE_NAMES,
+    BASEMENT,
+    BATHROOMS,
+    BEDROOMS,
+    GUESTROOM,
+    PARKING,
+    PREFAREA,
+)
+
+# Lignes expliquées ensemble (tableaux intermédiaires lignes × feuilles × depth)
+DEFAULT_CHUNK_SIZE = 64
+
+# Composantes de luxury_score et leur coefficient
+LUXURY_COMPONENTS = {
+    PARKING: 0.5,
+    AIRCONDITIONING: 1.0,
+    PREFAREA: 1.0,
+    GUESTROOM: 1.0,
+    BASEMENT: 1.0,
+}
+
+
+class TreeExplainer:
+    """Valeurs de Shapley exactes d'un GradientBoostingRegressor, vectorisées"""
+
+    def __init__(self, model):
+        if not self.supports(model):
+            raise TypeError(f"Modèle non supporté: {type(model).__name__}")
+
+        estimators = model.estimators_
+        self.n_features = int(model.n_features_in_)
+        leaves = []
+        for estimator in estimators[:, 0]:
+            leaves.extend(_leaf_paths(estimator.tree_, model.learning_rate))
+        self.depth = max(1, max(len(path) for _, path in leaves))
+        self._compile(leaves)
+
+        if isinstance(model.init_, str) and model.init_ == "zero":
+            init = 0.0
+        else:
+            init = float(
+                np.ravel(model.init_.predict(np.zeros((1, self.n_features))))[0]
+            )
+        # Espérance du modèle: somme des feuilles pondérées par leur couverture
+        self.base_value = init + float(
+            np.sum(self.leaf_value * np.prod(self.path_zero, axis=1))
+        )
+
+    @staticmethod
+    def supports(model) -> bool:
+        """Ensemble d'arbres de régression scikit-learn (une sortie)"""
+        estimators = getattr(model, "estimators_", None)
+        return (
+            isinstance(estimators, np.ndarray)
+            and estimators.ndim == 2
+            and estimators.shape[1] == 1
+        )
+
+    def _compile(self, leaves: List[Tuple[float, List[Tuple]]]):
+        """Tableaux des chemins (complétés à ``depth``) et coefficients de Shapley"""
+        n_leaves, depth = len(leaves), self.depth
+        self.leaf_value = np.array([value for value, _ in leaves])
+
+        # Nœuds du chemin: feature, seuil, branche droite, position de la feature
+        # (les nœuds de remplissage sont toujours satisfaits)
+        self.node_feature = np.zeros((n_leaves, depth), dtype=np.intp)
+        self.node_threshold = np.full((n_leaves, depth), np.inf)
+        self.node_right = np.zeros((n_leaves, depth), dtype=bool)
+        self.node_position = np.full((n_leaves, depth), -1, dtype=np.intp)
+        # Features distinctes du chemin et produit de leurs parts de couverture
+        self.path_feature = np.full((n_leaves, depth), self.n_features, dtype=np.intp)
+        self.path_zero = np.ones((n_leaves, depth))
+
+        for leaf, (_, path) in enumerate(leaves):
+            positions: Dict[int, int] = {}
+            for step, (feature, threshold, right, zero) in enumerate(path):
+                position = positions.setdefault(feature, len(positions))
+                self.node_feature[leaf, step] = feature
+                self.node_threshold[leaf, step] = threshold
+                self.node_right[leaf, step] = right
+                self.node_position[leaf, step] = position
+                self.path_feature[leaf, position] = feature
+                self.path_zero[leaf, position] *= zero
+
+        valid = self.path_feature < self.n_features
+        n_path = valid.sum(axis=1)
+
+        # Sous-ensembles S des positions du chemin, en masques de bits
+        self.masks = np.arange(2**depth)
+        in_mask = (self.masks[:, None] >> np.arange(depth)) & 1 == 1  # M×D
+        size = in_mask.sum(axis=1)
+
+        # Poids de Shapley |S|! (d - |S| - 1)! / d! selon d = features du chemin
+        weight = np.zeros((depth + 1, depth + 1))
+        for d in range(1, depth + 1):
+            for s in range(d):
+                weight[d, s] = factorial(s) * factorial(d - s - 1) / factorial(d)
+
+        # Coefficient de (feuille, position k, S): v · w · prod des z hors S et k
+        others = ~np.eye(depth, dtype=bool)  # K×J
+        outside = (
+            valid[:, None, None, :]
+            & ~in_mask[None, None, :, :]
+            & others[None, :, None, :]
+        )  # L×K×M×J
+        zero_product = np.prod(
+            np.where(outside, self.path_zero[:, None, None, :], 1.0), axis=3
+        )
+        allowed = (
+            valid[:, :, None]
+            & ~in_mask.T[None, :, :]
+            & np.all(~in_mask[None, :, :] | valid[:, None, :], axis=2)[:, None, :]
+        )  # L×K×M: k sur le chemin, S ⊆ chemin sans k
+        coefficients = np.where(
+            allowed,
+            self.leaf_value[:, None, None]
+            * weight[n_path][:, None, size]
+            * zero_product,
+            0.0,
+        )  # L×K×M
+
+        # Tout ne dépend que des features suivies (masque B) : contribution de
+        # la position k = (o_k - z_k) · somme des coefficients des S ⊆ B
+        contained = (self.masks[None, :] & self.masks[:, None]) == self.masks[None, :]
+        ones = in_mask.T[None, :, :]  # o_k pour chaque masque B (1×K×B)
+        by_mask = np.einsum("lkm,bm->lkb", coefficients, contained.astype(float))
+        by_mask *= ones - self.path_zero[:, :, None]
+
+        # Table (feuille, B) -> contribution de chaque position, lue d'un bloc
+        table = np.ascontiguousarray(by_mask.transpose(0, 2, 1))  # L×B×K
+        self.table = table.reshape(-1).view(np.dtype((np.void, 8 * depth)))
+        self._leaf_offset = np.arange(n_leaves) * len(self.masks)
+        # Somme des positions par feature: (feuille, position) -> feature
+        self._to_features = np.zeros((n_leaves * depth, self.n_features))
+        leaf, position = np.nonzero(valid)
+        self._to_features[
+            leaf * depth + position, self.path_feature[leaf, position]
+        ] = 1.0
+
+        # Nœuds distincts (feature, seuil): une comparaison par nœud, pas par chemin
+        nodes, inverse = np.unique(
+            np.stack([self.node_feature, self.node_threshold], axis=2).reshape(-1, 2),
+            axis=0,
+            return_inverse=True,
+        )
+        self._node_index = inverse.reshape(n_leaves, depth)
+        self._split_feature = nodes[:, 0].astype(np.intp)
+        self._split_threshold = nodes[:, 1]
+        # Les nœuds de remplissage sont toujours suivis: leur bit importe peu
+        self._node_bit = np.maximum(self.node_position, 0).astype(np.uint8)
+
+    def shap_values(self, X, chunk_size: Optional[int] = None) -> np.ndarray:
+        """Contributions N×F des features (même conversion float32 que sklearn)"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Matrice N×{self.n_features} attendue, reçu {X.shape}")
+
+        chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+        out = np.empty((X.shape[0], self.n_features))
+        for start in range(0, X.shape[0], chunk_size):
+            stop = min(start + chunk_size, X.shape[0])
+            out[start:stop] = self._shap_chunk(X[start:stop].astype(np.float64))
+        return out
+
+    def _shap_chunk(self, X: np.ndarray) -> np.ndarray:
+        # La ligne suit-elle chaque nœud de chaque chemin ?
+        goes_left = X[:, self._split_feature] <= self._split_threshold
+        missed = goes_left[:, self._node_index] == self.node_right
+
+        # Bit k: la ligne suit le chemin sur toutes les occurrences de la feature k
+        missed_bits = np.bitwise_or.reduce(
+            missed.view(np.uint8) << self._node_bit, axis=2
+        )
+        bits = (len(self.masks) - 1) & ~missed_bits
+
+        # Une ligne de la table par (feuille, features suivies), puis somme par feature
+        rows = np.take(self.table, bits.astype(np.intp) + self._leaf_offset)
+        return rows.view(np.float64).reshape(len(X), -1) @ self._to_features
+
+
+def _leaf_paths(tree, scale: float) -> List[Tuple[float, List[Tuple]]]:
+    """Feuilles d'un arbre sklearn: valeur et chemin (feature, seuil, droite, z)"""
+    cover = tree.weighted_n_node_samples
+    values = tree.value[:, 0, 0] * scale
+    leaves = []
+    stack = [(0, [])]
+    while stack:
+        node, path = stack.pop()
+        left, right = tree.children_left[node], tree.children_right[node]
+        if left == -1:
+            leaves.append((float(values[node]), path))
+            continue
+        feature, threshold = int(tree.feature[node]), float(tree.threshold[node])
+        stack.append(
+            (left, path + [(feature, threshold, False, cover[left] / cover[node])])
+        )
+        stack.append(
+            (right, path + [(feature, threshold, True, cover[right] / cover[node])])
+        )
+    return leaves
+
+
+def _luxury_shares(raw: np.ndarray) -> np.ndarray:
+    """Part de chaque composante dans luxury_score (égales si le score est nul)"""
+    shares = np.zeros(raw.shape)
+    for column, coefficient in LUXURY_COMPONENTS.items():
+        shares[:, column] = raw[:, column] * coefficient
+    total = shares.sum(axis=1, keepdims=True)
+    empty = total[:, 0] == 0
+    shares[np.ix_(empty, list(LUXURY_COMPONENTS))] = 1.0
+    total[empty] = len(LUXURY_COMPONENTS)
+    return shares / total
+
+
+def _rooms_shares(raw: np.ndarray) -> np.ndarray:
+    shares = np.zeros(raw.shape)
+    shares[:, BEDROOMS] = raw[:, BEDROOMS]
+    shares[:, BATHROOMS] = raw[:, BATHROOMS]
+    return shares / shares.sum(axis=1, keepdims=True)
+
+
+# Répartitions qui dépendent de la ligne (sommes au prorata de leurs termes)
+_ROW_SHARES = {"rooms": _rooms_shares, "luxury": _luxury_shares}
+
+
+def _allocation(name: str) -> Optional[Dict]:
+    """Parts d'une feature: colonne brute ou répartition de ``_ROW_SHARES``
+
+    Une feature brute revient à elle-même, une catégorie de taille à la
+    surface. Un produit ou un rapport de deux termes est partagé à parts
+    égales entre eux ; une somme (``rooms_total``, ``luxury_score``) au
+    prorata de chaque terme dans la valeur de la ligne. None pour une feature
+    qui ne dépend d'aucune entrée (``price_per_sqft``, toujours nulle) : sa
+    contribution rejoint la valeur de base.
+    """
+    if name in BASE_FEATURE_NAMES:
+        return {BASE_FEATURE_NAMES.index(name): 1.0}
+    if name.startswith("size_category_"):
+        return {AREA: 1.0}
+    if name == "rooms_total":
+        return {"rooms": 1.0}
+    if name in ("luxury_score", "has_luxury"):
+        return {"luxury": 1.0}
+    if name == "area_per_room":
+        return {AREA: 0.5, "rooms": 0.5}
+    if name == "bathroom_bedroom_ratio":
+        return {BATHROOMS: 0.5, BEDROOMS: 0.5}
+    if name == "area_bedrooms_interaction":
+        return {AREA: 0.5, BEDROOMS: 0.5}
+    if name == "luxury_area_interaction":
+        return {AREA: 0.5, "luxury": 0.5}
+    return None
+
+
+def raw_shares(name: str, raw: np.ndarray) -> Optional[np.ndarray]:
+    """Répartition N×12 d'une feature sur les caractéristiques brutes"""
+    allocation = _allocation(name)
+    if allocation is None:
+        return None
+    shares = np.zeros(raw.shape)
+    for target, weight in allocation.items():
+        if target in _ROW_SHARES:
+            shares += weight * _ROW_SHARES[target](raw)
+        else:
+            shares[:, target] += weight
+    return shares
+
+
+def raw_contributions(
+    contributions: np.ndarray, raw: np.ndarray, feature_names: List[str]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Contributions N×12 des caractéristiques brutes, et part non attribuable"""
+    raw = np.asarray(raw, dtype=np.float64)
+    # Matrices de passage F×12 (colonnes fixes) et F×répartitions par ligne
+    direct = np.zeros((len(feature_names), raw.shape[1]))
+    by_row = np.zeros((len(feature_names), len(_ROW_SHARES)))
+    unattributed = np.zeros(len(feature_names))
+    for feature, name in enumerate(feature_names):
+        allocation = _allocation(name)
+        if allocation is None:
+            unattributed[feature] = 1.0
+            continue
+        for target, weight in allocation.items():
+            if target in _ROW_SHARES:
+                by_row[feature, list(_ROW_SHARES).index(target)] = weight
+            else:
+                direct[feature, target] = weight
+
+    out = contributions @ direct
+    totals = contributions @ by_row
+    for kind, (name, shares) in enumerate(_ROW_SHARES.items()):
+        if by_row[:, kind].any():
+            out += totals[:, kind : kind + 1] * shares(raw)
+    return out, contributions @ unattributed
@@ -0,0 +1,304 @@
+"""
+🧮 Feature engineering compilé pour le service de prédiction
+
+Le plan de features est compilé une seule fois à partir des ``feature_names``
+des métadonnées du modèle, puis remplit une matrice float64 préallouée avec de
+l'arithmétique NumPy pure. Le même plan sert pour 1 ligne comme pour 1M lignes.
+"""
+
+import csv
+import json
+import logging
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Colonnes brutes attendues en entrée (ordre de HouseFeatures)
+BASE_FEATURE_NAMES = [
+    "area",
+    "bedrooms",
+    "bathrooms",
+    "stories",
+    "mainroad",
+    "guestroom",
+    "basement",
+    "hotwaterheating",
+    "airconditioning",
+    "parking",
+    "prefarea",
+    "furnishingstatus",
+]
+
+# Bornes des caractéristiques brutes (identiques aux contraintes de HouseFeatures)
+RAW_FEATURE_BOUNDS = {
+    "area": (1000, 20000),
+    "bedrooms": (1, 10),
+    "bathrooms": (1, 10),
+    "stories": (1, 5),
+    "mainroad": (0, 1),
+    "guestroom": (0, 1),
+    "basement": (0, 1),
+    "hotwaterheating": (0, 1),
+    "airconditioning": (0, 1),
+    "parking": (0, 5),
+    "prefarea": (0, 1),
+    "furnishingstatus": (0, 2),
+}
+
+AREA = 0
+BEDROOMS = 1
+BATHROOMS = 2
+GUESTROOM = 5
+BASEMENT = 6
+AIRCONDITIONING = 8
+PARKING = 9
+PREFAREA = 10
+
+# Seuils des catégories de taille (identiques à l'entraînement)
+SIZE_SMALL_MAX = 3000
+SIZE_MEDIUM_MAX = 6000
+SIZE_LARGE_MAX = 10000
+
+
+class _Intermediates:
+    """Valeurs intermédiaires partagées entre plusieurs features dérivées"""
+
+    def __init__(self, raw: np.ndarray):
+        self.raw = raw
+        self._rooms_total = None
+        self._luxury_score = None
+
+    @property
+    def rooms_total(self) -> np.ndarray:
+        if self._rooms_total is None:
+            self._rooms_total = self.raw[:, BEDROOMS] + self.raw[:, BATHROOMS]
+        return self._rooms_total
+
+    @property
+    def luxury_score(self) -> np.ndarray:
+        if self._luxury_score is None:
+            raw = self.raw
+            score = raw[:, PARKING] / 2
+            score += raw[:, AIRCONDITIONING]
+            score += raw[:, PREFAREA]
+            score += raw[:, GUESTROOM]
+            score += raw[:, BASEMENT]
+            self._luxury_score = score
+        return self._luxury_score
+
+
+def _fill_zero(values: _Intermediates, out: np.ndarray) -> None:
+    out[:] = 0.0
+
+
+def _fill_rooms_total(values: _Intermediates, out: np.ndarray) -> None:
+    out[:] = values.rooms_total
+
+
+def _fill_area_per_room(values: _Intermediates, out: np.ndarray) -> None:
+    np.divide(values.raw[:, AREA], values.rooms_total, out=out)
+
+
+def _fill_bathroom_bedroom_ratio(values: _Intermediates, out: np.ndarray) -> None:
+    np.divide(values.raw[:, BATHROOMS], values.raw[:, BEDROOMS], out=out)
+
+
+def _fill_luxury_score(values: _Intermediates, out: np.ndarray) -> None:
+    out[:] = values.luxury_score
+
+
+def _fill_has_luxury(values: _Intermediates, out: np.ndarray) -> None:
+    np.greater(values.luxury_score, 2, out=out, casting="unsafe")
+
+
+def _fill_area_bedrooms_interaction(values: _Intermediates, out: np.ndarray) -> None:
+    np.multiply(values.raw[:, AREA], values.raw[:, BEDROOMS], out=out)
+
+
+def _fill_luxury_area_interaction(values: _Intermediates, out: np.ndarray) -> None:
+    np.multiply(values.luxury_score, values.raw[:, AREA], out=out)
+
+
+def _fill_size_small(values: _Intermediates, out: np.ndarray) -> None:
+    np.less_equal(values.raw[:, AREA], SIZE_SMALL_MAX, out=out, casting="unsafe")
+
+
+def _fill_size_medium(values: _Intermediates, out: np.ndarray) -> None:
+    # Les valeurs non comparables (NaN) tombent dans "medium" comme np.select
+    area = values.raw[:, AREA]
+    outside = (area <= SIZE_SMALL_MAX) | (area > SIZE_MEDIUM_MAX)
+    np.logical_not(outside, out=out, casting="unsafe")
+
+
+def _fill_size_very_large(values: _Intermediates, out: np.ndarray) -> None:
+    np.greater(values.raw[:, AREA], SIZE_LARGE_MAX, out=out, casting="unsafe")
+
+
+DERIVED_FEATURES: Dict[str, Callable[[_Intermediates, np.ndarray], None]] = {
+    "price_per_sqft": _fill_zero,  # Placeholder, calculé après prédiction
+    "rooms_total": _fill_rooms_total,
+    "area_per_room": _fill_area_per_room,
+    "bathroom_bedroom_ratio": _fill_bathroom_bedroom_ratio,
+    "luxury_score": _fill_luxury_score,
+    "has_luxury": _fill_has_luxury,
+    "area_bedrooms_interaction": _fill_area_bedrooms_interaction,
+    "luxury_area_interaction": _fill_luxury_area_interaction,
+    "size_category_small": _fill_size_small,
+    "size_category_medium": _fill_size_medium,
+    "size_category_very_large": _fill_size_very_large,
+}
+
+
+class FeaturePlan:
+    """Plan de feature engineering compilé en indices de colonnes fixes"""
+
+    def __init__(self, feature_names: List[str]):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+
+        raw_index = {name: i for i, name in enumerate(BASE_FEATURE_NAMES)}
+        out_columns, raw_columns = [], []
+        self.derived_steps = []
+        self.missing_features = []
+
+        for column, name in enumerate(self.feature_names):
+            if name in raw_index:
+                out_columns.append(column)
+                raw_columns.append(raw_index[name])
+            elif name in DERIVED_FEATURES:
+                self.derived_steps.append((column, DERIVED_FEATURES[name]))
+            else:
+                logger.warning(f"Feature manquante: {name}")
+                self.missing_features.append(name)
+                self.derived_steps.append((column, _fill_zero))
+
+        self.out_columns = np.array(out_columns, dtype=np.intp)
+        self.raw_columns = np.array(raw_columns, dtype=np.intp)
+
+    def transform(self, raw, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Transforme une matrice brute N×12 en matrice de features N×F"""
+        raw = np.asarray(raw, dtype=np.float64)
+        if raw.ndim == 1:
+            raw = raw.reshape(1, -1)
+        if raw.ndim != 2 or raw.shape[1] != len(BASE_FEATURE_NAMES):
+            raise ValueError(
+                f"Matrice N×{len(BASE_FEATURE_NAMES)} attendue, reçu {raw.shape}"
+            )
+
+        n_rows = raw.shape[0]
+        if out is None:
+            out = np.empty((n_rows, self.n_features), dtype=np.float64)
+        elif out.shape != (n_rows, self.n_features) or out.dtype != np.float64:
+            raise ValueError(
+                f"Buffer de sortie float64 {(n_rows, self.n_features)} attendu"
+            )
+
+        out[:, self.out_columns] = raw[:, self.raw_columns]
+
+        values = _Intermediates(raw)
+        for column, fill in self.derived_steps:
+            fill(values, out[:, column])
+
+        return out
+
+    def transform_records(self, records: List[Dict]) -> np.ndarray:
+        """Transforme une liste de dictionnaires de caractéristiques brutes"""
+        return self.transform(records_to_raw(records))
+
+
+def records_to_raw(records: List[Dict]) -> np.ndarray:
+    """Convertit des dictionnaires de caractéristiques en matrice brute N×12"""
+    raw = np.array(
+        [[record[name] for name in BASE_FEATURE_NAMES] for record in records],
+        dtype=np.float64,
+    )
+    return raw.reshape(len(records), len(BASE_FEATURE_NAMES))
+
+
+# Valeurs textuelles du jeu de données d'origine (Housing.csv)
+TEXT_VALUES = {
+    "yes": 1.0,
+    "no": 0.0,
+    "furnished": 2.0,
+    "semi-furnished": 1.0,
+    "unfurnished": 0.0,
+}
+
+
+def _float(value: str) -> float:
+    value = value.strip()
+    return TEXT_VALUES[value] if value in TEXT_VALUES else float(value)
+
+
+def read_houses(path: Path, with_price: bool = False):
+    """Maisons brutes N×12 d'un CSV/JSONL (et leurs prix si ``with_price``)"""
+    with open(path, "r") as f:
+        if path.suffix == ".jsonl":
+            records = [json.loads(line) for line in f if line.strip()]
+        else:
+            records = list(csv.DictReader(f))
+    raw = np.array(
+        [[_float(str(r[name])) for name in BASE_FEATURE_NAMES] for r in records],
+        dtype=np.float64,
+    ).reshape(-1, len(BASE_FEATURE_NAMES))
+    if not with_price:
+        return raw
+    return raw, np.array([float(r["price"]) for r in records])
+
+
+def sample_raw_features(n_rows: int, seed: Optional[int] = None) -> np.ndarray:
+    """Tire des caractéristiques brutes valides uniformément dans leurs bornes"""
+    rng = np.random.default_rng(seed)
+    raw = np.empty((n_rows, len(BASE_FEATURE_NAMES)), dtype=np.float64)
+    for column, name in enumerate(BASE_FEATURE_NAMES):
+        low, high = RAW_FEATURE_BOUNDS[name]
+        raw[:, column] = rng.integers(low, high + 1, n_rows)
+    area_low, area_high = RAW_FEATURE_BOUNDS["area"]
+    raw[:, AREA] = np.round(rng.uniform(area_low, area_high, n_rows), 2)
+    return raw
+
+
+def reference_feature_matrix(df, feature_names: List[str]) -> np.ndarray:
+    """Feature engineering pandas d'origine (référence pour les tests de parité)"""
+    df = df.copy()
+    df["price_per_sqft"] = 0  # Placeholder, sera calculé après prédiction
+    df["rooms_total"] = df["bedrooms"] + df["bathrooms"]
+    df["area_per_room"] = df["area"] / df["rooms_total"]
+    df["bathroom_bedroom_ratio"] = df["bathrooms"] / df["bedrooms"]
+    df["luxury_score"] = (
+        df["airconditioning"]
+        + df["parking"] / 2
+        + df["prefarea"]
+        + df["guestroom"]
+        + df["basement"]
+    )
+    df["has_luxury"] = (df["luxury_score"] > 2).astype(int)
+    df["area_bedrooms_interaction"] = df["area"] * df["bedrooms"]
+    df["luxury_area_interaction"] = df["luxury_score"] * df["area"]
+
+    # Catégories de taille
+    size_conditions = [
+        (df["area"] <= 3000),
+        (df["area"] <= 6000),
+        (df["area"] <= 10000),
+        (df["area"] > 10000),
+    ]
+    size_choices = ["small", "medium", "large", "very_large"]
+    df["size_category"] = np.select(size_conditions, size_choices, default="medium")
+
+    # One-hot encoding pour size_category
+    for category in ["small", "medium", "very_large"]:
+        df[f"size_category_{category}"] = (df["size_category"] == category).astype(int)
+
+    columns = [
+        (
+            df[name].to_numpy(dtype=np.float64)
+            if name in df.columns
+            else np.zeros(len(df))
+        )
+        for name in feature_names
+    ]
+    return np.column_stack(columns)
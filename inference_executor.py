@@ -0,0 +1,148 @@
+"""
+🧵 Exécution de l'inférence hors de la boucle d'événements
+
+Trois modes sont disponibles:
+- ``inline``: appel direct (bloque la boucle asyncio pendant l'inférence)
+- ``thread``: pool de threads borné partageant le prédicteur du processus
+- ``process``: pool de processus, chacun chargeant le modèle une seule fois
+
+En mode ``process``, les lignes servies par un processus du pool lui sont
+renvoyées avec le résultat : l'esquisse de dérive et le scoring fantôme du
+parent les reçoivent comme en mode ``thread``. Les durées par étape et les
+erreurs d'inférence mesurées dans le pool ne sont pas comptées par
+``/metrics``.
+"""
+
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import profiling
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_MODES = ("inline", "thread", "process")
+
+# Prédicteur propre à chaque processus du pool (mode "process")
+_worker_predictor = None
+
+
+def _init_worker():
+    """Initialise un processus du pool: charge le modèle une seule fois"""
+    global _worker_predictor
+
+    # Le processus fils sert le modèle en direct, sans pool ni micro-batching ;
+    # dérive et scoring fantôme restent au parent (lignes servies renvoyées)
+    os.environ["INFERENCE_EXECUTOR"] = "inline"
+    os.environ["MICROBATCH_ENABLED"] = "0"
+    os.environ["DRIFT_ENABLED"] = "0"
+    os.environ["SHADOW_ENABLED"] = "0"
+    import api
+
+    _worker_predictor = api.predictor
+    logger.info(f"Processus d'inférence {os.getpid()} prêt")
+
+
+def _call_worker(method: str, *args):
+    """Appelle une méthode du prédicteur local au processus
+
+    Retourne le résultat et les lignes servies ``(raw, prices)`` pendant
+    l'appel.
+    """
+    _worker_predictor.served = served = []
+    try:
+        return getattr(_worker_predictor, method)(*args), served
+    finally:
+        _worker_predictor.served = None
+
+
+class InferenceExecutor:
+    """Exécute les méthodes du prédicteur selon le mode configuré"""
+
+    def __init__(
+        self,
+        predictor=None,
+        mode: str = "thread",
+        max_workers: Optional[int] = None,
+    ):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Mode d'exécution inconnu: {mode}")
+
+        self.predictor = predictor
+        self.mode = mode
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self._pool: Optional[Executor] = None
+        # Appelé avec la méthode et la durée de chaque appel (contrôle d'admission)
+        self.on_complete: Optional[Callable[[str, float], None]] = None
+
+        if mode == "thread":
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="inference"
+            )
+        elif mode == "process":
+            self._pool = self._process_pool()
+            logger.warning(
+                "Mode process: les durées par étape du pool ne sont pas "
+                "comptées par /metrics"
+            )
+
+    def _process_pool(self) -> ProcessPoolExecutor:
+        # "spawn": pas de fork d'un processus qui a déjà des threads actifs
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    async def run(self, method: str, *args) -> Any:
+        """Exécute ``predictor.<method>(*args)`` sans bloquer la boucle (hors inline)"""
+        if self.on_complete is None:
+            return await self._run(method, *args)
+        start = time.perf_counter()
+        result = await self._run(method, *args)
+        self.on_complete(method, time.perf_counter() - start)
+        return result
+
+    async def _run(self, method: str, *args) -> Any:
+        if self._pool is None:
+            return getattr(self.predictor, method)(*args)
+
+        loop = asyncio.get_running_loop()
+        if self.mode == "process":
+            call = functools.partial(_call_worker, method, *args)
+            result, served = await loop.run_in_executor(self._pool, call)
+            for raw, prices in served:
+                self.predictor._observe_served(raw, prices)
+            return result
+
+        call = functools.partial(getattr(self.predictor, method), *args)
+        session = profiling.current.get()
+        if session is not None:
+            # Requête profilée: le thread du pool est profilé lui aussi
+            call = functools.partial(session.run_in_thread, call)
+        return await loop.run_in_executor(self._pool, call)
+
+    def swap(self, predictor):
+        """Bascule sur un nouveau prédicteur; les appels en cours finissent sur l'ancien
+
+        En mode "process", un nouveau pool est démarré (ses processus chargent
+        la version active du registre) et l'ancien s'arrête après ses tâches.
+        """
+        self.predictor = predictor
+        if self.mode == "process":
+            old_pool, self._pool = self._pool, self._process_pool()
+            old_pool.shutdown(wait=False)
+
+    def shutdown(self, wait: bool = True):
+        """Arrête le pool de workers"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+    def stats(self) -> Dict:
+        return {"mode": self.mode, "max_workers": self.max_workers}
@@ -0,0 +1,474 @@
+"""
+📈 Métriques Prometheus: latence par étape, erreurs, tailles de lot
+
+Sur le chemin chaud, histogrammes et compteurs sont de simples listes
+Python : une observation coûte un ``bisect`` et deux additions, sans verrou
+(sous forte concurrence, une observation perdue est tolérée). Ils ne sont
+convertis au format Prometheus qu'à la collecte, par un collecteur
+``prometheus_client`` qui fournit aussi les métriques du processus
+(mémoire résidente, CPU, descripteurs).
+
+Avec plusieurs workers (``run_api.py --workers``), définir ``METRICS_DIR`` :
+chaque worker y écrit ses compteurs toutes les ``METRICS_FLUSH_INTERVAL``
+secondes et ``/metrics`` agrège les fichiers de tous les workers. Le fichier
+d'un worker arrêté (recyclé par ``--max-requests``, relancé par SIGHUP) n'est
+plus rafraîchi : passé ``STALE_AFTER`` secondes, il est ignoré et supprimé,
+et ses compteurs quittent les totaux. En mode
+``INFERENCE_EXECUTOR=process``, les étapes exécutées dans le pool
+(feature engineering, inférence) ne sont pas comptées.
+"""
+
+import json
+import os
+import time
+from bisect import bisect_left
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from prometheus_client import CollectorRegistry, ProcessCollector, generate_latest
+from prometheus_client.core import (
+    CounterMetricFamily,
+    GaugeMetricFamily,
+    HistogramMetricFamily,
+)
+
+import profiling
+
+# Désactivable à chaud (mesure du surcoût dans benchmarks/bench_metrics.py)
+ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_DIR = os.getenv("METRICS_DIR")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+# Âge au-delà duquel l'état publié est celui d'un worker arrêté
+STALE_AFTER = 3 * METRICS_FLUSH_INTERVAL + 1
+
+STAGES = (
+    "validation",
+    "feature_engineering",
+    "inference",
+    "confidence",
+    "explanation",
+    "serialization",
+)
+SECONDS_BUCKETS = (
+    5e-6,
+    1e-5,
+    2.5e-5,
+    5e-5,
+    1e-4,
+    2.5e-4,
+    5e-4,
+    1e-3,
+    2.5e-3,
+    5e-3,
+    1e-2,
+    2.5e-2,
+    5e-2,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+ROWS_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 1024, 4096, 16384, 65536)
+
+SNAPSHOT_PREFIX = "metrics_"
+
+
+class Histogram:
+    """Histogramme à bornes fixes (compte par intervalle, non cumulé)"""
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds=SECONDS_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        if ENABLED:
+            # bisect_left: une valeur égale à une borne compte dans "le" de celle-ci
+            self.counts[bisect_left(self.bounds, value)] += 1
+            self.sum += value
+
+    def snapshot(self) -> Dict:
+        return {"counts": list(self.counts), "sum": self.sum}
+
+
+stage_seconds: Dict[str, Histogram] = {stage: Histogram() for stage in STAGES}
+request_seconds: Dict[str, Histogram] = {}
+batch_rows = Histogram(ROWS_BUCKETS)
+errors: Dict[str, int] = {}
+predictions: Dict[str, int] = {}
+
+
+def stage_start() -> float:
+    """Début d'une étape (temps CPU noté en plus si la requête est profilée)"""
+    session = profiling.current.get()
+    if session is not None:
+        session.begin_stage()
+    return time.perf_counter()
+
+
+def observe_stage(stage: str, start: float):
+    """Durée de ``stage`` depuis ``start`` (cf. ``stage_start``)"""
+    elapsed = time.perf_counter() - start
+    stage_seconds[stage].observe(elapsed)
+    session = profiling.current.get()
+    if session is not None:
+        session.end_stage(stage, elapsed)
+
+
+def _reset():
+    """Remet les compteurs à zéro (worker forké: l'état du parent n'est pas repris)"""
+    for histogram in [*stage_seconds.values(), batch_rows]:
+        histogram.counts = [0] * len(histogram.counts)
+        histogram.sum = 0.0
+    request_seconds.clear()
+    errors.clear()
+    predictions.clear()
+
+
+os.register_at_fork(after_in_child=_reset)
+
+# Fournit l'état courant du service (modèle, cache), lu à la collecte
+_info_provider: Optional[Callable[[], Dict]] = None
+
+
+def set_info_provider(provider: Callable[[], Dict]):
+    """``provider()`` renvoie ``{"model": {...}, "cache": {...} ou None}``"""
+    global _info_provider
+    _info_provider = provider
+
+
+def count_error(kind: str, n: int = 1):
+    if ENABLED and n:
+        errors[kind] = errors.get(kind, 0) + n
+
+
+def count_predictions(model_version: Optional[str], n_rows: int):
+    """Taille de lot et lignes prédites par version de modèle"""
+    if ENABLED:
+        batch_rows.observe(n_rows)
+        version = model_version or "inconnue"
+        predictions[version] = predictions.get(version, 0) + n_rows
+
+
+def _error_type(status: int) -> str:
+    if status == 422:
+        return "request_validation"
+    if status == 503:
+        return "unavailable"
+    return "server" if status >= 500 else "client"
+
+
+class MetricsMiddleware:
+    """Middleware ASGI: latence par route et erreurs HTTP par type
+
+    Le début de la requête est noté dans ``scope["metrics_start"]`` pour que
+    les routes mesurent la lecture et la validation du corps.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        start = scope["metrics_start"] = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            # Gabarit de route (pas le chemin brut): cardinalité bornée
+            path = getattr(route, "path", "inconnue")
+            histogram = request_seconds.get(path)
+            if histogram is None:
+                histogram = request_seconds[path] = Histogram()
+            histogram.observe(time.perf_counter() - start)
+            if status >= 400:
+                count_error(_error_type(status))
+
+
+def _resident_memory() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def snapshot() -> Dict:
+    """État des métriques de ce processus (sérialisable en JSON)"""
+    info = _info_provider() if _info_provider is not None else {}
+    return {
+        "pid": os.getpid(),
+        "time": time.time(),
+        "stages": {name: h.snapshot() for name, h in stage_seconds.items()},
+        "requests": {name: h.snapshot() for name, h in list(request_seconds.items())},
+        "batch_rows": batch_rows.snapshot(),
+        "errors": dict(errors),
+        "predictions": dict(predictions),
+        "cache": info.get("cache"),
+        "admission": info.get("admission"),
+        "drift": info.get("drift"),
+        "audit": info.get("audit"),
+        "shadow": info.get("shadow"),
+        "model": info.get("model"),
+        "resident_memory_bytes": _resident_memory(),
+    }
+
+
+def write_snapshot(directory=None):
+    """Écrit l'état de ce worker dans ``METRICS_DIR`` (écriture atomique)"""
+    directory = Path(directory or METRICS_DIR)
+    path = directory / f"{SNAPSHOT_PREFIX}{os.getpid()}.json"
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(snapshot(), f)
+    tmp_path.replace(path)
+
+
+def clear_snapshots(directory=None):
+    """Supprime les états d'une exécution précédente (avant de forker)"""
+    directory = Path(directory or METRICS_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    for path in directory.glob(f"{SNAPSHOT_PREFIX}*.json"):
+        path.unlink(missing_ok=True)
+
+
+def worker_snapshots() -> List[Dict]:
+    """Derniers états publiés par les autres workers actifs (``METRICS_DIR``)
+
+    Les fichiers plus vieux que ``STALE_AFTER`` (workers arrêtés) sont
+    supprimés au passage : le dossier ne grossit pas au fil des recyclages.
+    """
+    snapshots = []
+    if not METRICS_DIR:
+        return snapshots
+    now = time.time()
+    for path in Path(METRICS_DIR).glob(f"{SNAPSHOT_PREFIX}*.json"):
+        if path.stem == f"{SNAPSHOT_PREFIX}{os.getpid()}":
+            continue
+        try:
+            if now - path.stat().st_mtime >= STALE_AFTER:
+                path.unlink(missing_ok=True)
+                continue
+            with open(path) as f:
+                item = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if now - item.get("time", 0) < STALE_AFTER:
+            snapshots.append(item)
+    return snapshots
+
+
+def _all_snapshots() -> List[Dict]:
+    """État local, plus celui des autres workers si ``METRICS_DIR`` est défini"""
+    return [snapshot()] + worker_snapshots()
+
+
+def _merge_histograms(items: Iterable[Tuple[str, Dict]]) -> Dict[str, Dict]:
+    merged: Dict[str, Dict] = {}
+    for name, histogram in items:
+        total = merged.setdefault(
+            name, {"counts": [0] * len(histogram["counts"]), "sum": 0.0}
+        )
+        total["counts"] = [a + b for a, b in zip(total["counts"], histogram["counts"])]
+        total["sum"] += histogram["sum"]
+    return merged
+
+
+def _add_histogram(family, labels, histogram: Dict, bounds):
+    buckets, cumulative = [], 0
+    for bound, count in zip(list(bounds) + [float("inf")], histogram["counts"]):
+        cumulative += count
+        buckets.append(("+Inf" if bound == float("inf") else repr(bound), cumulative))
+    family.add_metric(labels, buckets, histogram["sum"])
+
+
+def _sum_counters(snapshots: List[Dict], key: str) -> Dict[str, int]:
+    totals: Dict[str, int] = {}
+    for item in snapshots:
+        for name, value in (item.get(key) or {}).items():
+            totals[name] = totals.get(name, 0) + value
+    return totals
+
+
+class _Collector:
+    """Convertit les états (locaux et des autres workers) au format Prometheus"""
+
+    def collect(self):
+        snapshots = _all_snapshots()
+
+        family = HistogramMetricFamily(
+            "house_price_stage_seconds",
+            "Durée de chaque étape d'une prédiction",
+            labels=["stage"],
+        )
+        stages = _merge_histograms(
+            item for s in snapshots for item in s["stages"].items()
+        )
+        for stage, histogram in stages.items():
+            _add_histogram(family, [stage], histogram, SECONDS_BUCKETS)
+        yield family
+
+        family = HistogramMetricFamily(
+            "house_price_request_seconds",
+            "Durée des requêtes HTTP par route",
+            labels=["route"],
+        )
+        routes = _merge_histograms(
+            item for s in snapshots for item in s["requests"].items()
+        )
+        for route, histogram in sorted(routes.items()):
+            _add_histogram(family, [route], histogram, SECONDS_BUCKETS)
+        yield family
+
+        family = HistogramMetricFamily(
+            "house_price_batch_rows", "Lignes par appel au modèle"
+        )
+        rows = _merge_histograms(("rows", s["batch_rows"]) for s in snapshots)
+        _add_histogram(family, [], rows["rows"], ROWS_BUCKETS)
+        yield family
+
+        family = CounterMetricFamily(
+            "house_price_errors", "Erreurs par type", labels=["type"]
+        )
+        for kind, value in sorted(_sum_counters(snapshots, "errors").items()):
+            family.add_metric([kind], value)
+        yield family
+
+        family = CounterMetricFamily(
+            "house_price_predictions",
+            "Lignes prédites par version de modèle",
+            labels=["model_version"],
+        )
+        for version, value in sorted(_sum_counters(snapshots, "predictions").items()):
+            family.add_metric([version], value)
+        yield family
+
+        caches = [s["cache"] for s in snapshots if s.get("cache")]
+        if caches:
+            for name in ("hits", "misses", "evictions", "expirations"):
+                family = CounterMetricFamily(
+                    f"house_price_cache_{name}", f"Cache de prédictions: {name}"
+                )
+                family.add_metric([], sum(cache[name] for cache in caches))
+                yield family
+            family = GaugeMetricFamily(
+                "house_price_cache_entries", "Entrées du cache de prédictions"
+            )
+            family.add_metric([], sum(cache["size"] for cache in caches))
+            yield family
+
+        admissions = [s["admission"] for s in snapshots if s.get("admission")]
+        if admissions:
+            for name in ("admitted", "rejected", "timed_out"):
+                family = CounterMetricFamily(
+                    f"house_price_admission_{name}",
+                    f"Contrôle d'admission: requêtes {name}",
+                )
+                family.add_metric([], sum(item[name] for item in admissions))
+                yield family
+            for name in ("limit", "in_flight", "queue_depth"):
+                family = GaugeMetricFamily(
+                    f"house_price_admission_{name}",
+                    f"Contrôle d'admission: {name} (somme des workers)",
+                )
+                family.add_metric([], sum(item[name] for item in admissions))
+                yield family
+
+        audits = [s["audit"] for s in snapshots if s.get("audit")]
+        if audits:
+            for name in ("enqueued", "written", "dropped", "sampled_out", "blocked"):
+                family = CounterMetricFamily(
+                    f"house_price_audit_{name}",
+                    f"Journal d'audit: enregistrements {name}",
+                )
+                family.add_metric([], sum(item[name] for item in audits))
+                yield family
+            for name in ("bytes_written", "rotations", "write_errors"):
+                family = CounterMetricFamily(
+                    f"house_price_audit_{name}", f"Journal d'audit: {name}"
+                )
+                family.add_metric([], sum(item[name] for item in audits))
+                yield family
+            family = GaugeMetricFamily(
+                "house_price_audit_queue_depth",
+                "Journal d'audit: enregistrements en attente (somme des workers)",
+            )
+            family.add_metric([], sum(item["queue_depth"] for item in audits))
+            yield family
+
+        # Scoring fantôme: sommes par candidat (MAE = abs_error_sum / rows)
+        shadows = [s["shadow"] for s in snapshots if s.get("shadow")]
+        if shadows:
+            family = CounterMetricFamily(
+                "house_price_shadow_skipped",
+                "Scoring fantôme: lots non rejoués (pool saturé)",
+            )
+            family.add_metric([], sum(item["skipped"] for item in shadows))
+            yield family
+            fields = ("rows", "failures", "abs_error_sum", "squared_error_sum")
+            candidates: Dict[Tuple[str, str], Dict[str, float]] = {}
+            for item in shadows:
+                for version, stats in item["candidates"].items():
+                    sums = candidates.setdefault((version, stats["name"]), {})
+                    values = {name: stats[name] for name in fields}
+                    values["seconds_sum"] = stats["latency"]["seconds_sum"]
+                    for name, value in values.items():
+                        sums[name] = sums.get(name, 0) + value
+            for name in (*fields, "seconds_sum"):
+                family = CounterMetricFamily(
+                    f"house_price_shadow_{name}",
+                    f"Scoring fantôme: {name} par candidat",
+                    labels=["candidate", "name"],
+                )
+                for (version, candidate), sums in sorted(candidates.items()):
+                    family.add_metric([version, candidate], sums[name])
+                yield family
+
+        family = GaugeMetricFamily(
+            "house_price_model_info",
+            "Version de modèle servie par chaque worker",
+            labels=["pid", "model_version", "model_type", "engine", "model_format"],
+        )
+        for item in snapshots:
+            model = item.get("model")
+            if model:
+                labels = [str(item["pid"])] + [
+                    str(model.get(key))
+                    for key in ("version", "model_type", "engine", "model_format")
+                ]
+                family.add_metric(labels, 1)
+        yield family
+
+        family = GaugeMetricFamily(
+            "house_price_worker_resident_memory_bytes",
+            "Mémoire résidente de chaque worker",
+            labels=["pid"],
+        )
+        for item in snapshots:
+            if item.get("resident_memory_bytes") is not None:
+                family.add_metric([str(item["pid"])], item["resident_memory_bytes"])
+        yield family
+
+
+REGISTRY = CollectorRegistry()
+ProcessCollector(registry=REGISTRY)
+REGISTRY.register(_Collector())
+
+
+def render() -> bytes:
+    """Exposition au format texte Prometheus"""
+    return generate_latest(REGISTRY)
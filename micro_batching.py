@@ -0,0 +1,146 @@
+"""
+📦 Micro-batching asynchrone des requêtes /predict concurrentes
+
+Les requêtes en attente sont regroupées pendant au plus ``max_wait_ms`` (ou
+jusqu'à ``max_batch_size`` requêtes), prédites en un seul passage vectorisé,
+puis chaque appelant reçoit sa ligne via son ``Future``. La fonction de
+prédiction peut être asynchrone (exécuteur d'inférence) : plusieurs lots
+peuvent alors être en cours simultanément.
+"""
+
+import asyncio
+import inspect
+import logging
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _histogram_buckets(max_batch_size: int) -> List[int]:
+    """Bornes supérieures des classes de taille de lot (puissances de 2)"""
+    buckets, bound = [], 1
+    while bound < max_batch_size:
+        buckets.append(bound)
+        bound *= 2
+    buckets.append(max_batch_size)
+    return buckets
+
+
+class MicroBatcher:
+    """Regroupe les appels concurrents en lots pour une fonction vectorisée"""
+
+    def __init__(
+        self,
+        predict_fn: Callable[[List[Any]], Any],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size doit être >= 1")
+
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+
+        self.buckets = _histogram_buckets(max_batch_size)
+        self.batch_size_histogram = {bucket: 0 for bucket in self.buckets}
+        self.batches = 0
+        self.items = 0
+        self.max_queue_depth = 0
+
+    def _ensure_worker(self) -> asyncio.AbstractEventLoop:
+        """Démarre la tâche de fond dans la boucle courante si nécessaire"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._task is None or self._task.done():
+            self._loop = loop
+            self._pending = []
+            self._wakeup = asyncio.Event()
+            self._full = asyncio.Event()
+            self._running = set()
+            self._task = loop.create_task(self._run())
+        return loop
+
+    async def submit(self, item: Any) -> Any:
+        """Ajoute un élément au prochain lot et attend son résultat"""
+        loop = self._ensure_worker()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        depth = len(self._pending)
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self._wakeup.set()
+        if depth >= self.max_batch_size:
+            self._full.set()
+
+        return await future
+
+    async def _run(self):
+        """Boucle de fond: attend, accumule puis exécute les lots"""
+        while True:
+            await self._wakeup.wait()
+            if len(self._pending) < self.max_batch_size:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = self._pending[: self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size :]
+            if len(self._pending) < self.max_batch_size:
+                self._full.clear()
+            if not self._pending:
+                self._wakeup.clear()
+
+            if batch:
+                task = asyncio.get_running_loop().create_task(self._execute(batch))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+    async def _execute(self, batch: List[Tuple[Any, asyncio.Future]]):
+        """Prédit un lot et résout le Future de chaque appelant"""
+        self._record(len(batch))
+        try:
+            results = self.predict_fn([item for item, _ in batch])
+            if inspect.isawaitable(results):
+                results = await results
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _record(self, batch_size: int):
+        self.batches += 1
+        self.items += batch_size
+        for bucket in self.buckets:
+            if batch_size <= bucket:
+                self.batch_size_histogram[bucket] += 1
+                break
+
+    def stats(self) -> Dict:
+        """Profondeur de file et distribution des tailles de lot"""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queue_depth": len(self._pending),
+            "batches_in_flight": len(self._running),
+            "max_queue_depth": self.max_queue_depth,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "batch_size_histogram": {
+                f"<={bucket}": count
+                for bucket, count in self.batch_size_histogram.items()
+            },
+        }
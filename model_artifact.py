@@ -0,0 +1,204 @@
+"""
+📦 Artefact de modèle compact, versionné et mappable en mémoire
+
+L'ensemble d'arbres aplati (cf. tree_engine.py) et le plan de features sont
+écrits dans un seul fichier : un en-tête JSON suivi des tableaux bruts alignés
+sur 64 octets. Le chargement ne fait que ``mmap`` + ``np.frombuffer`` : ni
+pickle, ni scikit-learn, ni pandas, et les pages sont partagées entre les
+workers via le cache de pages du système.
+
+Format::
+
+    MAGIC (8 octets) | longueur de l'en-tête (uint32 LE) | en-tête JSON | tableaux
+
+Usage:
+    python model_artifact.py                       # exporte models/best_model_*.pkl
+    python model_artifact.py --model models/x.pkl --output models/x.flat
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import struct
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from tree_engine import FlatTreeEnsemble
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"HPFLAT\x00\x01"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+# Tableaux de l'ensemble et leur type sur disque (little-endian)
+ARRAY_DTYPES = {"feature": "<i8", "threshold": "<f4", "leaf_value": "<f8"}
+
+
+def artifact_path(model_file: Path) -> Path:
+    """Chemin de l'artefact associé à un modèle pickle"""
+    return model_file.with_suffix(".flat")
+
+
+def _align(offset: int) -> int:
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_artifact(
+    path,
+    ensemble: FlatTreeEnsemble,
+    feature_names: List[str],
+    model_hash: str,
+    model_type: str,
+    metadata: Optional[Dict] = None,
+) -> Dict:
+    """Écrit l'ensemble aplati et son plan de features dans ``path``"""
+    arrays = {
+        "feature": ensemble.feature.reshape(ensemble.n_trees, ensemble.n_internal),
+        "threshold": ensemble.threshold.reshape(ensemble.n_trees, ensemble.n_internal),
+        "leaf_value": ensemble.leaf_value.reshape(ensemble.n_trees, ensemble.n_leaves),
+    }
+
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array, dtype=ARRAY_DTYPES[name])
+        arrays[name] = array
+        layout[name] = {
+            "dtype": ARRAY_DTYPES[name],
+            "shape": list(array.shape),
+            "offset": offset,
+        }
+        offset = _align(offset + array.nbytes)
+
+    header = {
+        "format_version": FORMAT_VERSION,
+        "model_hash": model_hash,
+        "model_type": model_type,
+        "init": ensemble.init,
+        "n_features": ensemble.n_features,
+        "feature_names": list(feature_names),
+        "metadata": metadata or {},
+        "arrays": layout,
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    data_start = _align(len(MAGIC) + 4 + len(header_bytes))
+
+    path = Path(path)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]["offset"])
+            f.write(array.tobytes())
+    tmp_path.replace(path)
+
+    return header
+
+
+def load_artifact(path) -> Tuple[FlatTreeEnsemble, Dict]:
+    """Charge un artefact par ``mmap`` (tableaux en lecture seule, sans copie)"""
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if buffer[: len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path}: artefact de modèle invalide")
+    (header_size,) = struct.unpack_from("<I", buffer, len(MAGIC))
+    header_start = len(MAGIC) + 4
+    header = json.loads(bytes(buffer[header_start : header_start + header_size]))
+    if header.get("format_version") != FORMAT_VERSION:
+        raise ValueError(
+            f"{path}: version de format {header.get('format_version')} non supportée"
+        )
+
+    data_start = _align(header_start + header_size)
+    arrays = {}
+    for name, spec in header["arrays"].items():
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"]))
+        arrays[name] = np.frombuffer(
+            buffer, dtype=dtype, count=count, offset=data_start + spec["offset"]
+        ).reshape(spec["shape"])
+
+    ensemble = FlatTreeEnsemble(
+        feature=arrays["feature"],
+        threshold=arrays["threshold"],
+        leaf_value=arrays["leaf_value"],
+        init=header["init"],
+        n_features=header["n_features"],
+    )
+    return ensemble, header
+
+
+def export_model(model_file, metadata_file=None, output=None) -> Path:
+    """Exporte un modèle pickle (et ses métadonnées) vers un artefact compact"""
+    import pickle
+
+    model_file = Path(model_file)
+    model_bytes = model_file.read_bytes()
+    model = pickle.loads(model_bytes)
+
+    metadata = {}
+    if metadata_file is not None:
+        with open(metadata_file, "r") as f:
+            metadata = json.load(f)
+    feature_names = metadata.get("data_info", {}).get("feature_names")
+    if feature_names is None:
+        feature_names = [f"x{i}" for i in range(model.n_features_in_)]
+
+    output = Path(output) if output else artifact_path(model_file)
+    ensemble = FlatTreeEnsemble.from_sklearn(model)
+    save_artifact(
+        output,
+        ensemble,
+        feature_names=feature_names,
+        model_hash=hashlib.sha256(model_bytes).hexdigest()[:16],
+        model_type=type(model).__name__,
+        metadata=metadata,
+    )
+
+    # Vérification: l'artefact rechargé prédit comme le modèle d'origine
+    from features import FeaturePlan, sample_raw_features
+
+    loaded, _ = load_artifact(output)
+    X = FeaturePlan(feature_names).transform(sample_raw_features(1000, seed=0))
+    if not np.allclose(loaded.predict(X), model.predict(X), rtol=1e-9, atol=0):
+        raise ValueError("L'artefact exporté ne reproduit pas model.predict")
+
+    return output
+
+
+def main():
+    """Fonction principale"""
+    import warnings
+
+    parser = argparse.ArgumentParser(
+        description="📦 Export du modèle en artefact compact"
+    )
+    parser.add_argument("--model", help="Modèle pickle (défaut: models/best_model_*)")
+    parser.add_argument("--metadata", help="Métadonnées JSON du modèle")
+    parser.add_argument("--output", help="Artefact de sortie (défaut: <modèle>.flat)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    models_path = Path("models")
+    model_file = args.model or next(models_path.glob("best_model_*.pkl"), None)
+    if model_file is None:
+        raise SystemExit("❌ Aucun modèle trouvé dans 'models/'")
+    metadata_file = args.metadata or next(
+        models_path.glob("model_metadata_*.json"), None
+    )
+
+    output = export_model(model_file, metadata_file, args.output)
+    print(f"✅ Artefact écrit: {output} ({output.stat().st_size / 1024:.0f} Ko)")
+
+
+if __name__ == "__main__":
+    main()
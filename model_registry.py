@@ -0,0 +1,197 @@
+"""
+🗂️ Registre des versions de modèle du dossier ``models/``
+
+Chaque ``best_model_<nom>.pkl`` est une version identifiée par l'empreinte
+SHA-256 de son contenu (16 premiers caractères, comme ``model_hash`` dans
+l'API) et associée à ``model_metadata_<nom>.json``. La version active et
+l'historique des promotions sont persistés dans ``models/registry.json`` :
+tous les workers (et les redémarrages) servent ainsi la même version.
+
+Usage:
+    python model_registry.py list
+    python model_registry.py promote <version>
+    python model_registry.py rollback
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = "registry.json"
+MODEL_PREFIX = "best_model_"
+METADATA_PREFIX = "model_metadata_"
+
+
+class ModelVersion:
+    """Une version de modèle: fichier pickle, métadonnées et empreinte"""
+
+    def __init__(self, version: str, model_file: Path, metadata_file=None):
+        self.version = version
+        self.model_file = Path(model_file)
+        self.metadata_file = Path(metadata_file) if metadata_file else None
+        self.name = self.model_file.stem[len(MODEL_PREFIX) :]
+        self.modified = self.model_file.stat().st_mtime
+
+    def to_dict(self) -> Dict:
+        return {
+            "version": self.version,
+            "name": self.name,
+            "model_file": self.model_file.name,
+            "metadata_file": self.metadata_file.name if self.metadata_file else None,
+            "modified": self.modified,
+        }
+
+
+class ModelRegistry:
+    """Versions disponibles, version active et historique des promotions"""
+
+    def __init__(self, models_path="models"):
+        self.models_path = Path(models_path)
+        self.state_file = self.models_path / STATE_FILE
+        self._hashes: Dict[Tuple[str, int, int], str] = {}
+
+    def _content_hash(self, path: Path) -> str:
+        """Empreinte du fichier, recalculée seulement s'il a changé"""
+        stat = path.stat()
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+        if key not in self._hashes:
+            self._hashes[key] = hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+        return self._hashes[key]
+
+    def scan(self) -> Dict[str, ModelVersion]:
+        """Versions présentes sur disque, de la plus ancienne à la plus récente"""
+        if not self.models_path.exists():
+            raise FileNotFoundError("Dossier 'models' non trouvé")
+
+        versions = {}
+        for model_file in self.models_path.glob(f"{MODEL_PREFIX}*.pkl"):
+            name = model_file.stem[len(MODEL_PREFIX) :]
+            metadata_file = self.models_path / f"{METADATA_PREFIX}{name}.json"
+            version = self._content_hash(model_file)
+            versions[version] = ModelVersion(
+                version,
+                model_file,
+                metadata_file if metadata_file.exists() else None,
+            )
+
+        return dict(sorted(versions.items(), key=lambda item: item[1].modified))
+
+    def get(self, version: str) -> ModelVersion:
+        versions = self.scan()
+        if version not in versions:
+            raise KeyError(f"Version de modèle inconnue: {version}")
+        return versions[version]
+
+    def _read_state(self) -> Dict:
+        if not self.state_file.exists():
+            return {"active": None, "history": []}
+        with open(self.state_file, "r") as f:
+            return json.load(f)
+
+    def _write_state(self, state: Dict):
+        """Écriture atomique: les autres processus lisent l'ancien ou le nouvel état"""
+        tmp_file = self.state_file.with_name(f"{STATE_FILE}.{os.getpid()}.tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(state, f, indent=2)
+        tmp_file.replace(self.state_file)
+
+    def active_version(self) -> ModelVersion:
+        """Version promue, ou à défaut la plus récente du dossier"""
+        versions = self.scan()
+        if not versions:
+            raise FileNotFoundError("Aucun modèle trouvé dans 'models/'")
+
+        active = self._read_state().get("active")
+        if active in versions:
+            return versions[active]
+        if active is not None:
+            logger.warning(
+                f"Version active {active} introuvable, repli sur la plus récente"
+            )
+        return list(versions.values())[-1]
+
+    def promote(self, version: str) -> ModelVersion:
+        """Rend ``version`` active (la précédente rejoint l'historique)"""
+        target = self.get(version)
+        state = self._read_state()
+        current = state.get("active") or self.active_version().version
+        if current != version:
+            state["history"] = state.get("history", []) + [current]
+        state["active"] = version
+        self._write_state(state)
+        logger.info(f"Version {version} promue ({target.model_file.name})")
+        return target
+
+    def _history(self, versions: Dict[str, ModelVersion]) -> List[str]:
+        """Historique des versions encore présentes sur disque"""
+        history = [v for v in self._read_state().get("history", []) if v in versions]
+        if not history:
+            raise ValueError("Aucune version précédente vers laquelle revenir")
+        return history
+
+    def previous_version(self) -> ModelVersion:
+        """Version que ``rollback`` réactiverait"""
+        versions = self.scan()
+        return versions[self._history(versions)[-1]]
+
+    def rollback(self) -> ModelVersion:
+        """Réactive la version précédente de l'historique"""
+        state = self._read_state()
+        versions = self.scan()
+        history = self._history(versions)
+
+        previous = history.pop()
+        state["active"] = previous
+        state["history"] = history
+        self._write_state(state)
+        logger.info(f"Retour à la version {previous}")
+        return versions[previous]
+
+    def describe(self) -> Dict:
+        """Versions disponibles, version active et historique"""
+        versions = self.scan()
+        active = self.active_version().version if versions else None
+        history = self._read_state().get("history", [])
+        return {
+            "active": active,
+            "history": history,
+            "versions": [
+                {**model_version.to_dict(), "active": version == active}
+                for version, model_version in versions.items()
+            ],
+        }
+
+
+def main(argv: Optional[List[str]] = None):
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="🗂️ Registre des versions de modèle")
+    parser.add_argument("--models", default="models", help="Dossier des modèles")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="Lister les versions")
+    promote = commands.add_parser("promote", help="Promouvoir une version")
+    promote.add_argument("version")
+    commands.add_parser("rollback", help="Revenir à la version précédente")
+    args = parser.parse_args(argv)
+
+    registry = ModelRegistry(args.models)
+    if args.command == "promote":
+        registry.promote(args.version)
+    elif args.command == "rollback":
+        registry.rollback()
+
+    description = registry.describe()
+    for info in description["versions"]:
+        marker = "👉" if info["active"] else "  "
+        print(f"{marker} {info['version']}  {info['model_file']}")
+    if args.command != "list":
+        print("💡 Workers en cours: kill -USR1 <pid> pour appliquer sans redémarrage")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+🗃️ Cache LRU/TTL borné des prédictions
+
+Les clés combinent la version du modèle et les caractéristiques normalisées :
+un changement de modèle rend automatiquement les anciennes entrées inutilisables.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from features import BASE_FEATURE_NAMES
+
+_MISSING = object()
+
+
+def canonical_key(features: Dict, model_version: str) -> Tuple:
+    """Clé normalisée: 7420 et 7420.0 désignent la même maison"""
+    return (model_version,) + tuple(
+        float(features[name]) for name in BASE_FEATURE_NAMES
+    )
+
+
+class PredictionCache:
+    """Cache LRU avec expiration (TTL) et compteurs de hits/misses/évictions"""
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        ttl_seconds: Optional[float] = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if max_entries <= 0:
+            raise ValueError("max_entries doit être strictement positif")
+
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retourne la valeur en cache (ou ``default``) et met à jour l'ordre LRU"""
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at < self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Ajoute une valeur, en évinçant l'entrée la moins récemment utilisée"""
+        expires_at = (
+            self._clock() + self.ttl_seconds if self.ttl_seconds else float("inf")
+        )
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Vide le cache (les compteurs sont conservés)"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        """Compteurs exposés par l'API"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,273 @@
+"""
+🏭 Serveur pré-forké pour la production
+
+Le processus parent importe l'application (et donc charge le modèle) une seule
+fois, ouvre la socket d'écoute, gèle le tas avec ``gc.freeze()`` puis forke N
+workers uvicorn. Les pages du modèle restent partagées en copy-on-write : le
+ramasse-miettes des workers ne parcourt plus les objets gelés et n'y écrit
+donc pas.
+
+Signaux du parent:
+- ``SIGTERM`` / ``SIGINT``: arrêt gracieux de tous les workers
+- ``SIGHUP``: redémarrage progressif (un worker remplacé à la fois)
+- ``SIGUSR1``: relayé à tous les workers (relecture du registre de modèles)
+
+Un worker qui se termine (recyclage après ``max_requests`` requêtes ou crash)
+est relancé sur le même emplacement.
+"""
+
+import gc
+import importlib
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Délai minimal entre deux relances d'un worker qui plante au démarrage
+RESPAWN_BACKOFF = 1.0
+
+
+def load_app(app_path: str):
+    """Importe ``module:attribut`` (ex. ``api:app``)"""
+    module_name, _, attribute = app_path.partition(":")
+    module = importlib.import_module(module_name)
+    return getattr(module, attribute or "app")
+
+
+def worker_cores(n_workers: int, cpus: Optional[List[int]] = None) -> List[int]:
+    """Cœur attribué à chaque emplacement de worker (tourniquet sur les CPU)"""
+    if cpus is None:
+        cpus = sorted(os.sched_getaffinity(0))
+    return [cpus[slot % len(cpus)] for slot in range(n_workers)]
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """Ouvre la socket d'écoute partagée par tous les workers"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    # proto explicite: asyncio n'active TCP_NODELAY que sur les sockets
+    # IPPROTO_TCP (sinon Nagle + ACK retardé ajoutent ~40 ms par réponse)
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class PreforkServer:
+    """Superviseur de workers uvicorn forkés après le chargement du modèle"""
+
+    def __init__(
+        self,
+        app_path: str = "api:app",
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        workers: int = 1,
+        pin_cores: bool = False,
+        max_requests: int = 0,
+        max_requests_jitter: int = 0,
+        graceful_timeout: int = 30,
+        log_level: str = "info",
+    ):
+        if workers < 1:
+            raise ValueError("workers doit être >= 1")
+
+        self.app_path = app_path
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.pin_cores = pin_cores
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+
+        self.app = None
+        self.sock: Optional[socket.socket] = None
+        self.cores = worker_cores(workers) if pin_cores else [None] * workers
+        self.children: Dict[int, int] = {}  # pid -> emplacement
+        self.spawned_at: Dict[int, float] = {}
+        self.respawns = 0
+
+        self._stopping = False
+        self._restart_requested = False
+
+    # ------------------------------------------------------------------
+    # Parent
+    # ------------------------------------------------------------------
+
+    def run(self) -> int:
+        """Charge l'application, forke les workers et les supervise"""
+        # Pas de collecte pendant le chargement: les objets restent compacts
+        gc.disable()
+        self.app = load_app(self.app_path)
+        self.sock = bind_socket(self.host, self.port)
+
+        # Tout ce qui existe maintenant est partagé par les workers
+        gc.collect()
+        gc.freeze()
+        logger.info(
+            f"Parent {os.getpid()}: {gc.get_freeze_count()} objets gelés, "
+            f"{self.workers} workers sur {self.host}:{self.port}"
+        )
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_restart)
+        signal.signal(signal.SIGUSR1, self._handle_forward)
+        # Les workers signalent le parent après une promotion de modèle
+        os.environ["PREFORK_PARENT_PID"] = str(os.getpid())
+
+        for slot in range(self.workers):
+            self._spawn(slot)
+
+        try:
+            while not self._stopping:
+                self._reap()
+                if self._restart_requested:
+                    self._restart_requested = False
+                    self._rolling_restart()
+                time.sleep(0.2)
+        finally:
+            self._shutdown()
+            self.sock.close()
+
+        return 0
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def _handle_restart(self, signum, frame):
+        self._restart_requested = True
+
+    def _handle_forward(self, signum, frame):
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def _spawn(self, slot: int) -> int:
+        """Forke un worker pour l'emplacement donné"""
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                self._worker(slot)
+                code = 0
+            except BaseException:
+                logger.exception(f"Worker {os.getpid()} arrêté sur erreur")
+            finally:
+                os._exit(code)
+
+        self.children[pid] = slot
+        self.spawned_at[pid] = time.monotonic()
+        core = self.cores[slot]
+        logger.info(
+            f"Worker {pid} démarré (emplacement {slot}"
+            + (f", cœur {core})" if core is not None else ")")
+        )
+        return pid
+
+    def _reap(self):
+        """Récupère les workers terminés et relance leur emplacement"""
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+
+            slot = self.children.pop(pid, None)
+            started = self.spawned_at.pop(pid, time.monotonic())
+            if slot is None or self._stopping:
+                continue
+
+            code = os.waitstatus_to_exitcode(status)
+            if code == 0:
+                logger.info(f"Worker {pid} recyclé")
+            else:
+                logger.warning(f"Worker {pid} terminé avec le code {code}")
+                if time.monotonic() - started < RESPAWN_BACKOFF:
+                    time.sleep(RESPAWN_BACKOFF)
+            self.respawns += 1
+            self._spawn(slot)
+
+    def _rolling_restart(self):
+        """Remplace les workers un par un pour ne jamais perdre en capacité"""
+        logger.info("Redémarrage progressif des workers")
+        for pid, slot in list(self.children.items()):
+            if self._stopping:
+                return
+            self._spawn(slot)
+            # L'ancien worker ne doit pas être relancé par _reap
+            self.children.pop(pid, None)
+            self._terminate([pid])
+
+    def _terminate(self, pids: List[int]):
+        """SIGTERM (arrêt gracieux), puis SIGKILL après ``graceful_timeout``"""
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        deadline = time.monotonic() + self.graceful_timeout
+        remaining = set(pids)
+        while remaining and time.monotonic() < deadline:
+            for pid in list(remaining):
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    done = pid
+                if done:
+                    remaining.discard(pid)
+                    self.spawned_at.pop(pid, None)
+            time.sleep(0.05)
+
+        for pid in remaining:
+            logger.warning(f"Worker {pid} tué après {self.graceful_timeout}s")
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+
+    def _shutdown(self):
+        logger.info("Arrêt des workers")
+        pids = list(self.children)
+        self.children.clear()
+        self._terminate(pids)
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+
+    def _worker(self, slot: int):
+        """Sert l'application sur la socket héritée du parent"""
+        import uvicorn
+
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        # SIGHUP est destiné au parent; SIGUSR1 est géré par l'application
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+
+        core = self.cores[slot]
+        if core is not None:
+            os.sched_setaffinity(0, {core})
+        gc.enable()
+
+        config = uvicorn.Config(
+            self.app,
+            log_level=self.log_level,
+            limit_max_requests=self.max_requests or None,
+            limit_max_requests_jitter=self.max_requests_jitter,
+            timeout_graceful_shutdown=self.graceful_timeout,
+        )
+        uvicorn.Server(config).run(sockets=[self.sock])
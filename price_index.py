@@ -0,0 +1,353 @@
+"""
+📈 Index de prix exact, constant par morceaux en fonction de la surface
+
+Toutes les caractéristiques sauf ``area`` sont de petits entiers bornés. Pour un
+profil discret fixé, chaque split d'un arbre sur une feature dérivée de la
+surface est un seuil : le prix prédit est donc une fonction en escalier de
+``area`` sur [1 000, 20 000]. L'index précalcule, par profil, les points de
+rupture triés et la valeur de chaque marche ; une prédiction devient alors une
+simple recherche dichotomique.
+
+Usage:
+    python price_index.py --random 2000 --verify 5000
+    python price_index.py --input listings.csv --output models/price_index.npz
+"""
+
+import csv
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from features import (
+    AREA,
+    BASE_FEATURE_NAMES,
+    RAW_FEATURE_BOUNDS,
+    SIZE_LARGE_MAX,
+    SIZE_MEDIUM_MAX,
+    SIZE_SMALL_MAX,
+    FeaturePlan,
+    sample_raw_features,
+)
+
+logger = logging.getLogger(__name__)
+
+AREA_MIN, AREA_MAX = (float(bound) for bound in RAW_FEATURE_BOUNDS["area"])
+
+# Features croissantes en fonction de la surface (à profil fixé)
+MONOTONE_AREA_FEATURES = {
+    "area",
+    "area_per_room",
+    "area_bedrooms_interaction",
+    "luxury_area_interaction",
+}
+# Features constantes par catégorie de taille
+SIZE_CATEGORY_FEATURES = {
+    "size_category_small",
+    "size_category_medium",
+    "size_category_very_large",
+}
+SIZE_CATEGORY_BREAKPOINTS = [SIZE_SMALL_MAX, SIZE_MEDIUM_MAX, SIZE_LARGE_MAX]
+
+PROFILE_COLUMNS = [i for i in range(len(BASE_FEATURE_NAMES)) if i != AREA]
+
+DEFAULT_MAX_PROFILES = 4096
+
+
+def _area_splits(model, feature_names) -> Tuple[np.ndarray, np.ndarray, bool]:
+    """Parcourt les arbres et retourne les splits (feature, seuil) liés à la surface"""
+    pairs = set()
+    uses_size_category = False
+    for estimator in model.estimators_[:, 0]:
+        tree = estimator.tree_
+        internal = tree.children_left != -1
+        for feature, threshold in zip(tree.feature[internal], tree.threshold[internal]):
+            name = feature_names[feature]
+            if name in MONOTONE_AREA_FEATURES:
+                pairs.add((int(feature), float(threshold)))
+            elif name in SIZE_CATEGORY_FEATURES:
+                uses_size_category = True
+
+    pairs = sorted(pairs)
+    features = np.array([feature for feature, _ in pairs], dtype=np.intp)
+    thresholds = np.array([threshold for _, threshold in pairs], dtype=np.float64)
+    return features, thresholds, uses_size_category
+
+
+class PriceIndex:
+    """Index des marches de prix par profil discret (calcul à la demande + cache)"""
+
+    def __init__(
+        self,
+        model,
+        feature_plan: FeaturePlan,
+        predict_fn: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+        max_profiles: int = DEFAULT_MAX_PROFILES,
+    ):
+        self.model = model
+        self.feature_plan = feature_plan
+        self.predict_fn = predict_fn or model.predict
+        self.max_profiles = max_profiles
+        self.profiles: "OrderedDict[Tuple[int, ...], Tuple[np.ndarray, np.ndarray]]"
+        self.profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.split_features, self.split_thresholds, uses_size_category = _area_splits(
+            model, feature_plan.feature_names
+        )
+        self.fixed_breakpoints = np.array(
+            SIZE_CATEGORY_BREAKPOINTS if uses_size_category else [], dtype=np.float64
+        )
+        self.signature = self._model_signature()
+
+    def _model_signature(self) -> str:
+        """Empreinte du modèle: un index sauvegardé n'est valide que pour lui"""
+        probes = self.feature_plan.transform(sample_raw_features(32, seed=0))
+        digest = hashlib.sha256()
+        digest.update(self.split_features.tobytes())
+        digest.update(self.split_thresholds.tobytes())
+        digest.update(np.asarray(self.predict_fn(probes), dtype=np.float64).tobytes())
+        return digest.hexdigest()
+
+    @staticmethod
+    def profile_key(raw_row) -> Tuple[int, ...]:
+        """Clé du profil discret (toutes les colonnes brutes sauf la surface)"""
+        return tuple(int(raw_row[column]) for column in PROFILE_COLUMNS)
+
+    def _split_holds(
+        self,
+        profile_row: np.ndarray,
+        areas: np.ndarray,
+        features: np.ndarray,
+        thresholds: np.ndarray,
+    ) -> np.ndarray:
+        """Évalue ``float32(feature(area)) <= seuil`` pour chaque split, comme sklearn"""
+        raw = np.repeat(profile_row.reshape(1, -1), len(areas), axis=0)
+        raw[:, AREA] = areas
+        values = self.feature_plan.transform(raw)[np.arange(len(areas)), features]
+        return values.astype(np.float32).astype(np.float64) <= thresholds
+
+    def _breakpoints(self, profile_row: np.ndarray) -> np.ndarray:
+        """Plus grande surface satisfaisant chaque split (bissection sur les float64)"""
+        features, thresholds = self.split_features, self.split_thresholds
+        n_splits = len(features)
+        low_holds = self._split_holds(
+            profile_row, np.full(n_splits, AREA_MIN), features, thresholds
+        )
+        high_holds = self._split_holds(
+            profile_row, np.full(n_splits, AREA_MAX), features, thresholds
+        )
+        # Seuls les splits qui basculent à l'intérieur du domaine créent une marche
+        active = low_holds & ~high_holds
+        features, thresholds = features[active], thresholds[active]
+
+        # Les float64 positifs sont ordonnés comme leur représentation entière
+        low = np.full(len(features), AREA_MIN).view(np.int64)
+        high = np.full(len(features), AREA_MAX).view(np.int64)
+        while np.any(high - low > 1):
+            middle = low + (high - low) // 2
+            holds = self._split_holds(
+                profile_row, middle.view(np.float64), features, thresholds
+            )
+            low = np.where(holds, middle, low)
+            high = np.where(holds, high, middle)
+
+        breakpoints = np.concatenate([low.view(np.float64), self.fixed_breakpoints])
+        breakpoints = breakpoints[(breakpoints >= AREA_MIN) & (breakpoints < AREA_MAX)]
+        return np.unique(breakpoints)
+
+    def build_profile(self, profile_row: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Calcule les points de rupture et la valeur de chaque marche d'un profil"""
+        profile_row = np.asarray(profile_row, dtype=np.float64)
+        breakpoints = self._breakpoints(profile_row)
+
+        # Marche i = ]b[i-1], b[i]] : on l'évalue en son extrémité droite
+        representatives = np.append(breakpoints, AREA_MAX)
+        raw = np.repeat(profile_row.reshape(1, -1), len(representatives), axis=0)
+        raw[:, AREA] = representatives
+        values = np.asarray(
+            self.predict_fn(self.feature_plan.transform(raw)), dtype=np.float64
+        )
+        return breakpoints, values
+
+    def steps(self, raw_row) -> Tuple[np.ndarray, np.ndarray]:
+        """Retourne les marches du profil d'une ligne brute (avec cache LRU)"""
+        key = self.profile_key(raw_row)
+        with self._lock:
+            steps = self.profiles.get(key)
+            if steps is not None:
+                self.profiles.move_to_end(key)
+                return steps
+
+        steps = self.build_profile(np.asarray(raw_row, dtype=np.float64))
+        with self._lock:
+            self.profiles[key] = steps
+            if len(self.profiles) > self.max_profiles:
+                self.profiles.popitem(last=False)
+        return steps
+
+    def build(self, raw: np.ndarray) -> int:
+        """Précalcule les profils présents dans une matrice brute N×12"""
+        raw = np.asarray(raw, dtype=np.float64).reshape(-1, len(BASE_FEATURE_NAMES))
+        unique_rows = np.unique(raw[:, PROFILE_COLUMNS], axis=0)
+        for profile in unique_rows:
+            row = np.zeros(len(BASE_FEATURE_NAMES))
+            row[PROFILE_COLUMNS] = profile
+            self.steps(row)
+        return len(unique_rows)
+
+    def predict(self, raw) -> np.ndarray:
+        """Prédit un lot brut N×12 par recherche dichotomique dans les marches"""
+        raw = np.asarray(raw, dtype=np.float64).reshape(-1, len(BASE_FEATURE_NAMES))
+        areas = raw[:, AREA]
+        prices = np.empty(len(raw), dtype=np.float64)
+
+        in_domain = (areas >= AREA_MIN) & (areas <= AREA_MAX)
+        if not np.all(in_domain):
+            # Hors du domaine indexé: évaluation directe de l'ensemble
+            outside = ~in_domain
+            prices[outside] = self.predict_fn(self.feature_plan.transform(raw[outside]))
+
+        if len(raw) == 1:
+            if in_domain[0]:
+                breakpoints, values = self.steps(raw[0])
+                prices[0] = values[np.searchsorted(breakpoints, areas[0])]
+            return prices
+
+        rows = np.flatnonzero(in_domain)
+        profiles, inverse = np.unique(
+            raw[rows][:, PROFILE_COLUMNS], axis=0, return_inverse=True
+        )
+        for index in range(len(profiles)):
+            members = rows[inverse.ravel() == index]
+            breakpoints, values = self.steps(raw[members[0]])
+            prices[members] = values[np.searchsorted(breakpoints, areas[members])]
+        return prices
+
+    def verify(self, n_samples: int = 1000, seed: int = 0) -> Dict:
+        """Compare l'index à ``predict_fn`` sur des échantillons aléatoires"""
+        raw = sample_raw_features(n_samples, seed=seed)
+        # Inclure des surfaces exactement sur les points de rupture connus
+        for row in raw[: n_samples // 4]:
+            breakpoints, _ = self.steps(row)
+            if len(breakpoints):
+                row[AREA] = breakpoints[len(breakpoints) // 2]
+
+        expected = np.asarray(self.predict_fn(self.feature_plan.transform(raw)))
+        actual = self.predict(raw)
+        errors = np.abs(actual - expected)
+        return {
+            "samples": n_samples,
+            "mismatches": int(np.count_nonzero(errors)),
+            "max_abs_error": float(errors.max()) if n_samples else 0.0,
+            "profiles_cached": len(self.profiles),
+        }
+
+    def save(self, path) -> None:
+        """Sauvegarde les profils calculés dans un fichier .npz"""
+        keys = list(self.profiles)
+        breakpoints = [self.profiles[key][0] for key in keys]
+        values = [self.profiles[key][1] for key in keys]
+        offsets = np.cumsum([0] + [len(b) for b in breakpoints])
+        np.savez_compressed(
+            path,
+            signature=np.array(self.signature),
+            profiles=np.array(keys, dtype=np.int64).reshape(-1, len(PROFILE_COLUMNS)),
+            offsets=offsets,
+            breakpoints=np.concatenate(breakpoints) if keys else np.empty(0),
+            values=np.concatenate(values) if keys else np.empty(0),
+        )
+
+    def load(self, path) -> int:
+        """Charge des profils précalculés (les marches restent exactes pour ce modèle)
+
+        Le fichier suit l'ordre LRU de ``save`` : au-delà de ``max_profiles``,
+        seuls les profils les plus récemment utilisés sont gardés.
+        """
+        with np.load(path) as data:
+            if str(data["signature"]) != self.signature:
+                raise ValueError(f"Index {path} construit pour un autre modèle")
+            offsets = data["offsets"]
+            profiles = data["profiles"]
+            first = max(0, len(profiles) - self.max_profiles)
+            with self._lock:
+                for index in range(first, len(profiles)):
+                    start, stop = offsets[index], offsets[index + 1]
+                    self.profiles[tuple(int(v) for v in profiles[index])] = (
+                        data["breakpoints"][start:stop],
+                        data["values"][start + index : stop + index + 1],
+                    )
+                while len(self.profiles) > self.max_profiles:
+                    self.profiles.popitem(last=False)
+        return len(self.profiles)
+
+
+def _read_raw_features(path: Path) -> np.ndarray:
+    """Lit des caractéristiques brutes depuis un fichier CSV ou JSONL"""
+    with open(path, "r") as f:
+        if path.suffix == ".jsonl":
+            records = [json.loads(line) for line in f if line.strip()]
+        else:
+            records = list(csv.DictReader(f))
+    return np.array(
+        [[float(record[name]) for name in BASE_FEATURE_NAMES] for record in records],
+        dtype=np.float64,
+    ).reshape(-1, len(BASE_FEATURE_NAMES))
+
+
+def main():
+    """Construit (et vérifie) l'index de prix hors ligne"""
+    import argparse
+    import time
+    import warnings
+
+    from api import HousePricePredictor
+
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+
+    parser = argparse.ArgumentParser(description="📈 Construction de l'index de prix")
+    parser.add_argument("--input", type=Path, help="Fichier CSV/JSONL de maisons")
+    parser.add_argument(
+        "--random", type=int, default=0, help="Nombre de profils aléatoires à indexer"
+    )
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=Path("models") / "price_index.npz",
+        help="Fichier de sortie (défaut: models/price_index.npz)",
+    )
+    parser.add_argument(
+        "--verify", type=int, default=0, help="Échantillons de vérification"
+    )
+    args = parser.parse_args()
+
+    predictor = HousePricePredictor()
+    index = PriceIndex(predictor.model, predictor.feature_plan)
+    print(f"📋 {len(index.split_features)} splits dépendant de la surface")
+
+    start = time.perf_counter()
+    count = 0
+    if args.input:
+        count += index.build(_read_raw_features(args.input))
+    if args.random:
+        count += index.build(sample_raw_features(args.random, seed=0))
+    if count:
+        elapsed = time.perf_counter() - start
+        print(f"✅ {count} profils indexés en {elapsed:.1f}s")
+        index.save(args.output)
+        print(f"💾 Index sauvegardé: {args.output}")
+
+    if args.verify:
+        report = index.verify(args.verify)
+        print(f"🔍 Vérification: {report}")
+        if report["mismatches"]:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
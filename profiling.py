@@ -0,0 +1,250 @@
+"""
+🔬 Profilage échantillonné des requêtes
+
+Désactivé par défaut. Une requête est profilée si elle est tirée au sort
+(``PROFILE_SAMPLE_RATE``, entre 0 et 1) ou si elle porte l'en-tête
+``X-Profile-Token`` égal à ``PROFILE_TOKEN`` (appelants de confiance).
+Le profil (durée et temps CPU par étape, fonctions les plus coûteuses selon
+cProfile) est gardé dans un tampon circulaire de ``PROFILE_BUFFER_SIZE``
+entrées, consultable et téléchargeable via ``/admin/profiles`` avec le même
+en-tête ``X-Profile-Token`` (sans ``PROFILE_TOKEN``, la consultation est
+refusée).
+
+Profilage désactivé, le middleware rend la main après une comparaison et
+les points de mesure des étapes (``metrics.stage_start`` et
+``metrics.observe_stage``) ne lisent qu'une ``ContextVar``.
+
+Limites: une seule requête profilée à la fois par processus (un seul
+profileur actif par thread); pendant les ``await``, le profileur de la
+boucle d'événements voit aussi les autres requêtes servies; l'inférence
+exécutée dans un pool de processus ou par le micro-batcher n'est pas
+profilée. Chaque worker (``run_api.py --workers``) a son propre tampon.
+"""
+
+import cProfile
+import hmac
+import io
+import itertools
+import marshal
+import os
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Deque, Dict, List, Optional
+
+SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+TOKEN = os.getenv("PROFILE_TOKEN", "")
+BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "50"))
+TOP_FUNCTIONS = int(os.getenv("PROFILE_TOP_FUNCTIONS", "25"))
+
+TOKEN_HEADER = b"x-profile-token"
+# Les routes de consultation ne sont jamais profilées
+EXCLUDED_PREFIX = "/admin/profiles"
+
+# Session de la requête en cours de profilage (None sinon)
+current: ContextVar[Optional["ProfileSession"]] = ContextVar(
+    "profile_session", default=None
+)
+
+profiles: Deque[Dict] = deque(maxlen=BUFFER_SIZE)
+_ids = itertools.count(1)
+
+
+def _function_name(func) -> str:
+    filename, line, name = func
+    if filename == "~":  # fonction C
+        return name
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+class ProfileSession:
+    """Mesures d'une requête profilée (étapes, temps CPU, profileurs cProfile)"""
+
+    def __init__(self, trigger: str, method: str, path: str):
+        self.trigger = trigger
+        self.method = method
+        self.path = path
+        self.stages: Dict[str, Dict] = {}
+        self._cpu_marks: Dict[int, float] = {}
+        self._profilers: List[cProfile.Profile] = []
+        self._pool_cpu = 0.0
+
+    def begin_stage(self):
+        """Note le temps CPU du thread courant au début d'une étape"""
+        self._cpu_marks[threading.get_ident()] = time.thread_time()
+
+    def end_stage(self, stage: str, wall: float):
+        """Ajoute la durée d'une étape et le temps CPU depuis ``begin_stage``"""
+        mark = self._cpu_marks.pop(threading.get_ident(), None)
+        cpu = time.thread_time() - mark if mark is not None else 0.0
+        entry = self.stages.setdefault(
+            stage, {"calls": 0, "wall_ms": 0.0, "cpu_ms": 0.0}
+        )
+        entry["calls"] += 1
+        entry["wall_ms"] += wall * 1000
+        entry["cpu_ms"] += cpu * 1000
+
+    def _profiler(self) -> Optional[cProfile.Profile]:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Un profileur global est déjà actif (Python 3.12+): il voit ce thread
+            return None
+        self._profilers.append(profiler)
+        return profiler
+
+    def run_in_thread(self, func, *args):
+        """Exécute ``func(*args)`` dans un thread du pool d'inférence, profilé"""
+        token = current.set(self)
+        cpu = time.thread_time()
+        profiler = self._profiler()
+        try:
+            return func(*args)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            self._pool_cpu += time.thread_time() - cpu
+            current.reset(token)
+
+    def start(self):
+        self._start = time.perf_counter()
+        self._start_cpu = time.thread_time()
+        # Début de la validation du corps (mesurée par la route /predict)
+        self.begin_stage()
+        self._main_profiler = self._profiler()
+
+    def stop(self, status: int) -> Dict:
+        """Arrête le profilage et construit l'enregistrement du profil"""
+        if self._main_profiler is not None:
+            self._main_profiler.disable()
+        wall = time.perf_counter() - self._start
+        cpu = time.thread_time() - self._start_cpu + self._pool_cpu
+
+        stats = pstats.Stats(*self._profilers) if self._profilers else None
+        top = []
+        if stats is not None:
+            ranked = sorted(stats.stats.items(), key=lambda item: -item[1][2])
+            for func, (_, calls, tottime, cumtime, _) in ranked[:TOP_FUNCTIONS]:
+                top.append(
+                    {
+                        "function": _function_name(func),
+                        "calls": calls,
+                        "total_ms": round(tottime * 1000, 4),
+                        "cumulative_ms": round(cumtime * 1000, 4),
+                    }
+                )
+
+        return {
+            "id": next(_ids),
+            "timestamp": datetime.now().isoformat(),
+            "pid": os.getpid(),
+            "method": self.method,
+            "path": self.path,
+            "status": status,
+            "trigger": self.trigger,
+            "wall_ms": round(wall * 1000, 4),
+            "cpu_ms": round(cpu * 1000, 4),
+            "stages": {
+                name: {key: round(value, 4) for key, value in entry.items()}
+                for name, entry in self.stages.items()
+            },
+            "top_functions": top,
+            # Format de pstats.Stats.dump_stats (snakeviz, pstats.Stats(fichier))
+            "stats": marshal.dumps(stats.stats) if stats is not None else None,
+        }
+
+
+def _trigger(scope) -> Optional[str]:
+    """Raison de profiler cette requête, ou None"""
+    if TOKEN:
+        for name, value in scope["headers"]:
+            if name == TOKEN_HEADER:
+                if hmac.compare_digest(value, TOKEN.encode()):
+                    return "header"
+                break
+    if SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE:
+        return "sample"
+    return None
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI: profile les requêtes échantillonnées ou demandées"""
+
+    def __init__(self, app):
+        self.app = app
+        self._busy = False
+
+    async def __call__(self, scope, receive, send):
+        if (
+            (SAMPLE_RATE <= 0 and not TOKEN)
+            or scope["type"] != "http"
+            or self._busy
+            or scope["path"].startswith(EXCLUDED_PREFIX)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        trigger = _trigger(scope)
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession(trigger, scope["method"], scope["path"])
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self._busy = True
+        token = current.set(session)
+        session.start()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            record = session.stop(status)
+            current.reset(token)
+            self._busy = False
+            profiles.append(record)
+
+
+def summaries() -> List[Dict]:
+    """Profils du tampon, du plus récent au plus ancien (sans les fonctions)"""
+    return [
+        {
+            key: value
+            for key, value in record.items()
+            if key not in ("top_functions", "stats")
+        }
+        for record in reversed(profiles)
+    ]
+
+
+def get_profile(profile_id: int) -> Optional[Dict]:
+    for record in list(profiles):
+        if record["id"] == profile_id:
+            return record
+    return None
+
+
+def profile_text(record: Dict, limit: int = TOP_FUNCTIONS) -> str:
+    """Rapport texte de pstats (tri par temps propre)"""
+    if record["stats"] is None:
+        return ""
+    stream = io.StringIO()
+    stats = pstats.Stats(stream=stream)
+    stats.stats = marshal.loads(record["stats"])
+    stats.get_top_level_stats()
+    stats.sort_stats("tottime").print_stats(limit)
+    return stream.getvalue()
+
+
+def clear():
+    profiles.clear()
@@ -104,6 +104,56 @@ def launch_api(host="127.0.0.1", port=8000, reload=True):
         return False
 
 
+def launch_production(
+    host="0.0.0.0",
+    port=8000,
+    workers=1,
+    pin_cores=False,
+    max_requests=0,
+    max_requests_jitter=0,
+    graceful_timeout=30,
+):
+    """Lance l'API en production: N workers pré-forkés partageant le modèle"""
+
+    print("🔍 Vérification des prérequis...")
+
+    if not check_dependencies():
+        return False
+
+    if not check_model_files():
+        return False
+
+    print("✅ Tous les prérequis sont satisfaits")
+    print()
+
+    from prefork import PreforkServer
+
+    if os.getenv("METRICS_DIR"):
+        import metrics
+
+        # Les compteurs d'une exécution précédente ne sont pas agrégés
+        metrics.clear_snapshots()
+        print(f"📈 Métriques agrégées via {metrics.METRICS_DIR}")
+
+    print(f"🏭 Lancement de {workers} workers pré-forkés...")
+    print(f"🌐 URL: http://{host}:{port}")
+    print("🔄 Redémarrage progressif: kill -HUP " + str(os.getpid()))
+    print("🛑 Pour arrêter l'API: Ctrl+C")
+    print("=" * 50)
+
+    server = PreforkServer(
+        app_path="api:app",
+        host=host,
+        port=port,
+        workers=workers,
+        pin_cores=pin_cores,
+        max_requests=max_requests,
+        max_requests_jitter=max_requests_jitter,
+        graceful_timeout=graceful_timeout,
+    )
+    return server.run() == 0
+
+
 def main():
     """Fonction principale"""
     import argparse
@@ -123,12 +173,53 @@ def main():
         help="Désactiver le rechargement automatique",
     )
 
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Mode production: nombre de workers pré-forkés (défaut: 0 = mode dev)",
+    )
+    parser.add_argument(
+        "--pin-cores",
+        action="store_true",
+        help="Épingler chaque worker sur un cœur (mode production)",
+    )
+    parser.add_argument(
+        "--max-requests",
+        type=int,
+        default=0,
+        help="Recycler un worker après N requêtes (défaut: 0 = jamais)",
+    )
+    parser.add_argument(
+        "--max-requests-jitter",
+        type=int,
+        default=0,
+        help="Aléa ajouté à --max-requests pour étaler les recyclages",
+    )
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=30,
+        help="Délai d'arrêt gracieux d'un worker en secondes (défaut: 30)",
+    )
+
     args = parser.parse_args()
 
     print("🏠 House Price Predictor API Launcher")
     print("=" * 40)
 
-    success = launch_api(host=args.host, port=args.port, reload=not args.no_reload)
+    if args.workers > 0:
+        success = launch_production(
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            pin_cores=args.pin_cores,
+            max_requests=args.max_requests,
+            max_requests_jitter=args.max_requests_jitter,
+            graceful_timeout=args.graceful_timeout,
+        )
+    else:
+        success = launch_api(host=args.host, port=args.port, reload=not args.no_reload)
 
     if success:
         print("✅ API lancée avec succès")
@@ -0,0 +1,264 @@
+"""
+👥 Scoring fantôme des modèles candidats sur le trafic réel
+
+Les autres versions du dossier ``models/`` (Random Forest, Extra Trees...
+entraînés par ``03_modeling_evaluation.ipynb``) prédisent une fraction des
+requêtes servies, sans jamais répondre au client. Le chemin de la requête ne
+fait que tirer au sort et déposer la matrice déjà validée et les prix servis
+dans une file ; au-delà de ``max_pending`` lots en attente, la requête n'est
+pas rejouée (compteur ``skipped``). Un thread dédié vide la file par blocs
+d'environ ``chunk_rows`` lignes, prédits d'un seul appel par candidat : le
+coût fixe d'un ``predict`` scikit-learn, qui domine pour une ligne, est
+partagé.
+
+Pour chaque candidat, l'écart au prix servi (biais, MAE, RMSE, MAPE, écart
+maximal) et la latence de prédiction sont cumulés en flux, en mémoire
+constante. Les statistiques repartent de zéro quand la version servie
+change. Les prédictions fantômes ne comptent pas dans les métriques
+d'inférence du service.
+"""
+
+import json
+import logging
+import math
+import pickle
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+import metrics
+from features import FeaturePlan
+from model_registry import ModelRegistry, ModelVersion
+
+logger = logging.getLogger(__name__)
+
+
+class ShadowModel:
+    """Version candidate chargée pour le scoring fantôme"""
+
+    def __init__(self, version: ModelVersion):
+        self.version = version.version
+        self.name = version.name
+        self.model = pickle.loads(version.model_file.read_bytes())
+        self.model_type = type(self.model).__name__
+
+        feature_names = None
+        if version.metadata_file is not None:
+            with open(version.metadata_file, "r") as f:
+                feature_names = json.load(f).get("data_info", {}).get("feature_names")
+        self.feature_plan = FeaturePlan(feature_names)
+
+    def predict(self, raw: np.ndarray) -> np.ndarray:
+        """Prix d'une matrice brute N×12 déjà validée"""
+        return self.model.predict(self.feature_plan.transform(raw))
+
+
+def load_candidates(
+    registry: ModelRegistry, selection: Iterable[str] = ()
+) -> List[ShadowModel]:
+    """Versions du registre à rejouer (toutes, ou celles de ``selection``)
+
+    ``selection`` accepte des noms (``random_forest``) ou des versions. La
+    version servie est ignorée au scoring, elle peut donc figurer ici.
+    """
+    wanted = set(selection)
+    candidates = []
+    for version in registry.scan().values():
+        if wanted and not wanted & {version.name, version.version}:
+            continue
+        try:
+            candidates.append(ShadowModel(version))
+        except Exception as e:
+            logger.warning(f"Candidat {version.name} non chargé: {e}")
+    return candidates
+
+
+def _quantile(histogram: metrics.Histogram, q: float) -> Optional[float]:
+    """Borne supérieure de l'intervalle contenant le quantile ``q``"""
+    total = sum(histogram.counts)
+    if not total:
+        return None
+    target, seen = q * total, 0
+    for bound, count in zip(histogram.bounds + (math.inf,), histogram.counts):
+        seen += count
+        if seen >= target:
+            return bound
+    return math.inf
+
+
+class ShadowStats:
+    """Écarts au prix servi et latence d'un candidat, cumulés en flux"""
+
+    def __init__(self):
+        self.batches = 0
+        self.rows = 0
+        self.failures = 0
+        self.error_sum = 0.0
+        self.abs_error_sum = 0.0
+        self.squared_error_sum = 0.0
+        self.relative_error_sum = 0.0
+        self.max_abs_error = 0.0
+        self.latency = metrics.Histogram()
+
+    def update(self, prices: np.ndarray, served: np.ndarray, seconds: float):
+        errors = prices - served
+        abs_errors = np.abs(errors)
+        self.batches += 1
+        self.rows += len(errors)
+        self.error_sum += float(errors.sum())
+        self.abs_error_sum += float(abs_errors.sum())
+        self.squared_error_sum += float(errors @ errors)
+        self.relative_error_sum += float((abs_errors / np.abs(served)).sum())
+        self.max_abs_error = max(self.max_abs_error, float(abs_errors.max()))
+        self.latency.observe(seconds)
+
+    def to_dict(self) -> Dict:
+        rows = self.rows or 1
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "failures": self.failures,
+            "mean_error": self.error_sum / rows,
+            "mae": self.abs_error_sum / rows,
+            "rmse": math.sqrt(self.squared_error_sum / rows),
+            "mape": 100 * self.relative_error_sum / rows,
+            "max_abs_error": self.max_abs_error,
+            "error_sum": self.error_sum,
+            "abs_error_sum": self.abs_error_sum,
+            "squared_error_sum": self.squared_error_sum,
+            "latency": {
+                "mean_ms": 1000 * self.latency.sum / (self.batches or 1),
+                "p50_ms": _ms(_quantile(self.latency, 0.5)),
+                "p99_ms": _ms(_quantile(self.latency, 0.99)),
+                "per_row_us": 1e6 * self.latency.sum / rows,
+                "seconds_sum": self.latency.sum,
+            },
+        }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    # Au-delà du dernier intervalle: valeur inconnue (et JSON standard)
+    return None if seconds is None or math.isinf(seconds) else 1000 * seconds
+
+
+class ShadowScorer:
+    """Rejoue une fraction des lots servis sur les candidats, hors requête"""
+
+    def __init__(
+        self,
+        candidates: List[ShadowModel],
+        fraction: float = 0.1,
+        max_pending: int = 256,
+        chunk_rows: int = 32,
+    ):
+        if not 0 <= fraction <= 1:
+            raise ValueError("La fraction rejouée doit être comprise entre 0 et 1")
+        self.candidates = candidates
+        self.fraction = fraction
+        self.max_pending = max_pending
+        self.chunk_rows = chunk_rows
+        self.primary: Optional[str] = None
+        self.stats: Dict[str, ShadowStats] = {}
+        self.submitted = 0
+        self.skipped = 0
+        self._queue = deque()
+        self._scheduled = False
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+
+    def submit(self, raw: np.ndarray, prices: np.ndarray, primary: str) -> bool:
+        """Dépose un lot servi (non modifié ensuite) ; False s'il n'est pas rejoué"""
+        if not self.candidates or random.random() >= self.fraction:
+            return False
+        with self._lock:
+            if primary != self.primary:
+                self.primary, self.stats = primary, {}
+            if len(self._queue) >= self.max_pending:
+                self.skipped += 1
+                return False
+            self._queue.append((raw, prices, primary))
+            self.submitted += 1
+            schedule, self._scheduled = not self._scheduled, True
+        if schedule:
+            self._pool.submit(self._drain)
+        return True
+
+    def _drain(self):
+        """Prédit les lots en attente, regroupés par blocs de ``chunk_rows``
+
+        Un bloc est prédit d'un seul appel par candidat ; sa taille bornée
+        limite la durée pendant laquelle le GIL échappe à la boucle
+        d'événements.
+        """
+        while True:
+            with self._lock:
+                if not self._queue:
+                    self._scheduled = False
+                    return
+                primary, group, rows = self._queue[0][2], [], 0
+                while self._queue and rows < self.chunk_rows:
+                    if self._queue[0][2] != primary:
+                        break
+                    raw, prices, _ = self._queue.popleft()
+                    group.append((raw, prices))
+                    rows += len(raw)
+            self._score(
+                np.concatenate([raw for raw, _ in group]),
+                np.concatenate([prices for _, prices in group]),
+                primary,
+            )
+
+    def _score(self, raw: np.ndarray, prices: np.ndarray, primary: str):
+        for candidate in self.candidates:
+            if candidate.version == primary:
+                continue
+            start = time.perf_counter()
+            try:
+                shadow_prices = candidate.predict(raw)
+            except Exception as e:
+                self._stats(candidate, primary).failures += 1
+                logger.warning(f"Échec du candidat {candidate.name}: {e}")
+                continue
+            elapsed = time.perf_counter() - start
+            self._stats(candidate, primary).update(shadow_prices, prices, elapsed)
+
+    def _stats(self, candidate: ShadowModel, primary: str) -> ShadowStats:
+        with self._lock:
+            # Lot d'une version remplacée entre-temps: statistiques écartées
+            if primary != self.primary:
+                return ShadowStats()
+            return self.stats.setdefault(candidate.version, ShadowStats())
+
+    def snapshot(self) -> Dict:
+        """Compteurs et statistiques par candidat (sérialisable en JSON)"""
+        names = {c.version: (c.name, c.model_type) for c in self.candidates}
+        with self._lock:
+            stats = dict(self.stats)
+        return {
+            "primary": self.primary,
+            "fraction": self.fraction,
+            "submitted": self.submitted,
+            "skipped": self.skipped,
+            "pending": len(self._queue),
+            "candidates": {
+                version: {
+                    "name": names[version][0],
+                    "model_type": names[version][1],
+                    **item.to_dict(),
+                }
+                for version, item in stats.items()
+            },
+        }
+
+    def wait(self):
+        """Attend la fin des lots en cours (tests et benchmarks)"""
+        while self._scheduled:
+            time.sleep(0.001)
+
+    def close(self):
+        self._pool.shutdown(wait=True)
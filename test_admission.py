@@ -0,0 +1,150 @@
+"""
+🧪 Tests du contrôle d'admission
+"""
+
+import asyncio
+
+import pytest
+
+from admission import AdmissionController, AdmissionMiddleware
+
+
+def _slow_app(delay: float):
+    async def app(scope, receive, send):
+        await asyncio.sleep(delay)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    return app
+
+
+async def _call(app, path: str):
+    scope = {"type": "http", "method": "POST", "path": path, "headers": []}
+    response = {}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = dict(message["headers"])
+
+    await app(scope, receive, send)
+    return response
+
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        AdmissionController(initial_limit=1, min_limit=2)
+    with pytest.raises(ValueError):
+        AdmissionController(tolerance=0.5)
+
+
+def test_requests_queue_then_are_shed():
+    controller = AdmissionController(
+        initial_limit=2, min_limit=1, max_limit=2, queue_timeout_ms=30, max_queue=2
+    )
+    app = AdmissionMiddleware(_slow_app(0.1), controller)
+
+    async def main():
+        return await asyncio.gather(*(_call(app, "/predict") for _ in range(6)))
+
+    responses = asyncio.run(main())
+    statuses = sorted(response["status"] for response in responses)
+
+    # 2 en cours, 2 en file (budget de 30 ms dépassé), 2 rejetés d'emblée
+    assert statuses == [200, 200, 503, 503, 503, 503]
+    shed = [r for r in responses if r["status"] == 503]
+    assert all(int(r["headers"][b"retry-after"]) >= 1 for r in shed)
+    stats = controller.stats()
+    assert stats["admitted"] == 2 and stats["rejected"] == 4
+    assert stats["timed_out"] == 2 and stats["in_flight"] == 0
+    assert stats["queue_depth"] == 0
+
+
+def test_queued_request_gets_the_released_slot():
+    controller = AdmissionController(
+        initial_limit=1, min_limit=1, max_limit=1, queue_timeout_ms=500
+    )
+    app = AdmissionMiddleware(_slow_app(0.02), controller)
+
+    async def main():
+        return await asyncio.gather(*(_call(app, "/predict") for _ in range(3)))
+
+    assert [r["status"] for r in asyncio.run(main())] == [200, 200, 200]
+    assert controller.stats()["queued"] == 2
+
+
+def test_other_routes_bypass_admission():
+    controller = AdmissionController(
+        initial_limit=1, min_limit=1, max_limit=1, max_queue=0
+    )
+    app = AdmissionMiddleware(_slow_app(0), controller)
+
+    async def main():
+        # Place occupée, file nulle: /predict rejeté, /health servi
+        controller._ensure_loop()
+        controller.in_flight = 1
+        return await _call(app, "/health"), await _call(app, "/predict")
+
+    health, predict = asyncio.run(main())
+    assert health["status"] == 200 and predict["status"] == 503
+
+
+def test_streams_have_their_own_bound():
+    controller = AdmissionController(
+        initial_limit=1, min_limit=1, max_limit=1, max_queue=0, max_streams=2
+    )
+    app = AdmissionMiddleware(_slow_app(0.05), controller)
+
+    async def main():
+        streams = [
+            asyncio.ensure_future(_call(app, "/predict/stream")) for _ in range(3)
+        ]
+        await asyncio.sleep(0.01)
+        # Flux en cours: la place de /predict reste libre
+        predict = await _call(app, "/predict")
+        return predict, await asyncio.gather(*streams)
+
+    predict, streams = asyncio.run(main())
+    assert predict["status"] == 200
+    assert sorted(r["status"] for r in streams) == [200, 200, 503]
+    stats = controller.stats()
+    assert stats["streams"] == 0 and stats["streams_rejected"] == 1
+    assert stats["admitted"] == 1
+
+
+def test_limit_adapts_to_inference_latency():
+    controller = AdmissionController(
+        initial_limit=16, min_limit=2, max_limit=64, window=2
+    )
+
+    def observe(n, latency):
+        for _ in range(n):
+            controller.observe("predict", latency)
+            # Un lot est plus long sans être un signe de surcharge
+            controller.observe("predict_batch", latency * 20)
+
+    observe(8, 0.001)
+    assert controller.stats()["limit"] == 16  # limite jamais atteinte
+
+    # Latence 5 fois la latence à vide: la limite baisse
+    observe(8, 0.005)
+    assert controller.stats()["limit"] < 16
+
+    # Latence revenue à la normale et limite atteinte: elle remonte
+    limit = controller.limit
+    controller._peak_in_flight = int(limit)
+    observe(4, 0.001)
+    assert controller.limit > limit
+
+
+def test_admission_stats_endpoint():
+    from fastapi.testclient import TestClient
+
+    import api
+
+    response = TestClient(api.app).get("/admission/stats")
+    assert response.status_code == 200
+    assert response.json()["enabled"] is (api.admission is not None)
@@ -6,6 +6,8 @@ Ce script teste rapidement le service de prédiction sans lancer l'API complète
 
 import json
 import pickle
+import warnings
+from contextlib import contextmanager
 from pathlib import Path
 import sys
 import os
@@ -108,6 +110,248 @@ def test_prediction():
         return False
 
 
+EXAMPLE_HOUSE = {
+    "area": 7420,
+    "bedrooms": 4,
+    "bathrooms": 1,
+    "stories": 3,
+    "mainroad": 1,
+    "guestroom": 0,
+    "basement": 0,
+    "hotwaterheating": 0,
+    "airconditioning": 1,
+    "parking": 2,
+    "prefarea": 1,
+    "furnishingstatus": 1,
+}
+
+
+@contextmanager
+def strict_warnings():
+    """Toute alerte devient une erreur (sérialisation des réponses comprise)
+
+    Restent tolérées les dépréciations (API pydantic v1 utilisée par le
+    service) et l'alerte de scikit-learn sur les matrices sans noms de
+    colonnes.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        warnings.filterwarnings("ignore", category=DeprecationWarning)
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        yield
+
+
+def _make_predictor(**kwargs):
+    """Construit un HousePricePredictor à partir du modèle sauvegardé"""
+    from api import HousePricePredictor
+
+    model, metadata = load_model()
+    return HousePricePredictor(
+        model=model, feature_names=metadata["data_info"]["feature_names"], **kwargs
+    )
+
+
+def test_predict_batch_matches_single():
+    """La prédiction en lot doit reproduire la prédiction unitaire"""
+    predictor = _make_predictor()
+    houses = [
+        EXAMPLE_HOUSE,
+        {**EXAMPLE_HOUSE, "area": 2500, "bedrooms": 2, "parking": 0},
+        {**EXAMPLE_HOUSE, "area": 15000, "prefarea": 0, "furnishingstatus": 2},
+    ]
+
+    results = predictor.predict_batch(houses)
+
+    assert [item["index"] for item in results] == [0, 1, 2]
+    for house, item in zip(houses, results):
+        assert item["error"] is None
+        expected = predictor.predict(house)["price"]
+        assert abs(item["prediction"]["price"] - expected) < 1e-6
+
+
+def test_predict_batch_row_errors():
+    """Une ligne invalide ne doit pas faire échouer le lot"""
+    import numpy as np
+
+    predictor = _make_predictor()
+    valid_row = [EXAMPLE_HOUSE[name] for name in EXAMPLE_HOUSE]
+    rows = np.array([valid_row, [500] + valid_row[1:], valid_row])
+
+    results = predictor.predict_batch(rows)
+
+    assert results[0]["prediction"] is not None
+    assert results[1]["prediction"] is None
+    assert "area" in results[1]["error"]
+    assert results[2]["prediction"]["price"] == results[0]["prediction"]["price"]
+
+
+def test_batch_endpoint():
+    """Le endpoint /predict/batch retourne un résultat par ligne"""
+    from fastapi.testclient import TestClient
+
+    from api import app
+
+    client = TestClient(app)
+    response = client.post(
+        "/predict/batch",
+        json={"houses": [EXAMPLE_HOUSE, {**EXAMPLE_HOUSE, "bedrooms": 42}]},
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 2
+    assert body["success_count"] == 1
+    assert body["error_count"] == 1
+    assert body["results"][1]["error"].startswith("bedrooms")
+
+
+def test_predict_response_shapes():
+    """/predict renvoie la réponse complète, ou prix et confiance avec slim"""
+    from fastapi.testclient import TestClient
+
+    from api import PredictionResponse, app
+
+    client = TestClient(app)
+    full = client.post("/predict", json=EXAMPLE_HOUSE)
+    slim = client.post("/predict?slim=true", json=EXAMPLE_HOUSE)
+
+    assert full.status_code == slim.status_code == 200
+    assert PredictionResponse(**full.json()).features_used["area"] == 7420
+    assert slim.json() == {
+        "price": full.json()["price"],
+        "confidence": full.json()["confidence"],
+    }
+
+
+def test_columnar_endpoint():
+    """Le endpoint /predict/columnar donne les mêmes prix que /predict/batch"""
+    from fastapi.testclient import TestClient
+
+    from api import app
+
+    houses = [
+        EXAMPLE_HOUSE,
+        {**EXAMPLE_HOUSE, "area": 500},
+        {**EXAMPLE_HOUSE, "bedrooms": 2.5, "parking": 9},
+        {**EXAMPLE_HOUSE, "area": 3000},
+    ]
+    columns = {name: [house[name] for house in houses] for name in EXAMPLE_HOUSE}
+
+    client = TestClient(app)
+    body = client.post("/predict/columnar", json=columns).json()
+    batch = client.post("/predict/batch", json={"houses": houses}).json()
+
+    assert body["count"] == 4 and body["error_count"] == 2
+    assert [error["index"] for error in body["errors"]] == [1, 2]
+    for error, item in zip(body["errors"], [batch["results"][1], batch["results"][2]]):
+        assert error["error"] == item["error"]
+    for index in (0, 3):
+        expected = batch["results"][index]["prediction"]
+        assert body["prices"][index] == expected["price"]
+        assert body["price_per_sqft"][index] == expected["price_per_sqft"]
+    assert body["prices"][1] is None and body["price_per_sqft"][2] is None
+
+    del columns["parking"]
+    body = client.post("/predict/columnar", json=columns).json()
+    assert body["error_count"] == 4
+    assert body["errors"][0]["error"] == "parking: Field required"
+
+    columns["area"] = columns["area"][:2]
+    assert client.post("/predict/columnar", json=columns).status_code == 422
+
+
+def test_sweep_endpoint():
+    """Le endpoint /predict/sweep reproduit /predict point par point"""
+    from fastapi.testclient import TestClient
+
+    from api import app
+
+    client = TestClient(app)
+    request = {
+        "base": EXAMPLE_HOUSE,
+        "axes": [
+            {"feature": "area", "start": 2000, "stop": 8000, "steps": 4},
+            {"feature": "furnishingstatus", "values": [0, 2]},
+        ],
+    }
+    with strict_warnings():
+        body = client.post("/predict/sweep", json=request).json()
+
+    assert body["shape"] == [4, 2] and body["count"] == 8
+    assert body["axes"][0]["values"] == [2000, 4000, 6000, 8000]
+    for i, area in enumerate(body["axes"][0]["values"]):
+        for j, status in enumerate(body["axes"][1]["values"]):
+            house = {**EXAMPLE_HOUSE, "area": area, "furnishingstatus": int(status)}
+            expected = client.post("/predict", json=house).json()["price"]
+            assert body["prices"][i][j] == expected
+    assert body["min_price"] == min(min(row) for row in body["prices"])
+
+    # Plage d'entiers sans steps: chaque entier
+    request["axes"] = [{"feature": "bedrooms", "start": 1, "stop": 6}]
+    body = client.post("/predict/sweep", json=request).json()
+    assert body["axes"][0]["values"] == [1, 2, 3, 4, 5, 6]
+    assert len(body["prices"]) == 6
+
+    invalid_axes = [
+        [{"feature": "area", "start": 500, "stop": 2000}],
+        [{"feature": "parking", "values": [1.5]}],
+        [{"feature": "price", "values": [1]}],
+        [{"feature": "area"}],
+        [{"feature": "area", "values": [2000]}, {"feature": "area", "values": [3000]}],
+        [{"feature": "area", "start": 1000, "stop": 20000, "steps": 10**6}],
+        [],
+    ]
+    for axes in invalid_axes:
+        response = client.post("/predict/sweep", json={**request, "axes": axes})
+        assert response.status_code == 422, axes
+
+
+def test_stream_endpoint(monkeypatch):
+    """Le endpoint /predict/stream répond une ligne NDJSON par ligne reçue"""
+    from fastapi.testclient import TestClient
+
+    import api
+
+    monkeypatch.setattr(api, "STREAM_CHUNK_SIZE", 2)
+    monkeypatch.setattr(api, "STREAM_MAX_LINE_BYTES", 1000)
+    lines = [
+        json.dumps(EXAMPLE_HOUSE),
+        "",
+        json.dumps({**EXAMPLE_HOUSE, "bedrooms": 42}),
+        "{pas du json",
+        json.dumps({**EXAMPLE_HOUSE, "area": 2500}),
+        json.dumps({**EXAMPLE_HOUSE, "note": "x" * 2000}),
+        json.dumps(EXAMPLE_HOUSE),
+    ]
+
+    client = TestClient(api.app)
+    response = client.post("/predict/stream", content="\n".join(lines))
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [item["index"] for item in results] == list(range(6))
+    assert [item["error"] is None for item in results] == [
+        True,
+        False,
+        False,
+        True,
+        False,
+        True,
+    ]
+    assert results[1]["error"].startswith("bedrooms")
+    assert results[2]["error"].startswith("JSON invalide")
+    assert results[4]["error"].startswith("Ligne de plus de")
+    assert results[5]["prediction"]["price"] == results[0]["prediction"]["price"]
+
+    # Ligne trop longue reçue en plusieurs morceaux: ignorée jusqu'au saut de ligne
+    chunks = [b'{"note": "' + b"x" * 1500, b"x" * 1500, b'"}\n', lines[0].encode()]
+    response = client.post("/predict/stream", content=iter(chunks))
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert results[0]["error"].startswith("Ligne de plus de")
+    assert results[1]["index"] == 1 and results[1]["error"] is None
+
+
 def main():
     """Fonction principale"""
     print("🏠 House Price Predictor - Test Rapide")
@@ -0,0 +1,129 @@
+"""
+🧪 Tests du journal d'audit des prédictions
+"""
+
+import asyncio
+import gzip
+import json
+import threading
+import time
+
+import numpy as np
+
+from audit import AuditLog
+from test_api import EXAMPLE_HOUSE
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_records_written_in_batches(tmp_path):
+    log = AuditLog(tmp_path, batch_size=4, flush_interval=60)
+    log.start()
+    for i in range(10):
+        assert log.record({"index": i, "inputs": np.array([1.0, np.nan])})
+    log.close()
+
+    (path,) = tmp_path.glob("audit-*.jsonl")
+    records = _lines(path)
+    assert [r["index"] for r in records] == list(range(10))
+    assert records[0]["inputs"] == [1.0, None]
+    stats = log.stats()
+    assert stats["written"] == 10 and stats["queue_depth"] == 0
+    assert stats["batches"] >= 3 and stats["bytes_written"] == path.stat().st_size
+
+
+def test_full_queue_policies(tmp_path):
+    # Sans thread d'écriture la file ne se vide pas
+    dropping = AuditLog(tmp_path, policy="drop", max_queue=8)
+    accepted = sum(dropping.record({"i": i}) for i in range(20))
+    assert accepted == 8 and dropping.stats()["dropped"] == 12
+
+    sampling = AuditLog(tmp_path, policy="sample", max_queue=100)
+    accepted = sum(sampling.record({"i": i}) for i in range(1000))
+    stats = sampling.stats()
+    assert 50 < accepted <= 100 and stats["sampled_out"] == 1000 - accepted
+    assert stats["dropped"] == 0
+
+    blocking = AuditLog(
+        tmp_path, policy="block", max_queue=4, batch_size=2, block_timeout=5
+    )
+    blocking.start()
+    assert all(blocking.record({"i": i}) for i in range(200))
+    blocking.close()
+    assert blocking.stats()["written"] == 200
+
+
+def test_block_policy_does_not_stall_event_loop(tmp_path, monkeypatch):
+    log = AuditLog(tmp_path, policy="block", max_queue=2, batch_size=1, block_timeout=2)
+    disk = threading.Event()  # Disque bloqué jusqu'à disk.set()
+    write = log._write
+
+    def slow_write(batch):
+        disk.wait()
+        write(batch)
+
+    monkeypatch.setattr(log, "_write", slow_write)
+    log.start()
+
+    async def main():
+        assert await log.record_async({"i": 0})
+        while log.stats()["queue_depth"]:
+            await asyncio.sleep(0.001)  # Premier lot pris par l'écriture
+        assert all([await log.record_async({"i": i}) for i in (1, 2)])
+        blocked = asyncio.ensure_future(log.record_async({"i": 3}))
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        latency = time.perf_counter() - start
+        assert not blocked.done()
+        disk.set()
+        return latency, await blocked
+
+    latency, admitted = asyncio.run(main())
+    log.close()
+    # La requête auditée attend une place, les autres sont servies
+    assert latency < 0.1 and admitted
+    stats = log.stats()
+    assert stats["blocked"] == 1 and stats["dropped"] == 0 and stats["written"] == 4
+
+
+def test_rotation_compresses_files(tmp_path):
+    log = AuditLog(tmp_path, batch_size=10, flush_interval=60, max_bytes=500)
+    log.start()
+    for i in range(100):
+        log.record({"index": i, "padding": "x" * 40})
+    log.close()
+
+    archives = sorted(tmp_path.glob("audit-*.jsonl.gz"))
+    assert log.stats()["rotations"] == len(archives) >= 2
+    indices = []
+    for archive in archives:
+        with gzip.open(archive, "rt") as f:
+            indices += [json.loads(line)["index"] for line in f]
+    for path in tmp_path.glob("audit-*[0-9].jsonl"):
+        indices += [r["index"] for r in _lines(path)]
+    assert sorted(indices) == list(range(100))
+
+
+def test_predictions_are_audited(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import api
+
+    log = AuditLog(tmp_path, flush_interval=60)
+    monkeypatch.setattr(api, "audit", log)
+    log.start()
+    client = TestClient(api.app)
+    price = client.post("/predict", json=EXAMPLE_HOUSE).json()["price"]
+    client.post("/predict/batch", json={"houses": [EXAMPLE_HOUSE, {"area": -1}]})
+    assert client.get("/audit/stats").json()["enqueued"] == 2
+    log.close()
+
+    (path,) = tmp_path.glob("audit-*.jsonl")
+    single, batch = _lines(path)
+    assert single["endpoint"] == "/predict" and single["price"] == price
+    assert single["input"]["area"] == EXAMPLE_HOUSE["area"]
+    assert single["model_version"] == api.predictor.model_hash
+    assert single["latency_ms"] > 0
+    assert batch["prices"] == [price, None]
@@ -0,0 +1,123 @@
+"""
+🧪 Tests du scoring binaire (.npy / Arrow IPC)
+"""
+
+import io
+
+import numpy as np
+import pytest
+
+from binary_format import (
+    ARROW_MEDIA_TYPE,
+    NPY_MEDIA_TYPE,
+    RAW_MEDIA_TYPE,
+    UnsupportedMediaType,
+    decode_matrix,
+    decode_npy,
+    negotiate,
+)
+from features import BASE_FEATURE_NAMES, sample_raw_features
+
+
+def _npy_bytes(array) -> bytes:
+    stream = io.BytesIO()
+    np.save(stream, array)
+    return stream.getvalue()
+
+
+def test_decode_npy_is_a_view_on_the_body():
+    raw = sample_raw_features(50, seed=2)
+    body = _npy_bytes(raw)
+
+    decoded = decode_npy(body)
+
+    np.testing.assert_array_equal(decoded, raw)
+    assert not decoded.flags.owndata and not decoded.flags.writeable
+    # Ordre Fortran et entiers sont acceptés (conversion si nécessaire)
+    np.testing.assert_array_equal(decode_npy(_npy_bytes(np.asfortranarray(raw))), raw)
+    integers = raw.astype(np.int32)
+    np.testing.assert_array_equal(decode_npy(_npy_bytes(integers)), integers)
+
+    with pytest.raises(ValueError):
+        decode_npy(_npy_bytes(raw[:, :5]))
+    with pytest.raises(ValueError):
+        decode_npy(body[:-8])
+    with pytest.raises(UnsupportedMediaType):
+        decode_matrix(body, "application/json")
+
+
+def test_negotiate():
+    assert negotiate(None, NPY_MEDIA_TYPE) == NPY_MEDIA_TYPE
+    assert negotiate("*/*", NPY_MEDIA_TYPE) == NPY_MEDIA_TYPE
+    assert negotiate(f"text/html, {RAW_MEDIA_TYPE}", NPY_MEDIA_TYPE) == RAW_MEDIA_TYPE
+    with pytest.raises(UnsupportedMediaType):
+        negotiate("application/json", NPY_MEDIA_TYPE)
+
+
+def test_binary_endpoint():
+    from fastapi.testclient import TestClient
+
+    import api
+
+    raw = sample_raw_features(20, seed=3)
+    raw[5, 0] = 500  # surface hors bornes
+    expected = api.predictor.predict_prices(np.delete(raw, 5, axis=0))
+
+    client = TestClient(api.app)
+    response = client.post(
+        "/predict/binary",
+        content=_npy_bytes(raw),
+        headers={"Content-Type": NPY_MEDIA_TYPE},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == NPY_MEDIA_TYPE
+    assert response.headers["x-error-count"] == "1"
+    prices = np.load(io.BytesIO(response.content))
+    assert prices.dtype == np.float64 and np.isnan(prices[5])
+    np.testing.assert_array_equal(np.delete(prices, 5), expected)
+
+    response = client.post(
+        "/predict/binary",
+        content=_npy_bytes(raw),
+        headers={"Content-Type": NPY_MEDIA_TYPE, "Accept": RAW_MEDIA_TYPE},
+    )
+    np.testing.assert_array_equal(np.frombuffer(response.content, dtype="<f8"), prices)
+
+    headers = {"Content-Type": NPY_MEDIA_TYPE}
+    # Matrice 0×12: réponse vide, comme les lots JSON et colonnes vides
+    response = client.post(
+        "/predict/binary", content=_npy_bytes(raw[:0]), headers=headers
+    )
+    assert response.status_code == 200
+    assert response.headers["x-error-count"] == "0"
+    assert np.load(io.BytesIO(response.content)).shape == (0,)
+
+    assert (
+        client.post("/predict/binary", content=b"x", headers=headers).status_code == 400
+    )
+    headers["Accept"] = "application/json"
+    response = client.post("/predict/binary", content=_npy_bytes(raw), headers=headers)
+    assert response.status_code == 406
+    response = client.post(
+        "/predict/binary", content=b"{}", headers={"Content-Type": "application/json"}
+    )
+    assert response.status_code == 415
+
+
+def test_arrow_input_matches_npy():
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+
+    raw = sample_raw_features(30, seed=5)
+    table = pa.table(
+        {
+            name: raw[:, column] if column == 0 else raw[:, column].astype(np.int64)
+            for column, name in enumerate(BASE_FEATURE_NAMES)
+        }
+    )
+    sink = pa.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    decoded = decode_matrix(sink.getvalue().to_pybytes(), ARROW_MEDIA_TYPE)
+    np.testing.assert_array_equal(decoded, raw)
@@ -0,0 +1,85 @@
+"""
+🧪 Tests du scoring en masse (CSV / JSONL, reprise)
+"""
+
+import csv
+import json
+
+import pytest
+
+import bulk_score
+from bulk_score import BulkScorer
+from features import BASE_FEATURE_NAMES
+from test_api import EXAMPLE_HOUSE, _make_predictor
+from test_features import _random_raw
+
+
+def _write_csv(path, n_rows):
+    raw = _random_raw(n_rows, seed=5)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id"] + BASE_FEATURE_NAMES)
+        for index, row in enumerate(raw.tolist()):
+            writer.writerow([index] + row)
+        writer.writerow([n_rows] + ["abc"] + row[1:])
+    return raw
+
+
+def test_csv_scores_match_predictor(tmp_path):
+    raw = _write_csv(tmp_path / "in.csv", 250)
+    summary = BulkScorer(tmp_path / "in.csv", tmp_path / "out.csv", chunk_size=64).run()
+
+    assert summary["rows"] == 251 and summary["invalid"] == 1
+    with open(tmp_path / "out.csv", newline="") as f:
+        rows = list(csv.DictReader(f))
+
+    expected = _make_predictor().predict_prices(raw)
+    assert [int(row["id"]) for row in rows] == list(range(251))
+    assert [float(row["price"]) for row in rows[:-1]] == pytest.approx(expected)
+    assert rows[-1]["price"] == ""
+    assert rows[-1]["error"].startswith("area:")
+
+
+def test_jsonl_keeps_extra_fields(tmp_path):
+    houses = [
+        {"id": "a", **EXAMPLE_HOUSE},
+        {"id": "b", **EXAMPLE_HOUSE, "bedrooms": 42},
+    ]
+    (tmp_path / "in.jsonl").write_text("".join(json.dumps(h) + "\n" for h in houses))
+
+    BulkScorer(tmp_path / "in.jsonl", tmp_path / "out.jsonl").run()
+
+    results = [json.loads(line) for line in open(tmp_path / "out.jsonl")]
+    assert [result["id"] for result in results] == ["a", "b"]
+    assert results[0]["price"] == pytest.approx(
+        _make_predictor().predict(EXAMPLE_HOUSE)["price"]
+    )
+    assert results[1]["price"] is None
+    assert results[1]["error"].startswith("bedrooms:")
+
+
+def test_resume_after_interruption(tmp_path, monkeypatch):
+    _write_csv(tmp_path / "in.csv", 300)
+    BulkScorer(tmp_path / "in.csv", tmp_path / "full.csv", chunk_size=50).run()
+
+    calls = []
+    score_records = bulk_score.score_records
+
+    def interrupted(records):
+        calls.append(len(records))
+        if len(calls) > 3:
+            raise KeyboardInterrupt
+        return score_records(records)
+
+    monkeypatch.setattr(bulk_score, "score_records", interrupted)
+    scorer = BulkScorer(tmp_path / "in.csv", tmp_path / "out.csv", chunk_size=50)
+    with pytest.raises(KeyboardInterrupt):
+        scorer.run()
+    monkeypatch.setattr(bulk_score, "score_records", score_records)
+
+    summary = BulkScorer(tmp_path / "in.csv", tmp_path / "out.csv", chunk_size=50).run(
+        resume=True
+    )
+
+    assert summary["rows"] == 301
+    assert (tmp_path / "out.csv").read_bytes() == (tmp_path / "full.csv").read_bytes()
@@ -0,0 +1,95 @@
+"""
+🧪 Tests de la distillation et de la troncature du modèle servi
+"""
+
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+from distill import Distiller, truncate
+from features import sample_raw_features
+from model_registry import ModelRegistry
+from test_api import EXAMPLE_HOUSE, _make_predictor, load_model
+
+
+def _distiller():
+    model, metadata = load_model()
+    return Distiller(
+        model,
+        metadata["data_info"]["feature_names"],
+        metadata,
+        train_raw=sample_raw_features(2000, seed=0),
+        test_raw=sample_raw_features(500, seed=1),
+    )
+
+
+def test_truncate_matches_staged_predictions():
+    predictor = _make_predictor()
+    X = predictor.feature_plan.transform(sample_raw_features(50, seed=2))
+    staged = list(predictor.model.staged_predict(X))
+
+    truncated = truncate(predictor.model, 40)
+    np.testing.assert_allclose(truncated.predict(X), staged[39])
+    # Le modèle servi n'est pas modifié
+    assert len(predictor.model.estimators_) == 200
+
+
+def test_report_and_choice():
+    distiller = _distiller()
+    distiller.add_truncations([100])
+    distiller.add_surrogates([(20, 3, None), (20, 3, 5)])
+    labeled = (sample_raw_features(100, seed=3), np.full(100, 5e6))
+    report = distiller.report(labeled)
+
+    assert report["teacher"]["fidelity"]["rmse"] == 0
+    assert report["teacher"]["stored"]["rmse"] is not None
+    assert set(report["candidates"]) == {
+        "truncate_100",
+        "surrogate_20x3",
+        "surrogate_20x3_top5",
+    }
+    top5 = report["candidates"]["surrogate_20x3_top5"]
+    assert top5["n_features"] == 5 and top5["n_trees"] == 20
+    assert (
+        "price_per_sqft"
+        not in distiller.candidates["surrogate_20x3_top5"]["feature_names"]
+    )
+    for entry in report["candidates"].values():
+        assert entry["fidelity"]["mape"] > 0 and "test" in entry
+        assert entry["latency"]["batch_ms"] > 0
+
+    assert Distiller.choose(report, max_mape=0) is None
+    assert Distiller.choose(report, max_mape=100) in report["candidates"]
+
+
+def test_save_keeps_serving_version(tmp_path):
+    from api import HousePricePredictor
+
+    models = tmp_path / "models"
+    models.mkdir()
+    for source in Path("models").glob("*_gradient_boosting.*"):
+        shutil.copy(source, models / source.name)
+    teacher = ModelRegistry(models).active_version().version
+
+    distiller = _distiller()
+    distiller.add_surrogates([(20, 3, 6)])
+    report = distiller.report()
+    model_file, version = distiller.save(
+        "compact", "surrogate_20x3_top6", report, models
+    )
+
+    registry = ModelRegistry(models)
+    assert registry.active_version().version == teacher
+    assert version in registry.scan()
+
+    with open(models / "model_metadata_compact.json") as f:
+        metadata = json.load(f)
+    assert metadata["model_info"]["distilled_from"] == teacher
+    assert len(metadata["data_info"]["feature_names"]) == 6
+    assert metadata["performance"]["fidelity_mape"] > 0
+
+    compact = HousePricePredictor(version=registry.get(version))
+    assert compact.feature_plan.n_features == 6
+    assert compact.predict(EXAMPLE_HOUSE)["price"] > 0
@@ -0,0 +1,150 @@
+"""
+🧪 Tests des esquisses de dérive et du endpoint /drift
+"""
+
+import numpy as np
+
+from drift import (
+    DriftMonitor,
+    DriftSketch,
+    baseline_path,
+    drift_report,
+    load_baseline,
+    write_baseline,
+)
+from features import AREA, PARKING, sample_raw_features
+from test_api import EXAMPLE_HOUSE
+
+
+def _prices(n_rows: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.exp(rng.uniform(np.log(1.5e6), np.log(1.3e7), n_rows))
+
+
+def test_sketch_is_fixed_size_and_mergeable():
+    raw, prices = sample_raw_features(1000, seed=0), _prices(1000, 0)
+    whole, first, second = DriftSketch(), DriftSketch(), DriftSketch()
+    size = len(whole.counts)
+
+    whole.update(raw, prices)
+    first.update(raw[:300], prices[:300])
+    second.update(raw[300:], prices[300:])
+    first.merge(second)
+
+    assert len(whole.counts) == size and whole.n_rows == 1000
+    np.testing.assert_array_equal(first.counts, whole.counts)
+    assert whole.field_counts("parking").sum() == 1000
+
+    # Précision relative des quantiles
+    for name, values in (("area", raw[:, AREA]), ("price", prices)):
+        expected = np.quantile(values, [0.05, 0.25, 0.5, 0.75, 0.95])
+        np.testing.assert_allclose(whole.quantiles(name), expected, rtol=0.03)
+
+
+def test_report_flags_shifted_fields():
+    baseline = DriftSketch()
+    baseline.update(sample_raw_features(5000, seed=1), _prices(5000, 1))
+
+    same = DriftSketch()
+    same.update(sample_raw_features(5000, seed=2), _prices(5000, 2))
+    report = drift_report(same, baseline)
+    assert report["drifted"] == [] and report["max_psi"] < 0.1
+
+    shifted_raw = sample_raw_features(5000, seed=3)
+    shifted_raw[:, AREA] = np.minimum(shifted_raw[:, AREA] * 1.5, 20000)
+    shifted_raw[:, PARKING] = 0
+    shifted = DriftSketch()
+    shifted.update(shifted_raw, _prices(5000, 3) * 1.3)
+    report = drift_report(shifted, baseline)
+    assert set(report["drifted"]) == {"area", "price", "parking"}
+    assert report["fields"]["area"]["ks"] > 0.2
+    assert report["fields"]["bedrooms"]["status"] == "stable"
+
+    # Sans référence: compteurs seulement
+    assert drift_report(shifted, None)["fields"] == {}
+
+
+def test_baseline_round_trip(tmp_path):
+    metadata_file = tmp_path / "model_metadata_gradient_boosting.json"
+    path = baseline_path(metadata_file)
+    assert path.name == "drift_baseline_gradient_boosting.json"
+    assert load_baseline(path) is None
+
+    sketch = write_baseline(
+        path, sample_raw_features(200, seed=4), _prices(200, 4), "sample"
+    )
+    np.testing.assert_array_equal(load_baseline(path).counts, sketch.counts)
+
+
+def test_drift_endpoint():
+    from fastapi.testclient import TestClient
+
+    import api
+
+    monitor = api.predictor.drift
+    saved = monitor.sketch, monitor.baseline
+    raw = sample_raw_features(500, seed=5)
+    monitor.baseline = DriftSketch()
+    monitor.baseline.update(raw, api.predictor.predict_prices(raw))
+    monitor.sketch = DriftSketch()
+    try:
+        client = TestClient(api.app)
+        houses = [{**EXAMPLE_HOUSE, "parking": 0}] * 40
+        client.post("/predict/batch", json={"houses": houses})
+        client.post("/predict", json={**EXAMPLE_HOUSE, "parking": 0})
+
+        body = client.get("/drift").json()
+        assert body["enabled"] and body["rows"] == 41
+        assert "parking" in body["drifted"]
+        assert body["fields"]["parking"]["live"][0] == 1.0
+    finally:
+        monitor.sketch, monitor.baseline = saved
+
+
+def test_hot_swap_keeps_input_counts(monkeypatch):
+    import api
+    from inference_executor import InferenceExecutor
+    from test_api import _make_predictor
+
+    previous, candidate = _make_predictor(), _make_predictor()
+    previous.drift, candidate.drift = DriftMonitor(), DriftMonitor()
+    raw = sample_raw_features(100, seed=6)
+    previous.drift.observe(raw, _prices(100, seed=6))
+    monkeypatch.setattr(api, "predictor", previous)
+    monkeypatch.setattr(api, "inference", InferenceExecutor(previous, mode="inline"))
+
+    api._install_predictor(candidate)
+    sketch = candidate.drift.sketch
+    assert api.predictor is candidate and sketch.n_rows == 100
+    assert sketch.field_counts("price").sum() == 0
+
+    # Prix absent du rapport tant que la nouvelle version n'a rien prédit
+    report = drift_report(sketch, previous.drift.sketch)
+    assert "price" not in report["fields"] and "area" in report["fields"]
+
+
+def test_drift_ignores_stopped_workers(tmp_path, monkeypatch):
+    import json
+    import os
+    import time
+
+    import api
+    import metrics
+
+    monitor = DriftMonitor()
+    monitor.baseline = DriftSketch()
+    raw = sample_raw_features(100, seed=7)
+    monitor.baseline.update(raw, _prices(100, seed=7))
+    monkeypatch.setattr(api.predictor, "drift", monitor)
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+
+    worker = DriftSketch()
+    worker.update(raw[:30], _prices(30, seed=8))
+    for pid, age in ((1, 0), (2, metrics.STALE_AFTER + 1)):
+        path = tmp_path / f"metrics_{pid}.json"
+        snapshot = {"pid": pid, "time": time.time() - age, "drift": worker.to_dict()}
+        path.write_text(json.dumps(snapshot))
+        os.utime(path, (snapshot["time"], snapshot["time"]))
+
+    # Seul le worker actif compte: celui arrêté n'est plus amorti
+    assert api._drift_report()["rows"] == 30
@@ -0,0 +1,122 @@
+"""
+🧪 Tests des explications TreeSHAP (contributions par feature)
+"""
+
+import itertools
+from math import factorial
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor
+
+from explain import TreeExplainer, raw_contributions, raw_shares
+from features import BASE_FEATURE_NAMES, sample_raw_features
+from test_api import EXAMPLE_HOUSE, _make_predictor, strict_warnings
+
+
+def _expected_value(model, x, subset):
+    """Espérance « path-dependent » du modèle, features hors ``subset`` inconnues"""
+    total = 0.0
+    for estimator in model.estimators_[:, 0]:
+        tree = estimator.tree_
+        cover = tree.weighted_n_node_samples
+
+        def walk(node):
+            left, right = tree.children_left[node], tree.children_right[node]
+            if left == -1:
+                return tree.value[node, 0, 0]
+            feature = tree.feature[node]
+            if feature in subset:
+                goes_left = np.float32(x[feature]) <= tree.threshold[node]
+                return walk(left if goes_left else right)
+            return (cover[left] * walk(left) + cover[right] * walk(right)) / cover[node]
+
+        total += model.learning_rate * walk(0)
+    return total
+
+
+def test_matches_brute_force_shapley():
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 10, (300, 5))
+    y = X[:, 0] * X[:, 1] + 5 * np.sin(X[:, 2]) + X[:, 3]
+    model = GradientBoostingRegressor(
+        n_estimators=10, max_depth=3, subsample=0.9, random_state=0
+    ).fit(X, y)
+    explainer = TreeExplainer(model)
+
+    n = X.shape[1]
+    for x, phi in zip(X[:3], explainer.shap_values(X[:3])):
+        expected = np.zeros(n)
+        for feature in range(n):
+            others = [f for f in range(n) if f != feature]
+            for size in range(n):
+                weight = factorial(size) * factorial(n - size - 1) / factorial(n)
+                for subset in itertools.combinations(others, size):
+                    gain = _expected_value(
+                        model, x, set(subset) | {feature}
+                    ) - _expected_value(model, x, set(subset))
+                    expected[feature] += weight * gain
+        np.testing.assert_allclose(phi, expected, atol=1e-9)
+
+
+def test_local_accuracy_on_served_model():
+    predictor = _make_predictor()
+    explainer = TreeExplainer(predictor.model)
+    X = predictor.feature_plan.transform(sample_raw_features(130, seed=4))
+
+    phi = explainer.shap_values(X, chunk_size=50)
+    prices = predictor.model.predict(X)
+    np.testing.assert_allclose(explainer.base_value + phi.sum(axis=1), prices)
+
+
+def test_raw_contributions_preserve_total():
+    predictor = _make_predictor()
+    raw = sample_raw_features(40, seed=5)
+    contributions = np.random.default_rng(6).normal(
+        size=(40, len(predictor.feature_names))
+    )
+
+    by_input, unattributed = raw_contributions(
+        contributions, raw, predictor.feature_names
+    )
+    assert by_input.shape == (40, len(BASE_FEATURE_NAMES))
+    np.testing.assert_allclose(
+        by_input.sum(axis=1) + unattributed, contributions.sum(axis=1)
+    )
+    # Chaque répartition somme à 1, sauf les features sans entrée
+    for name in predictor.feature_names:
+        shares = raw_shares(name, raw)
+        if shares is not None:
+            np.testing.assert_allclose(shares.sum(axis=1), 1.0)
+    assert raw_shares("price_per_sqft", raw) is None
+
+
+def test_explain_endpoints():
+    from fastapi.testclient import TestClient
+
+    from api import app
+
+    client = TestClient(app)
+    plain = client.post("/predict", json=EXAMPLE_HOUSE).json()
+    assert "explanation" not in plain
+
+    # Réponses sérialisées sans alerte pydantic (explication imbriquée en dict)
+    with strict_warnings():
+        body = client.post("/predict?explain=true", json=EXAMPLE_HOUSE).json()
+        slim = client.post("/predict?explain=true&slim=true", json=EXAMPLE_HOUSE).json()
+        houses = [EXAMPLE_HOUSE, {"area": 10}, {**EXAMPLE_HOUSE, "area": 9000}]
+        batch = client.post("/predict/batch?explain=true", json={"houses": houses})
+    explanation = body["explanation"]
+    assert set(explanation["contributions"]) == set(BASE_FEATURE_NAMES)
+    total = explanation["base_value"] + sum(explanation["contributions"].values())
+    assert abs(total - body["price"]) < 1e-3
+    assert body["price"] == plain["price"]
+
+    assert set(slim) == {"price", "confidence", "explanation"}
+
+    results = batch.json()["results"]
+    assert results[1]["prediction"] is None
+    for item in (results[0], results[2]):
+        prediction = item["prediction"]
+        contributions = prediction["explanation"]["contributions"]
+        total = prediction["explanation"]["base_value"] + sum(contributions.values())
+        assert abs(total - prediction["price"]) < 1e-3
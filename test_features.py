@@ -0,0 +1,89 @@
+"""
+🧪 Tests de parité du plan de feature engineering compilé
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from features import (
+    BASE_FEATURE_NAMES,
+    FeaturePlan,
+    read_houses,
+    reference_feature_matrix,
+    sample_raw_features,
+)
+
+
+def _model_feature_names():
+    """Retourne les feature_names des métadonnées du modèle"""
+    metadata_file = next(Path("models").glob("model_metadata_*.json"))
+    with open(metadata_file, "r") as f:
+        return json.load(f)["data_info"]["feature_names"]
+
+
+def _random_raw(n_rows, seed=0):
+    """Génère des caractéristiques brutes valides, frontières de taille incluses"""
+    raw = sample_raw_features(n_rows, seed=seed)
+    # Forcer les valeurs aux frontières des catégories de taille
+    boundaries = [1000, 3000, 3000.01, 6000, 10000, 10000.5, 20000]
+    count = min(n_rows, len(boundaries))
+    raw[:count, 0] = boundaries[:count]
+    return raw
+
+
+def _reference(raw, feature_names):
+    df = pd.DataFrame(raw, columns=BASE_FEATURE_NAMES)
+    int_columns = BASE_FEATURE_NAMES[1:]
+    df[int_columns] = df[int_columns].astype(int)
+    return reference_feature_matrix(df, feature_names)
+
+
+def test_plan_matches_pandas_single_row():
+    feature_names = _model_feature_names()
+    plan = FeaturePlan(feature_names)
+    raw = _random_raw(1)
+
+    np.testing.assert_array_equal(plan.transform(raw), _reference(raw, feature_names))
+
+
+def test_plan_matches_pandas_many_rows():
+    feature_names = _model_feature_names()
+    plan = FeaturePlan(feature_names)
+    raw = _random_raw(5000, seed=42)
+
+    np.testing.assert_array_equal(plan.transform(raw), _reference(raw, feature_names))
+
+
+def test_plan_fills_preallocated_buffer_and_missing_features():
+    feature_names = BASE_FEATURE_NAMES + ["luxury_score", "unknown_feature"]
+    plan = FeaturePlan(feature_names)
+    raw = _random_raw(10, seed=1)
+    out = np.full((10, len(feature_names)), np.nan)
+
+    result = plan.transform(raw, out=out)
+
+    assert result is out
+    assert plan.missing_features == ["unknown_feature"]
+    np.testing.assert_array_equal(out[:, -1], 0.0)
+    np.testing.assert_array_equal(out, _reference(raw, feature_names))
+
+
+def test_read_houses_csv_and_jsonl(tmp_path):
+    row = {name: 1 for name in BASE_FEATURE_NAMES}
+    csv_file = tmp_path / "houses.csv"
+    csv_file.write_text(
+        ",".join([*BASE_FEATURE_NAMES, "price"])
+        + "\n"
+        + ",".join(["7420", *["yes"] * 10, "furnished", "13300000"])
+        + "\n"
+    )
+    raw, prices = read_houses(csv_file, with_price=True)
+    assert raw.shape == (1, 12) and raw[0, 0] == 7420 and raw[0, -1] == 2
+    assert prices.tolist() == [13300000.0]
+
+    jsonl_file = tmp_path / "houses.jsonl"
+    jsonl_file.write_text(json.dumps(row) + "\n\n" + json.dumps(row) + "\n")
+    assert read_houses(jsonl_file).tolist() == [[1.0] * 12] * 2
@@ -0,0 +1,79 @@
+"""
+🧪 Tests de l'exécuteur d'inférence (inline / thread / process)
+"""
+
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from drift import DriftMonitor
+from inference_executor import InferenceExecutor
+from test_api import EXAMPLE_HOUSE, _make_predictor
+
+
+class SlowPredictor:
+    def predict(self, features):
+        time.sleep(0.2)  # Inférence CPU simulée, bloquante
+        return {"price": 1.0}
+
+
+def _tick_latency(executor):
+    """Latence d'un petit réveil asyncio pendant une inférence lente"""
+
+    async def main():
+        inference = asyncio.ensure_future(executor.run("predict", EXAMPLE_HOUSE))
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        latency = time.perf_counter() - start
+        await inference
+        return latency
+
+    return asyncio.run(main())
+
+
+def test_thread_mode_keeps_event_loop_responsive():
+    executor = InferenceExecutor(SlowPredictor(), mode="thread", max_workers=1)
+    try:
+        assert _tick_latency(executor) < 0.1
+    finally:
+        executor.shutdown()
+
+    assert _tick_latency(InferenceExecutor(SlowPredictor(), mode="inline")) >= 0.2
+
+
+@pytest.mark.parametrize("mode", ["thread", "process"])
+def test_modes_return_the_same_prediction(mode):
+    predictor = _make_predictor()
+    expected = predictor.predict(EXAMPLE_HOUSE)["price"]
+    executor = InferenceExecutor(predictor, mode=mode, max_workers=1)
+    try:
+        result = asyncio.run(executor.run("predict", EXAMPLE_HOUSE))
+    finally:
+        executor.shutdown()
+
+    assert result["price"] == pytest.approx(expected)
+
+
+def test_process_mode_reports_served_rows_to_parent():
+    """Les lignes servies dans le pool alimentent la dérive du parent"""
+    predictor = _make_predictor()
+    predictor.drift = DriftMonitor()
+    executor = InferenceExecutor(predictor, mode="process", max_workers=1)
+    try:
+        results = asyncio.run(
+            executor.run("predict_batch", [EXAMPLE_HOUSE, {"area": -1}])
+        )
+        prices, _ = asyncio.run(executor.run("score_matrix", np.zeros((0, 12))))
+    finally:
+        executor.shutdown()
+
+    assert results[0]["prediction"] is not None and len(prices) == 0
+    assert predictor.drift.sketch.n_rows == 1
+    assert predictor.served is None
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        InferenceExecutor(mode="gpu")
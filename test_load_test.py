@@ -0,0 +1,119 @@
+"""
+🧪 Tests de la suite de charge (benchmarks/load_test.py)
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent / "benchmarks"))
+
+from load_test import (  # noqa: E402
+    DirectASGIClient,
+    compare_to_baseline,
+    load_replay,
+    make_houses,
+    mix_source,
+    parse_mix,
+    run_open_loop,
+    run_scenario,
+)
+
+
+def _result(p50, p95, throughput, errors=0):
+    return {
+        "latency_ms": {"p50": p50, "p95": p95},
+        "throughput_rps": throughput,
+        "errors": errors,
+    }
+
+
+def test_compare_to_baseline():
+    baseline = {"scenarios": {"single": _result(1.0, 2.0, 1000)}}
+
+    ok = {"scenarios": {"single": _result(1.1, 2.2, 900)}}
+    assert compare_to_baseline(ok, baseline, threshold=0.25) == []
+
+    slow = {"scenarios": {"single": _result(1.1, 3.0, 700, errors=2)}}
+    regressions = compare_to_baseline(slow, baseline, threshold=0.25)
+    assert len(regressions) == 3
+    assert regressions[0].startswith("single: latence p95")
+
+
+def test_mix_is_reproducible():
+    houses = make_houses(50)
+    weights = parse_mix("predict=3,batch=1,health")
+    assert weights == {"predict": 3.0, "batch": 1.0, "health": 1.0}
+
+    first = [
+        request[1] for _, request in zip(range(20), mix_source(weights, houses, 5, 1))
+    ]
+    second = [
+        request[1] for _, request in zip(range(20), mix_source(weights, houses, 5, 1))
+    ]
+    assert first == second
+    assert set(first) <= {"/predict", "/predict/batch", "/health"}
+
+
+def test_load_replay(tmp_path):
+    replay = tmp_path / "traffic.jsonl"
+    house = make_houses(1)[0]
+    replay.write_text(
+        "\n".join(
+            [
+                json.dumps({"method": "get", "path": "/health"}),
+                json.dumps(house),
+                json.dumps({"request_id": "autre chose"}),
+            ]
+        )
+    )
+
+    requests = load_replay(replay)
+    assert [(method, path) for method, path, _, _ in requests] == [
+        ("GET", "/health"),
+        ("POST", "/predict"),
+    ]
+
+    replay.write_text(json.dumps({"title": "aucune requête"}))
+    with pytest.raises(ValueError):
+        load_replay(replay)
+
+
+def test_in_process_scenario():
+    import httpx
+
+    import api
+
+    async def run():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as c:
+            source = mix_source({"predict": 1, "batch": 1}, make_houses(20), 5, 0)
+            return await run_scenario(c, source, 2, duration=0.3, warmup=0)
+
+    result = asyncio.run(run())
+    assert result["requests"] > 0 and result["errors"] == 0
+    assert set(result["by_route"]) == {"/predict", "/predict/batch"}
+    assert result["latency_ms"]["p50"] <= result["latency_ms"]["p99"]
+
+
+def test_open_loop_counts_shed_requests():
+    from admission import AdmissionController, AdmissionMiddleware
+
+    async def slow_app(scope, receive, send):
+        await asyncio.sleep(0.05)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    controller = AdmissionController(
+        initial_limit=1, min_limit=1, max_limit=1, max_queue=0
+    )
+    client = DirectASGIClient(AdmissionMiddleware(slow_app, controller))
+    source = mix_source({"predict": 1}, make_houses(5), 5, 0)
+
+    result = asyncio.run(run_open_loop(client, source, 200, duration=0.2, warmup=0))
+    assert result["requests"] >= 1 and result["rejected"] > result["requests"]
+    assert result["errors"] == 0
+    assert result["rejected_latency_ms"]["p99"] < 50
@@ -0,0 +1,87 @@
+"""
+🧪 Tests des métriques Prometheus
+"""
+
+import json
+import os
+import time
+
+import metrics
+from test_api import EXAMPLE_HOUSE
+
+
+def _sample(text: str, name: str) -> float:
+    """Valeur d'un échantillon de l'exposition texte (nom et labels exacts)"""
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise KeyError(name)
+
+
+def test_histogram_buckets():
+    histogram = metrics.Histogram([1, 2])
+    for value in (0.5, 1, 1.5, 3):
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.sum == 6
+
+
+def test_metrics_endpoint():
+    from fastapi.testclient import TestClient
+
+    from api import app
+
+    client = TestClient(app)
+    before = client.get("/metrics").text
+    client.post("/predict", json=EXAMPLE_HOUSE)
+    client.post("/predict", json={**EXAMPLE_HOUSE, "area": 1})
+    client.post("/predict/batch", json={"houses": [EXAMPLE_HOUSE, {"area": 1}]})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+
+    def delta(name):
+        try:
+            previous = _sample(before, name)
+        except KeyError:
+            previous = 0.0
+        return _sample(text, name) - previous
+
+    assert delta('house_price_request_seconds_count{route="/predict"}') == 2
+    assert delta('house_price_stage_seconds_count{stage="serialization"}') == 1
+    assert delta('house_price_stage_seconds_count{stage="validation"}') == 2
+    assert delta('house_price_errors_total{type="request_validation"}') == 1
+    assert delta('house_price_errors_total{type="row_validation"}') == 1
+    assert "house_price_model_info{" in text
+    assert "process_resident_memory_bytes" in text
+
+
+def test_worker_snapshots_are_aggregated(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+    monkeypatch.setattr(metrics, "errors", {"client": 3})
+    metrics.write_snapshot()
+    local = json.loads((tmp_path / f"metrics_{os.getpid()}.json").read_text())
+
+    # Un autre worker avec les mêmes compteurs
+    other = {**local, "pid": 1}
+    (tmp_path / "metrics_1.json").write_text(json.dumps(other))
+
+    text = metrics.render().decode()
+    assert _sample(text, 'house_price_errors_total{type="client"}') == 6
+    assert 'house_price_worker_resident_memory_bytes{pid="1"}' in text
+
+    # Worker arrêté: son état n'est plus compté et son fichier est supprimé
+    stale = tmp_path / "metrics_2.json"
+    stale.write_text(json.dumps({**local, "pid": 2}))
+    old = time.time() - metrics.STALE_AFTER - 1
+    os.utime(stale, (old, old))
+    assert [item["pid"] for item in metrics.worker_snapshots()] == [1]
+    assert not stale.exists()
+    text = metrics.render().decode()
+    assert _sample(text, 'house_price_errors_total{type="client"}') == 6
+
+    metrics.clear_snapshots()
+    assert not list(tmp_path.glob("metrics_*.json"))
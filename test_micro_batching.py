@@ -0,0 +1,58 @@
+"""
+🧪 Tests du micro-batching asynchrone
+"""
+
+import asyncio
+
+import pytest
+
+from micro_batching import MicroBatcher
+
+
+def _run_concurrently(batcher, items):
+    async def main():
+        return await asyncio.gather(*(batcher.submit(item) for item in items))
+
+    return asyncio.run(main())
+
+
+def test_concurrent_calls_share_one_batch():
+    calls = []
+
+    def predict(items):
+        calls.append(list(items))
+        return [item * 10 for item in items]
+
+    batcher = MicroBatcher(predict, max_batch_size=64, max_wait_ms=20)
+    results = _run_concurrently(batcher, range(10))
+
+    assert results == [item * 10 for item in range(10)]
+    assert calls == [list(range(10))]
+    stats = batcher.stats()
+    assert stats["batches"] == 1
+    assert stats["batch_size_histogram"]["<=16"] == 1
+    assert stats["queue_depth"] == 0
+
+
+def test_batches_are_capped_at_max_size():
+    sizes = []
+
+    def predict(items):
+        sizes.append(len(items))
+        return items
+
+    batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=20)
+    results = _run_concurrently(batcher, range(10))
+
+    assert results == list(range(10))
+    assert sizes == [4, 4, 2]
+    assert batcher.stats()["max_queue_depth"] == 10
+
+
+def test_errors_are_propagated_to_every_caller():
+    def predict(items):
+        raise RuntimeError("boom")
+
+    batcher = MicroBatcher(predict, max_batch_size=8, max_wait_ms=1)
+    with pytest.raises(RuntimeError):
+        _run_concurrently(batcher, range(3))
@@ -0,0 +1,63 @@
+"""
+🧪 Tests de l'artefact de modèle compact (export, mmap, chargement par l'API)
+"""
+
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from api import HousePricePredictor
+from features import FeaturePlan
+from model_artifact import export_model, load_artifact
+from test_api import EXAMPLE_HOUSE
+from test_features import _model_feature_names, _random_raw
+from test_tree_engine import _load_model, _sklearn_predict
+
+
+def _export(tmp_path):
+    models = tmp_path / "models"
+    models.mkdir()
+    for source in Path("models").glob("best_model_*.pkl"):
+        shutil.copy(source, models / source.name)
+    for source in Path("models").glob("model_metadata_*.json"):
+        shutil.copy(source, models / source.name)
+    return export_model(
+        next(models.glob("best_model_*.pkl")), next(models.glob("model_metadata_*"))
+    )
+
+
+def test_artifact_round_trip_matches_sklearn(tmp_path):
+    ensemble, header = load_artifact(_export(tmp_path))
+
+    assert header["model_type"] == "GradientBoostingRegressor"
+    assert header["feature_names"] == _model_feature_names()
+    # Tableaux lus directement dans le fichier mappé, sans copie
+    assert not ensemble.threshold.flags.writeable
+
+    X = FeaturePlan(header["feature_names"]).transform(_random_raw(500, seed=3))
+    np.testing.assert_allclose(
+        ensemble.predict(X), _sklearn_predict(_load_model(), X), rtol=1e-10
+    )
+
+
+def test_invalid_artifact_is_rejected(tmp_path):
+    path = tmp_path / "broken.flat"
+    path.write_bytes(b"not an artifact")
+    with pytest.raises(ValueError):
+        load_artifact(path)
+
+
+def test_predictor_loads_flat_artifact(tmp_path, monkeypatch):
+    _export(tmp_path)
+    reference = HousePricePredictor()
+
+    monkeypatch.chdir(tmp_path)
+    flat = HousePricePredictor(model_format="flat")
+
+    assert flat.model_hash == reference.model_hash
+    assert flat.get_model_info()["model_type"] == "GradientBoostingRegressor"
+    assert flat.predict(EXAMPLE_HOUSE)["price"] == pytest.approx(
+        reference.predict(EXAMPLE_HOUSE)["price"], rel=1e-10
+    )
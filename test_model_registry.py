@@ -0,0 +1,106 @@
+"""
+🧪 Tests du registre de modèles et de la bascule à chaud
+"""
+
+import os
+import pickle
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor
+
+from model_registry import ModelRegistry
+from test_api import EXAMPLE_HOUSE
+from test_features import _model_feature_names
+
+
+def _models_dir(tmp_path):
+    """Dossier avec le modèle livré et une seconde version entraînée à la volée"""
+    models = tmp_path / "models"
+    models.mkdir()
+    for source in Path("models").glob("*_gradient_boosting.*"):
+        shutil.copy(source, models / source.name)
+
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 10, (200, len(_model_feature_names())))
+    candidate = GradientBoostingRegressor(n_estimators=5, random_state=0)
+    candidate.fit(X, 1e6 + X[:, 0] * 1e5)
+    candidate_file = models / "best_model_candidate.pkl"
+    candidate_file.write_bytes(pickle.dumps(candidate))
+    # Le modèle livré reste la version la plus récente (active par défaut)
+    os.utime(candidate_file, (0, 0))
+    shutil.copy(
+        models / "model_metadata_gradient_boosting.json",
+        models / "model_metadata_candidate.json",
+    )
+    return models
+
+
+def test_registry_versions_and_history(tmp_path):
+    registry = ModelRegistry(_models_dir(tmp_path))
+    versions = registry.scan()
+    assert len(versions) == 2
+    for version in versions.values():
+        assert version.metadata_file.name == f"model_metadata_{version.name}.json"
+
+    original, candidate = (
+        next(v for v in versions.values() if v.name == name)
+        for name in ("gradient_boosting", "candidate")
+    )
+    registry.promote(original.version)
+    with pytest.raises(ValueError):
+        registry.previous_version()
+
+    registry.promote(candidate.version)
+    assert registry.active_version().version == candidate.version
+    assert registry.previous_version().version == original.version
+
+    assert registry.rollback().version == original.version
+    assert registry.active_version().version == original.version
+    with pytest.raises(KeyError):
+        registry.promote("inconnue")
+
+
+def test_promote_and_rollback_hot_swap(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import api
+    from inference_executor import InferenceExecutor
+
+    registry = ModelRegistry(_models_dir(tmp_path))
+    monkeypatch.setattr(api, "registry", registry)
+    monkeypatch.setattr(api, "inference", InferenceExecutor(api.predictor, "inline"))
+    monkeypatch.setattr(api, "predictor", api.predictor)
+    client = TestClient(api.app)
+
+    # Bascule refusée sans jeton configuré, puis sans le bon en-tête
+    assert client.post("/admin/models/rollback").status_code == 403
+    monkeypatch.setattr(api, "ADMIN_TOKEN", "secret")
+    headers = {"X-Admin-Token": "faux"}
+    assert client.post("/admin/models/rollback", headers=headers).status_code == 403
+    headers["X-Admin-Token"] = "secret"
+
+    versions = {v.name: v.version for v in registry.scan().values()}
+    before = client.post("/predict", json=EXAMPLE_HOUSE).json()["price"]
+
+    response = client.post(
+        f"/admin/models/{versions['candidate']}/promote", headers=headers
+    )
+    assert response.status_code == 200
+    info = client.get("/model/info").json()
+    assert info["active_version"] == versions["candidate"]
+    assert info["model_file"] == "best_model_candidate.pkl"
+    assert client.post("/predict", json=EXAMPLE_HOUSE).json()["price"] != before
+
+    response = client.post("/admin/models/rollback", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["active_version"] == versions["gradient_boosting"]
+    assert client.post("/predict", json=EXAMPLE_HOUSE).json()["price"] == before
+
+    assert client.post("/admin/models/rollback", headers=headers).status_code == 409
+    assert (
+        client.post("/admin/models/inconnue/promote", headers=headers).status_code
+        == 404
+    )
@@ -0,0 +1,76 @@
+"""
+🧪 Tests du cache LRU/TTL des prédictions
+"""
+
+from prediction_cache import PredictionCache, canonical_key
+from test_api import EXAMPLE_HOUSE, _make_predictor
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_eviction_and_counters():
+    cache = PredictionCache(max_entries=2, ttl_seconds=None)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" devient le moins récent
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (2, 1, 1)
+    assert stats["size"] == 2
+
+
+def test_ttl_expiration():
+    clock = FakeClock()
+    cache = PredictionCache(max_entries=10, ttl_seconds=5, clock=clock)
+    cache.put("a", 1)
+
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5.1
+    assert cache.get("a") is None
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 0
+
+
+def test_canonical_key_normalizes_numbers_and_model_version():
+    as_float = {name: float(value) for name, value in EXAMPLE_HOUSE.items()}
+
+    assert canonical_key(EXAMPLE_HOUSE, "v1") == canonical_key(as_float, "v1")
+    assert canonical_key(EXAMPLE_HOUSE, "v1") != canonical_key(EXAMPLE_HOUSE, "v2")
+
+
+def test_predictor_uses_cache_with_fresh_timestamp():
+    cache = PredictionCache(max_entries=100)
+    predictor = _make_predictor(cache=cache)
+
+    first = predictor.predict(EXAMPLE_HOUSE)
+    second = predictor.predict(dict(EXAMPLE_HOUSE))
+
+    assert second["price"] == first["price"]
+    assert second["prediction_time"] >= first["prediction_time"]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_batches_do_not_evict_cached_quotes():
+    cache = PredictionCache(max_entries=10)
+    predictor = _make_predictor(cache=cache)
+    predictor.predict(EXAMPLE_HOUSE)
+
+    houses = [{**EXAMPLE_HOUSE, "area": 3000 + i} for i in range(50)]
+    predictor.predict_batch(houses)
+    predictor.predict_many(houses)
+    assert cache.stats()["size"] == 1 and cache.stats()["evictions"] == 0
+
+    predictor.predict(EXAMPLE_HOUSE)
+    predictor.predict_quotes([EXAMPLE_HOUSE])
+    assert cache.stats()["hits"] == 2
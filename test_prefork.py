@@ -0,0 +1,74 @@
+"""
+🧪 Tests du serveur pré-forké (run_api.py --workers)
+"""
+
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from prefork import worker_cores
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_healthy(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=1).status_code == 200:
+                return True
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def test_worker_cores_round_robin():
+    assert worker_cores(5, cpus=[2, 3]) == [2, 3, 2, 3, 2]
+    assert worker_cores(1, cpus=[7]) == [7]
+
+
+def test_prefork_serves_recycles_and_restarts():
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}/health"
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "run_api.py",
+            "--workers",
+            "2",
+            "--port",
+            str(port),
+            "--max-requests",
+            "3",
+            "--graceful-timeout",
+            "5",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        assert _wait_healthy(url)
+
+        # Recyclage: chaque worker sert au plus 3 requêtes puis est relancé
+        for _ in range(12):
+            assert _wait_healthy(url, timeout=10)
+
+        # Redémarrage progressif: le service reste disponible
+        process.send_signal(signal.SIGHUP)
+        assert _wait_healthy(url, timeout=10)
+
+        process.send_signal(signal.SIGTERM)
+        assert process.wait(timeout=30) == 0
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
@@ -0,0 +1,84 @@
+"""
+🧪 Tests de l'index de prix constant par morceaux
+"""
+
+import numpy as np
+
+from features import AREA, sample_raw_features
+from price_index import PriceIndex
+from test_api import EXAMPLE_HOUSE, _make_predictor
+
+
+def _make_index():
+    predictor = _make_predictor()
+    return predictor, PriceIndex(predictor.model, predictor.feature_plan)
+
+
+def test_index_matches_model_on_area_sweep():
+    predictor, index = _make_index()
+    raw = np.repeat(
+        np.array([list(EXAMPLE_HOUSE.values())], dtype=np.float64), 20000, axis=0
+    )
+    raw[:, AREA] = np.linspace(1000, 20000, len(raw))
+    breakpoints, _ = index.steps(raw[0])
+    raw[: len(breakpoints), AREA] = breakpoints
+    raw[len(breakpoints) : 2 * len(breakpoints), AREA] = np.nextafter(
+        breakpoints, np.inf
+    )
+
+    expected = predictor.model.predict(predictor.feature_plan.transform(raw))
+    np.testing.assert_array_equal(index.predict(raw), expected)
+
+
+def test_index_verify_and_roundtrip(tmp_path):
+    _, index = _make_index()
+    report = index.verify(300, seed=3)
+    assert report["mismatches"] == 0
+
+    path = tmp_path / "price_index.npz"
+    index.save(path)
+    saved = list(index.profiles)
+    _, restored = _make_index()
+    assert restored.load(path) == len(index.profiles)
+
+    raw = sample_raw_features(50, seed=3)
+    np.testing.assert_array_equal(restored.predict(raw), index.predict(raw))
+
+    # Cache borné dès le chargement: les profils les plus récents sont gardés
+    predictor, _ = _make_index()
+    bounded = PriceIndex(predictor.model, predictor.feature_plan, max_profiles=5)
+    assert bounded.load(path) == 5
+    assert list(bounded.profiles) == saved[-5:]
+
+
+def test_predictor_index_engine():
+    reference = _make_predictor()
+    indexed = _make_predictor(engine="index")
+
+    assert indexed.price_index is not None
+    assert indexed.predict(EXAMPLE_HOUSE)["price"] == (
+        reference.predict(EXAMPLE_HOUSE)["price"]
+    )
+    batch = indexed.predict_batch([EXAMPLE_HOUSE, {**EXAMPLE_HOUSE, "area": 2999.5}])
+    assert all(item["error"] is None for item in batch)
+
+
+def test_predictor_index_engine_falls_back(monkeypatch):
+    import price_index
+
+    def reject(self, path):
+        raise ValueError("Index construit pour un autre modèle")
+
+    # Fichier d'un autre modèle: l'index reste utilisé, profils à la demande
+    monkeypatch.setattr(price_index.Path, "exists", lambda self: True)
+    monkeypatch.setattr(PriceIndex, "load", reject)
+    indexed = _make_predictor(engine="index")
+    assert indexed.price_index is not None and not indexed.price_index.profiles
+
+    # Index impossible à construire: retour à model.predict
+    monkeypatch.setattr(PriceIndex, "__init__", reject)
+    fallback = _make_predictor(engine="index")
+    assert fallback.price_index is None
+    assert fallback.predict(EXAMPLE_HOUSE)["price"] == (
+        indexed.predict(EXAMPLE_HOUSE)["price"]
+    )
@@ -0,0 +1,83 @@
+"""
+🧪 Tests du profilage échantillonné des requêtes
+"""
+
+import marshal
+
+import profiling
+from test_api import EXAMPLE_HOUSE
+
+
+def test_profiling_is_off_by_default(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from api import app
+
+    monkeypatch.setattr(profiling, "SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(profiling, "TOKEN", "")
+    profiling.clear()
+
+    client = TestClient(app)
+    response = client.post(
+        "/predict", json=EXAMPLE_HOUSE, headers={"X-Profile-Token": "x"}
+    )
+    assert response.status_code == 200
+    assert profiling.summaries() == []
+    # Sans jeton configuré, les profils ne sont pas consultables
+    response = client.get("/admin/profiles", headers={"X-Profile-Token": ""})
+    assert response.status_code == 403
+
+
+def test_trusted_header_and_sampling(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from api import app
+
+    monkeypatch.setattr(profiling, "SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(profiling, "TOKEN", "secret")
+    profiling.clear()
+
+    client = TestClient(app, headers={"X-Profile-Token": "secret"})
+    client.post("/predict", json=EXAMPLE_HOUSE, headers={"X-Profile-Token": "faux"})
+    assert client.get("/admin/profiles").json()["profiles"] == []
+    unauthorized = TestClient(app)
+    assert unauthorized.get("/admin/profiles").status_code == 403
+    assert unauthorized.get("/admin/profiles/1").status_code == 403
+
+    house = {**EXAMPLE_HOUSE, "area": 6123}  # hors cache: inférence profilée
+    client.post("/predict", json=house, headers={"X-Profile-Token": "secret"})
+    profiles = client.get("/admin/profiles").json()["profiles"]
+    assert len(profiles) == 1
+    summary = profiles[0]
+    assert summary["trigger"] == "header" and summary["path"] == "/predict"
+    assert summary["status"] == 200
+    assert {"validation", "feature_engineering", "inference"} <= set(summary["stages"])
+    for stage in summary["stages"].values():
+        assert stage["calls"] == 1 and stage["wall_ms"] >= 0
+
+    profile_id = summary["id"]
+    detail = client.get(f"/admin/profiles/{profile_id}").json()
+    assert detail["top_functions"] and "stats" not in detail
+    text = client.get(f"/admin/profiles/{profile_id}?format=text").text
+    assert "function calls" in text
+    download = client.get(f"/admin/profiles/{profile_id}?format=pstats")
+    assert download.headers["content-type"] == "application/octet-stream"
+    assert isinstance(marshal.loads(download.content), dict)
+
+    assert client.get("/admin/profiles/999999").status_code == 404
+    assert client.get(f"/admin/profiles/{profile_id}?format=xml").status_code == 400
+
+    monkeypatch.setattr(profiling, "SAMPLE_RATE", 1.0)
+    unauthorized.get("/health")
+    assert client.get("/admin/profiles").json()["profiles"][0]["trigger"] == "sample"
+
+
+def test_ring_buffer_is_bounded(monkeypatch):
+    monkeypatch.setattr(profiling, "profiles", profiling.deque(maxlen=3))
+    for _ in range(5):
+        session = profiling.ProfileSession("sample", "GET", "/")
+        session.start()
+        profiling.profiles.append(session.stop(200))
+
+    ids = [summary["id"] for summary in profiling.summaries()]
+    assert len(ids) == 3 and ids == sorted(ids, reverse=True)
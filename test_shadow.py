@@ -0,0 +1,77 @@
+"""
+🧪 Tests du scoring fantôme des modèles candidats
+"""
+
+import numpy as np
+
+from features import sample_raw_features
+from model_registry import ModelRegistry
+from shadow import ShadowScorer, ShadowStats, load_candidates
+from test_api import EXAMPLE_HOUSE
+from test_model_registry import _models_dir
+
+
+def test_stats_accumulate_errors_and_latency():
+    stats = ShadowStats()
+    stats.update(np.array([110.0, 90.0]), np.array([100.0, 100.0]), 0.002)
+    stats.update(np.array([100.0]), np.array([100.0]), 0.004)
+
+    summary = stats.to_dict()
+    assert summary["rows"] == 3 and summary["batches"] == 2
+    assert summary["mean_error"] == 0 and summary["max_abs_error"] == 10
+    np.testing.assert_allclose(summary["mae"], 20 / 3)
+    np.testing.assert_allclose(summary["rmse"], np.sqrt(200 / 3))
+    np.testing.assert_allclose(summary["mape"], 100 * 0.2 / 3)
+    np.testing.assert_allclose(summary["latency"]["mean_ms"], 3)
+    assert summary["latency"]["p99_ms"] == 5
+
+
+def test_scorer_compares_candidates_off_request_path(tmp_path):
+    registry = ModelRegistry(_models_dir(tmp_path))
+    candidates = load_candidates(registry, ["candidate"])
+    assert [c.name for c in candidates] == ["candidate"]
+
+    candidates = load_candidates(registry)
+    primary = next(c for c in candidates if c.name == "gradient_boosting")
+    scorer = ShadowScorer(candidates, fraction=1.0)
+    raw = sample_raw_features(50, seed=0)
+    served = primary.predict(raw)
+    for _ in range(4):
+        assert scorer.submit(raw, served, primary.version)
+    scorer.wait()
+
+    snapshot = scorer.snapshot()
+    assert snapshot["primary"] == primary.version and snapshot["submitted"] == 4
+    (stats,) = snapshot["candidates"].values()
+    assert stats["name"] == "candidate" and stats["rows"] == 200
+    assert stats["mae"] > 0 and stats["latency"]["mean_ms"] > 0
+
+    # Nouvelle version servie: les statistiques repartent de zéro
+    scorer.submit(raw, served, "autre")
+    scorer.wait()
+    assert scorer.snapshot()["candidates"].keys() == {c.version for c in candidates}
+    assert not ShadowScorer(candidates, fraction=0.0).submit(raw, served, "x")
+    scorer.close()
+
+
+def test_shadow_stats_endpoint(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import api
+
+    candidates = load_candidates(ModelRegistry(_models_dir(tmp_path)), ["candidate"])
+    scorer = ShadowScorer(candidates, fraction=1.0)
+    monkeypatch.setattr(api, "shadow", scorer)
+    monkeypatch.setattr(api.predictor, "shadow", scorer)
+    client = TestClient(api.app)
+
+    assert client.post("/predict", json={**EXAMPLE_HOUSE, "area": 7321}).is_success
+    client.post("/predict/batch", json={"houses": [EXAMPLE_HOUSE] * 3})
+    scorer.wait()
+
+    body = client.get("/shadow/stats").json()
+    assert body["enabled"] and body["primary"] == api.predictor.model_hash
+    (stats,) = body["candidates"].values()
+    assert stats["rows"] == 4 and 1 <= stats["batches"] <= 2
+    assert "house_price_shadow_rows" in client.get("/metrics").text
+    scorer.close()
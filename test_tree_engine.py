@@ -0,0 +1,68 @@
+"""
+🧪 Tests du moteur d'inférence aplati (parité avec scikit-learn)
+"""
+
+import pickle
+import warnings
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor
+
+from features import FeaturePlan
+from test_features import _model_feature_names, _random_raw
+from tree_engine import FlatTreeEnsemble
+
+
+def _load_model():
+    model_file = next(Path("models").glob("best_model_*.pkl"))
+    with open(model_file, "rb") as f:
+        return pickle.load(f)
+
+
+def _sklearn_predict(model, X):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", UserWarning)
+        return model.predict(X)
+
+
+def test_flat_engine_matches_sklearn_on_served_features():
+    model = _load_model()
+    engine = FlatTreeEnsemble.from_sklearn(model)
+    X = FeaturePlan(_model_feature_names()).transform(_random_raw(3000, seed=7))
+
+    np.testing.assert_allclose(
+        engine.predict(X), _sklearn_predict(model, X), rtol=1e-10
+    )
+    np.testing.assert_allclose(
+        engine.predict(X[:1]), _sklearn_predict(model, X[:1]), rtol=1e-10
+    )
+
+
+def test_flat_engine_pads_shallow_trees():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(200, 5))
+    y = np.where(X[:, 0] > 0, 10.0, -3.0) + X[:, 1] * 0.5
+    # min_samples_leaf élevé : beaucoup d'arbres s'arrêtent avant max_depth
+    model = GradientBoostingRegressor(
+        n_estimators=30, max_depth=5, min_samples_leaf=40, random_state=0
+    ).fit(X, y)
+    engine = FlatTreeEnsemble.from_sklearn(model)
+
+    X_test = rng.normal(size=(500, 5))
+    assert engine.depth == max(e.tree_.max_depth for e in model.estimators_[:, 0])
+    np.testing.assert_allclose(engine.predict(X_test), model.predict(X_test))
+
+
+def test_predictor_flat_engine_flag():
+    from test_api import EXAMPLE_HOUSE, _make_predictor
+
+    reference = _make_predictor()
+    flat = _make_predictor(engine="flat")
+
+    assert flat.tree_engine is not None
+    np.testing.assert_allclose(
+        flat.predict(EXAMPLE_HOUSE)["price"],
+        reference.predict(EXAMPLE_HOUSE)["price"],
+        rtol=1e-10,
+    )
@@ -0,0 +1,64 @@
+"""
+🧪 Tests de la validation vectorisée (parité avec HouseFeatures)
+"""
+
+import numpy as np
+
+from api import HouseFeatures, _format_validation_error
+from features import BASE_FEATURE_NAMES
+from test_api import EXAMPLE_HOUSE
+from test_features import _random_raw
+from validation import validate_records
+
+INVALID_CHANGES = [
+    {"bedrooms": 0},
+    {"bedrooms": 11},
+    {"bedrooms": 2.5},
+    {"bedrooms": "x"},
+    {"bedrooms": None},
+    {"bedrooms": float("nan")},
+    {"bedrooms": [1]},
+    {"area": -1},
+    {"area": 500},
+    {"area": float("nan")},
+    {"area": float("inf")},
+    {"area": "abc"},
+    {"area": None, "parking": 9},
+    {"area": "", "stories": 0},
+]
+
+VALID_CHANGES = [{}, {"bedrooms": "3"}, {"bedrooms": " 3 "}, {"bedrooms": True}]
+
+
+def _pydantic_error(record):
+    try:
+        HouseFeatures(**record)
+    except Exception as e:
+        return _format_validation_error(e)
+    return None
+
+
+def test_messages_match_pydantic():
+    records = [
+        {**EXAMPLE_HOUSE, **change} for change in INVALID_CHANGES + VALID_CHANGES
+    ]
+    missing = dict(EXAMPLE_HOUSE)
+    del missing["area"], missing["parking"]
+    records.append(missing)
+
+    _, valid, errors = validate_records(records)
+
+    for index, record in enumerate(records):
+        expected = _pydantic_error(record)
+        assert errors.get(index) == expected
+        assert valid[index] == (expected is None)
+
+
+def test_random_valid_rows_are_parsed_exactly():
+    raw = _random_raw(500, seed=4)
+    records = [dict(zip(BASE_FEATURE_NAMES, row)) for row in raw.tolist()]
+
+    parsed, valid, errors = validate_records(records)
+
+    assert valid.all() and not errors
+    np.testing.assert_array_equal(parsed, raw)
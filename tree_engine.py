@@ -0,0 +1,145 @@
+"""
+🌲 Moteur d'inférence aplati pour les ensembles d'arbres Gradient Boosting
+
+Le ``GradientBoostingRegressor`` est exporté au chargement en tableaux
+contigus (feature, seuil, valeur de feuille × learning rate, valeur initiale).
+Chaque arbre est complété en arbre binaire parfait (disposition en tas), ce qui
+permet un parcours vectorisé niveau par niveau sur tout un lot, sans la
+validation ni le dispatch de ``predict`` de scikit-learn.
+"""
+
+from typing import Optional
+
+import numpy as np
+
+# Nombre de lignes traitées par bloc (les tableaux intermédiaires restent en cache)
+DEFAULT_CHUNK_SIZE = 512
+
+
+def _floor_float32(thresholds: np.ndarray) -> np.ndarray:
+    """Arrondit les seuils float64 au plus grand float32 inférieur ou égal
+
+    scikit-learn compare ``X`` converti en float32 à des seuils float64 ;
+    pour un ``x`` float32, ``x <= t`` équivaut exactement à ``x <= floor32(t)``.
+    """
+    rounded = thresholds.astype(np.float32)
+    too_high = rounded.astype(np.float64) > thresholds
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+class FlatTreeEnsemble:
+    """Ensemble d'arbres aplati, évalué niveau par niveau sur un lot"""
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        leaf_value: np.ndarray,
+        init: float,
+        n_features: int,
+    ):
+        self.n_trees, n_internal = feature.shape
+        self.depth = int(np.log2(n_internal + 1))
+        self.n_internal = n_internal
+        self.n_leaves = n_internal + 1
+        self.n_features = n_features
+        self.init = float(init)
+
+        self.feature = np.ascontiguousarray(feature, dtype=np.intp).ravel()
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float32).ravel()
+        self.leaf_value = np.ascontiguousarray(leaf_value, dtype=np.float64).ravel()
+
+        trees = np.arange(self.n_trees, dtype=np.intp)
+        self._tree_offset = trees * n_internal
+        # Index plat d'un nœud du tas -> index plat de la feuille correspondante
+        self._leaf_offset = trees - n_internal
+
+    @classmethod
+    def from_sklearn(cls, model) -> "FlatTreeEnsemble":
+        """Exporte un GradientBoostingRegressor entraîné en tableaux plats"""
+        estimators = getattr(model, "estimators_", None)
+        if estimators is None or estimators.ndim != 2 or estimators.shape[1] != 1:
+            raise TypeError(
+                f"Modèle non supporté par le moteur aplati: {type(model).__name__}"
+            )
+
+        trees = [estimator.tree_ for estimator in estimators[:, 0]]
+        n_features = int(model.n_features_in_)
+        depth = max(1, max(tree.max_depth for tree in trees))
+        n_internal = 2**depth - 1
+
+        feature = np.zeros((len(trees), n_internal), dtype=np.intp)
+        # Seuil +inf : les nœuds de remplissage envoient toujours à gauche
+        threshold = np.full((len(trees), n_internal), np.inf)
+        leaf_value = np.zeros((len(trees), n_internal + 1))
+
+        for index, tree in enumerate(trees):
+            values = tree.value[:, 0, 0] * model.learning_rate
+            stack = [(0, 0)]  # (nœud sklearn, position dans le tas)
+            while stack:
+                node, position = stack.pop()
+                left = tree.children_left[node]
+                if left == -1:
+                    # Feuille : recopier sa valeur sur toutes les feuilles du sous-arbre
+                    first = last = position
+                    while first < n_internal:
+                        first, last = 2 * first + 1, 2 * last + 2
+                    leaf_value[index, first - n_internal : last - n_internal + 1] = (
+                        values[node]
+                    )
+                    continue
+                feature[index, position] = tree.feature[node]
+                threshold[index, position] = tree.threshold[node]
+                stack.append((left, 2 * position + 1))
+                stack.append((tree.children_right[node], 2 * position + 2))
+
+        if isinstance(model.init_, str) and model.init_ == "zero":
+            init = 0.0
+        else:
+            init = float(np.ravel(model.init_.predict(np.zeros((1, n_features))))[0])
+
+        return cls(
+            feature=feature,
+            threshold=_floor_float32(threshold),
+            leaf_value=leaf_value,
+            init=init,
+            n_features=n_features,
+        )
+
+    def predict(self, X, chunk_size: Optional[int] = None) -> np.ndarray:
+        """Prédit un lot N×F (mêmes conventions que ``model.predict``)"""
+        # Même conversion que scikit-learn avant le parcours des arbres
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Matrice N×{self.n_features} attendue, reçu {X.shape}")
+
+        chunk_size = chunk_size or DEFAULT_CHUNK_SIZE
+        n_rows = X.shape[0]
+        out = np.empty(n_rows, dtype=np.float64)
+
+        for start in range(0, n_rows, chunk_size):
+            stop = min(start + chunk_size, n_rows)
+            out[start:stop] = self._predict_chunk(X[start:stop])
+
+        out += self.init
+        return out
+
+    def _predict_chunk(self, X: np.ndarray) -> np.ndarray:
+        """Parcourt tous les arbres niveau par niveau pour un bloc de lignes"""
+        X = np.ascontiguousarray(X)
+        row_offset = (np.arange(X.shape[0], dtype=np.intp) * self.n_features).reshape(
+            -1, 1
+        )
+        flat_x = X.ravel()
+
+        # Index plat des nœuds courants, un par (ligne, arbre)
+        node = np.broadcast_to(self._tree_offset, (X.shape[0], self.n_trees))
+        step = 1 - self._tree_offset
+        for _ in range(self.depth):
+            x = np.take(flat_x, np.take(self.feature, node) + row_offset)
+            go_right = x > np.take(self.threshold, node)
+            # position p -> 2p + 1 (+1 à droite), décalée par l'offset de l'arbre
+            node = 2 * node + step + go_right
+
+        return np.take(self.leaf_value, node + self._leaf_offset).sum(axis=1)
@@ -0,0 +1,154 @@
+"""
+✅ Validation vectorisée des caractéristiques brutes (règles de HouseFeatures)
+
+Les lots sont validés colonne par colonne avec NumPy : seules les lignes en
+erreur passent par du code Python, pour construire un message au format de
+``_format_validation_error`` (``champ: message; champ: message``).
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from features import AREA, BASE_FEATURE_NAMES, RAW_FEATURE_BOUNDS
+
+# Valeur sentinelle des champs absents d'un enregistrement
+MISSING = object()
+
+AREA_MIN, AREA_MAX = RAW_FEATURE_BOUNDS["area"]
+AREA_ERROR = "Value error, Surface doit être entre 1,000 et 20,000 sq ft"
+
+
+def _type_error(integer: bool, detail: str = "") -> str:
+    if integer:
+        message, kind = "Input should be a valid integer", "an integer"
+    else:
+        message, kind = "Input should be a valid number", "a number"
+    return f"{message}, {detail} {kind}" if detail else message
+
+
+def _parse_slow(values: Sequence[Any], integer: bool) -> Tuple[np.ndarray, Dict]:
+    """Conversion élément par élément (champs absents, chaînes invalides...)"""
+    column = np.full(len(values), np.nan)
+    messages = {}
+    for row, value in enumerate(values):
+        if value is MISSING:
+            messages[row] = "Field required"
+        elif isinstance(value, (bool, int, float)):
+            column[row] = value
+        elif isinstance(value, str):
+            try:
+                column[row] = float(value)
+            except ValueError:
+                messages[row] = _type_error(integer, "unable to parse string as")
+        else:
+            messages[row] = _type_error(integer)
+    return column, messages
+
+
+def parse_column(values: Sequence[Any], integer: bool) -> Tuple[np.ndarray, Dict]:
+    """Convertit une colonne (nombres ou chaînes) en float64
+
+    Retourne la colonne et les erreurs de conversion par ligne.
+    """
+    try:
+        column = np.array(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        return _parse_slow(values, integer)
+    if column.ndim != 1:
+        return _parse_slow(values, integer)
+
+    # NumPy convertit None en NaN: seules ces lignes sont revérifiées
+    messages = {}
+    for row in np.flatnonzero(np.isnan(column)):
+        if values[row] is None:
+            messages[int(row)] = _type_error(integer)
+    return column, messages
+
+
+def validate_raw(raw: np.ndarray, field_errors: Optional[Dict[int, List[str]]] = None):
+    """Applique les contraintes de HouseFeatures à une matrice brute N×12
+
+    ``field_errors`` contient les erreurs de conversion déjà détectées
+    (``{ligne: ["champ: message", ...]}``) ; les colonnes concernées ne sont
+    pas revérifiées pour ces lignes. Retourne le masque des lignes valides et
+    les messages d'erreur par ligne.
+    """
+    raw = np.asarray(raw, dtype=np.float64)
+    field_errors = field_errors or {}
+    failed = np.zeros(raw.shape, dtype=bool)
+    for row, messages in field_errors.items():
+        for message in messages:
+            failed[row, BASE_FEATURE_NAMES.index(message.split(":", 1)[0])] = True
+
+    per_row: Dict[int, Dict[int, str]] = {}
+
+    def flag(column: int, mask: np.ndarray, message: str):
+        mask &= ~failed[:, column]
+        failed[:, column] |= mask
+        for row in np.flatnonzero(mask):
+            per_row.setdefault(int(row), {})[column] = message
+
+    with np.errstate(invalid="ignore"):
+        area = raw[:, AREA]
+        flag(AREA, ~(area > 0), "Input should be greater than 0")
+        flag(AREA, (area < AREA_MIN) | (area > AREA_MAX), AREA_ERROR)
+
+        for column, name in enumerate(BASE_FEATURE_NAMES):
+            if column == AREA:
+                continue
+            low, high = RAW_FEATURE_BOUNDS[name]
+            values = raw[:, column]
+            flag(column, ~np.isfinite(values), "Input should be a finite number")
+            flag(
+                column,
+                values != np.floor(values),
+                "Input should be a valid integer, got a number with a fractional part",
+            )
+            flag(
+                column, values < low, f"Input should be greater than or equal to {low}"
+            )
+            flag(column, values > high, f"Input should be less than or equal to {high}")
+
+    errors = {}
+    for row in set(field_errors) | set(per_row):
+        messages = list(field_errors.get(row, []))
+        messages += [
+            f"{BASE_FEATURE_NAMES[column]}: {message}"
+            for column, message in sorted(per_row.get(row, {}).items())
+        ]
+        # Même ordre que pydantic: les champs dans l'ordre de déclaration
+        messages.sort(key=lambda m: BASE_FEATURE_NAMES.index(m.split(":", 1)[0]))
+        errors[row] = "; ".join(messages)
+
+    valid = ~failed.any(axis=1)
+    return valid, errors
+
+
+def validate_columns(columns: Dict[str, Sequence[Any]], n_rows: int):
+    """Convertit et valide des colonnes brutes (``{nom: valeurs}``)
+
+    Retourne la matrice N×12 (NaN pour les champs invalides), le masque des
+    lignes valides et les messages d'erreur par ligne.
+    """
+    raw = np.empty((n_rows, len(BASE_FEATURE_NAMES)), dtype=np.float64)
+    field_errors: Dict[int, List[str]] = {}
+    for column, name in enumerate(BASE_FEATURE_NAMES):
+        values = columns.get(name)
+        if values is None:
+            values = [MISSING] * n_rows
+        raw[:, column], messages = parse_column(values, integer=column != AREA)
+        for row, message in messages.items():
+            field_errors.setdefault(row, []).append(f"{name}: {message}")
+
+    valid, errors = validate_raw(raw, field_errors)
+    return raw, valid, errors
+
+
+def validate_records(records: List[Dict[str, Any]]):
+    """Valide une liste de dictionnaires (mêmes règles que HouseFeatures)"""
+    columns = {
+        name: [record.get(name, MISSING) for record in records]
+        for name in BASE_FEATURE_NAMES
+    }
+    return validate_columns(columns, len(records))